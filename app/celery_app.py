@@ -1,5 +1,5 @@
 from celery import Celery
-from app.config.settings import REDIS_URL
+from app.config.settings import PAYMENT_VERIFY_SWEEP_INTERVAL, REDIS_URL
 
 # Create Celery instance
 celery_app = Celery(
@@ -17,3 +17,11 @@ celery_app.conf.update(
     timezone="Asia/Taipei",  # Set timezone
     enable_utc=True,
 )
+
+# Periodic tasks (run with: celery -A app.celery_app beat)
+celery_app.conf.beat_schedule = {
+    "verify-pending-payments": {
+        "task": "verify_pending_payments",
+        "schedule": PAYMENT_VERIFY_SWEEP_INTERVAL,
+    },
+}
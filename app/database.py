@@ -1,10 +1,314 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.config.settings import DATABASE_URL
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
 
-engine = create_engine(DATABASE_URL, echo=True)
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from sqlalchemy.sql.dml import UpdateBase
+from app.config.settings import (
+    ASYNC_DATABASE_REPLICA_URLS,
+    ASYNC_DATABASE_URL,
+    DATABASE_REPLICA_URLS,
+    DATABASE_URL,
+    DB_ECHO,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_TIMEOUT_MS,
+    REPLICA_LAG_CHECK_INTERVAL,
+    REPLICA_MAX_LAG,
+    REPLICA_RECEIVER_TIMEOUT,
+)
+from app.instrumentation import instrument_engine
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+logger = logging.getLogger(__name__)
+
+
+class _CheckoutWaitTimer:
+    """Pool mixin recording how long checkouts take to obtain a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            with self._wait_lock:
+                self.wait_count += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+class InstrumentedQueuePool(_CheckoutWaitTimer, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_CheckoutWaitTimer, AsyncAdaptedQueuePool):
+    pass
+
+
+def _engine_options(url: str, is_async: bool) -> Dict[str, Any]:
+    """Pool sizing, pre-ping, recycle and statement timeout for a database URL"""
+    parsed = make_url(url)
+    options: Dict[str, Any] = {"echo": DB_ECHO}
+
+    # In-memory SQLite lives in a single connection; keep SQLAlchemy's default pool
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+    if parsed.get_backend_name() == "postgresql" and DB_STATEMENT_TIMEOUT_MS > 0:
+        if is_async:
+            options["connect_args"] = {
+                "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+            }
+        else:
+            options["connect_args"] = {
+                "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+            }
+    return options
+
+
+def create_db_engine(url: str = DATABASE_URL) -> Engine:
+    """Create a synchronous engine configured from app.config.settings"""
+    db_engine = create_engine(url, **_engine_options(url, is_async=False))
+    instrument_engine(db_engine)
+    return db_engine
+
+
+def create_async_db_engine(url: str = ASYNC_DATABASE_URL):
+    """Create an async engine configured from app.config.settings"""
+    db_engine = create_async_engine(url, **_engine_options(url, is_async=True))
+    instrument_engine(db_engine.sync_engine)
+    return db_engine
+
+
+def pool_stats(pool: Pool) -> Dict[str, Any]:
+    """Checked-out, overflow and checkout wait statistics for a pool"""
+    stats: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        stats[name] = method() if callable(method) else None
+    wait_count = getattr(pool, "wait_count", None)
+    if wait_count is not None:
+        stats["wait_count"] = wait_count
+        stats["wait_mean_ms"] = round(pool.wait_total / wait_count * 1000, 3) if wait_count else 0.0
+        stats["wait_max_ms"] = round(pool.wait_max * 1000, 3)
+    return stats
+
+
+_REPLICATION_STATUS = text(
+    "SELECT pg_is_in_recovery(), r.pid, r.status, "
+    "EXTRACT(EPOCH FROM now() - r.last_msg_receipt_time), "
+    "pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn(), "
+    "EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) "
+    "FROM (SELECT 1) AS one LEFT JOIN pg_stat_wal_receiver AS r ON true"
+)
+
+
+def replication_lag(
+    in_recovery: bool,
+    receiver_pid: Optional[int],
+    receiver_status: Optional[str],
+    receipt_age: Optional[float],
+    replayed_all: Optional[bool],
+    replay_age: Optional[float],
+    receiver_timeout: float = REPLICA_RECEIVER_TIMEOUT,
+) -> float:
+    """
+    Seconds a standby is behind, from its recovery and WAL receiver status.
+
+    A standby whose WAL receiver is gone, not streaming, or has heard
+    nothing from the primary for receiver_timeout seconds raises
+    ConnectionError: it has stopped receiving, so having replayed all it
+    received says nothing about how old its data is. A streaming standby
+    that has replayed everything is caught up (the age of its last
+    replayed transaction only grows while the primary is idle). Without
+    the privileges to see the receiver's details (pg_read_all_stats) that
+    cannot be told apart, so the age of the last replayed transaction is
+    used as the lag.
+    """
+    if not in_recovery:
+        return 0.0
+    if receiver_pid is None:
+        raise ConnectionError("no WAL receiver is running")
+    if receiver_status is None:
+        return float(replay_age or 0.0)
+    if receiver_status != "streaming":
+        raise ConnectionError(f"WAL receiver is {receiver_status}")
+    if receipt_age is None or receipt_age > receiver_timeout:
+        raise ConnectionError("WAL receiver has not heard from the primary")
+    if replayed_all:
+        return 0.0
+    return float(replay_age or 0.0)
+
+
+def replica_lag(engine: Engine) -> float:
+    """Seconds the replica is behind the primary (0 where the backend has no replication)"""
+    if engine.dialect.name != "postgresql":
+        return 0.0
+    with engine.connect() as conn:
+        row = conn.execute(_REPLICATION_STATUS).one()
+    return replication_lag(*row)
+
+
+class ReplicaSet:
+    """
+    Round-robin choice over read replicas, skipping any lagging too far behind.
+
+    Lag is probed at most once per check interval, in a background thread,
+    so choosing a replica never blocks a request (or the event loop). A
+    replica is only used once a probe has reported it healthy; when none
+    is, callers fall back to the primary.
+    """
+
+    def __init__(
+        self,
+        engines: List[Engine],
+        max_lag: float = REPLICA_MAX_LAG,
+        check_interval: float = REPLICA_LAG_CHECK_INTERVAL,
+        lag_probe: Callable[[Engine], float] = replica_lag,
+    ):
+        self.engines = engines
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag_probe = lag_probe
+        self.lags: List[Optional[float]] = [None] * len(engines)
+        self._checked_at = 0.0
+        self._refreshing = False
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Probe every replica's lag now"""
+        lags: List[Optional[float]] = []
+        for engine in self.engines:
+            try:
+                lags.append(self.lag_probe(engine))
+            except Exception as e:
+                logger.warning(f"Replica {engine.url.render_as_string()} unavailable: {str(e)}")
+                lags.append(None)
+        with self._lock:
+            self.lags = lags
+            self._checked_at = time.monotonic()
+            self._refreshing = False
+
+    def _refresh_in_background(self):
+        with self._lock:
+            stale = time.monotonic() - self._checked_at >= self.check_interval
+            if not stale or self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, daemon=True).start()
+
+    def choose(self) -> Optional[int]:
+        """Index of the next healthy replica, or None to use the primary"""
+        if not self.engines:
+            return None
+        self._refresh_in_background()
+        healthy = [
+            index
+            for index, lag in enumerate(self.lags)
+            if lag is not None and lag <= self.max_lag
+        ]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to a replica when opened read-only.
+
+    A session created with info={"read_only": True} picks one healthy
+    replica on first use and keeps it for its lifetime; flushes and DML
+    statements, and every other session, always go to the primary bind.
+    """
+
+    def __init__(
+        self,
+        replicas: Optional[ReplicaSet] = None,
+        replica_binds: Optional[List[Engine]] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.replicas = replicas
+        self.replica_binds = replica_binds or []
+        self._replica_bind: Optional[Engine] = None
+        self._replica_chosen = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.info.get("read_only")
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+        ):
+            replica = self._choose_replica()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+    def _choose_replica(self) -> Optional[Engine]:
+        if not self._replica_chosen:
+            self._replica_chosen = True
+            index = self.replicas.choose() if self.replicas is not None else None
+            if index is not None:
+                self._replica_bind = self.replica_binds[index]
+        return self._replica_bind
+
+
+engine = create_db_engine()
+
+replica_engines = [create_db_engine(url) for url in DATABASE_REPLICA_URLS]
+replica_set = ReplicaSet(replica_engines)
+
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    replicas=replica_set,
+    replica_binds=replica_engines,
+)
+
+# Async engine (asyncpg / aiosqlite) for the async endpoints, so queries
+# do not block the event loop
+async_engine = create_async_db_engine()
+
+async_replica_engines = [create_async_db_engine(url) for url in ASYNC_DATABASE_REPLICA_URLS]
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+    # Replica lag is probed through the sync engines, which share the same servers
+    replicas=replica_set,
+    replica_binds=[replica.sync_engine for replica in async_replica_engines],
+)
 
 
 # Dependency
@@ -14,3 +318,32 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency for read-only endpoints, routed to a replica when one is healthy
+def get_read_db():
+    db = SessionLocal(info={"read_only": True})
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Async dependency
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Async dependency for read-only endpoints
+async def get_async_read_db():
+    async with AsyncSessionLocal(info={"read_only": True}) as db:
+        yield db
+
+
+async def dispose_engines():
+    """Close the pooled connections of every engine, primary and replicas"""
+    for sync_engine in [engine, *replica_engines]:
+        sync_engine.dispose()
+    for engine_async in [async_engine, *async_replica_engines]:
+        await engine_async.dispose()
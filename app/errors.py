@@ -111,6 +111,23 @@ class ConflictError(BaseAPIError):
         )
 
 
+class ServiceUnavailableError(BaseAPIError):
+    """Service temporarily unavailable error"""
+    
+    def __init__(
+        self, 
+        message: str = "Service temporarily unavailable", 
+        detail: Optional[Union[str, Dict[str, Any], List[Dict[str, Any]]]] = None,
+        code: Optional[str] = None
+    ):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            message=message,
+            detail=detail,
+            code=code or "ERR_SERVICE_UNAVAILABLE"
+        )
+
+
 class ServerError(BaseAPIError):
     """Internal server error"""
     
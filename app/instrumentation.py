@@ -0,0 +1,150 @@
+"""
+Per-request SQL instrumentation.
+
+Engine events count and time every statement executed while a request is
+being served. The middleware reports the totals in a Server-Timing header,
+aggregates them per endpoint, and logs statements that repeat within one
+request, the usual sign of an N+1 lazy load.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.settings import SQL_REPEATED_STATEMENT_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+
+class RequestQueryStats:
+    """Statements executed while serving one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements executed at least threshold times, most frequent first"""
+        return [(s, n) for s, n in self.statements.most_common() if n >= threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.3f};desc="{self.count} queries"'
+
+
+# Stats of the request being served; the same object is shared with the
+# threadpool workers that run sync endpoints, since they copy the context
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["query_start_time"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+
+def instrument_engine(engine: Engine):
+    """Attribute the engine's statements to the request being served"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class SQLMetrics:
+    """Query counts and database time aggregated per endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict[str, float]] = {}
+
+    def record(self, endpoint: str, stats: RequestQueryStats):
+        with self._lock:
+            totals = self._endpoints.setdefault(
+                endpoint, {"requests": 0, "queries": 0, "max_queries": 0, "seconds": 0.0}
+            )
+            totals["requests"] += 1
+            totals["queries"] += stats.count
+            totals["max_queries"] = max(totals["max_queries"], stats.count)
+            totals["seconds"] += stats.seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": totals["requests"],
+                    "queries_total": totals["queries"],
+                    "queries_mean": round(totals["queries"] / totals["requests"], 3),
+                    "queries_max": totals["max_queries"],
+                    "db_ms_mean": round(totals["seconds"] * 1000 / totals["requests"], 3),
+                }
+                for endpoint, totals in self._endpoints.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+sql_metrics = SQLMetrics()
+
+
+class SQLInstrumentationMiddleware:
+    """
+    ASGI middleware adding a Server-Timing header with the request's SQL
+    statement count and database time, and recording both per endpoint
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        metrics: SQLMetrics = sql_metrics,
+        repeated_statement_threshold: int = SQL_REPEATED_STATEMENT_THRESHOLD,
+    ):
+        self.app = app
+        self.metrics = metrics
+        self.repeated_statement_threshold = repeated_statement_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            # The router stores the matched route in the scope; use its path template
+            route = scope.get("route")
+            endpoint = f"{scope['method']} {route.path if route is not None else 'unmatched'}"
+            self.metrics.record(endpoint, stats)
+            for statement, times in stats.repeated(self.repeated_statement_threshold):
+                logger.warning(
+                    f"Possible N+1 in {endpoint}: statement ran {times} times: {statement}"
+                )
@@ -0,0 +1,238 @@
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+
+from app.config.settings import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_INTERVAL,
+    OUTBOX_PRUNE_INTERVAL,
+    OUTBOX_RETENTION,
+)
+from app.database import SessionLocal
+from app.models.outbox import OutboxEvent
+
+# Request handlers only stage events, so pika is loaded by the relay alone
+if TYPE_CHECKING:
+    from app.messaging.rabbitmq import RabbitMQClient
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_event(
+    db: Session, exchange: str, routing_key: str, message: Dict[str, Any]
+) -> OutboxEvent:
+    """
+    Stage an event in the outbox; it is committed with the caller's transaction
+    """
+    event = OutboxEvent(exchange=exchange, routing_key=routing_key, payload=message)
+    db.add(event)
+    return event
+
+
+def enqueue_events(
+    db: Session, exchange: str, routing_key: str, messages: List[Dict[str, Any]]
+):
+    """
+    Stage many events with one multi-row insert, committed with the caller's transaction
+    """
+    if messages:
+        db.execute(
+            insert(OutboxEvent),
+            [
+                {"exchange": exchange, "routing_key": routing_key, "payload": message}
+                for message in messages
+            ],
+        )
+
+
+class OutboxRelay:
+    """Relay that drains pending outbox events to RabbitMQ in batches"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        client: Optional["RabbitMQClient"] = None,
+        setup: Optional[Callable[["RabbitMQClient"], None]] = None,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        retention: float = OUTBOX_RETENTION,
+    ):
+        self.session_factory = session_factory
+        if client is None:
+            from app.messaging.rabbitmq import RabbitMQClient
+
+            client = RabbitMQClient()
+        self.client = client
+        self.setup = setup
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self._ready = False
+
+    def _prepare(self):
+        """Connect, declare topology and enable transactions once per connection"""
+        if not self._ready:
+            self.client.connect()
+            if self.setup is not None:
+                self.setup(self.client)
+            self.client.enable_transactions()
+            self._ready = True
+
+    def _reset(self):
+        """Drop the broker connection so the next batch reconnects"""
+        self._ready = False
+        try:
+            self.client.close()
+        except Exception as e:
+            logger.warning(f"Error closing RabbitMQ connection: {str(e)}")
+
+    def _publish(self, events: List[OutboxEvent]):
+        """Publish events and commit them with one broker round trip"""
+        self._prepare()
+        for event in events:
+            self.client.publish_message(
+                exchange=event.exchange,
+                routing_key=event.routing_key,
+                message=event.payload,
+                message_id=str(event.id),
+            )
+        self.client.commit()
+
+    def relay_batch(self) -> int:
+        """
+        Publish one batch of pending events and mark the committed ones as sent.
+
+        The batch is published in a channel transaction, so the broker is
+        waited on once per batch rather than once per event. If the batch
+        fails, its events are published one at a time to find the ones the
+        broker rejects: those count an attempt and, after max_attempts, are
+        parked (left unpublished and skipped) while the rest go out.
+
+        Events are marked only after the broker commits them, so a crash
+        between publish and commit re-sends them: delivery is at-least-once
+        and consumers can de-duplicate on the message_id (the outbox id).
+        An unreachable broker raises without counting attempts.
+        """
+        db = self.session_factory()
+        try:
+            events = (
+                db.query(OutboxEvent)
+                .filter(
+                    OutboxEvent.published_at.is_(None),
+                    OutboxEvent.attempts < self.max_attempts,
+                )
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if not events:
+                return 0
+
+            delivered: List[int] = []
+            failed: List[OutboxEvent] = []
+            error = None
+            try:
+                self._publish(events)
+                delivered = [event.id for event in events]
+            except Exception as e:
+                logger.warning(f"Outbox batch failed, publishing events one by one: {str(e)}")
+                self._reset()
+                for event in events:
+                    try:
+                        self._prepare()
+                    except Exception as e:
+                        # The broker is down rather than rejecting an event
+                        error = e
+                        break
+                    try:
+                        self._publish([event])
+                        delivered.append(event.id)
+                    except Exception as e:
+                        failed.append(event)
+                        self._reset()
+                        if event.attempts + 1 >= self.max_attempts:
+                            logger.error(
+                                f"Parking outbox event {event.id} after "
+                                f"{event.attempts + 1} attempts: {str(e)}"
+                            )
+
+            if delivered:
+                db.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_(delivered))
+                    .values(
+                        published_at=datetime.now(timezone.utc),
+                        attempts=OutboxEvent.attempts + 1,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            if failed:
+                db.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_([event.id for event in failed]))
+                    .values(attempts=OutboxEvent.attempts + 1)
+                    .execution_options(synchronize_session=False)
+                )
+            db.commit()
+
+            if error is not None:
+                self._reset()
+                raise error
+            return len(delivered)
+        finally:
+            db.close()
+
+    def prune(self) -> int:
+        """Delete events published more than retention seconds ago"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.retention)
+        db = self.session_factory()
+        try:
+            pruned = db.execute(
+                delete(OutboxEvent)
+                .where(OutboxEvent.published_at < cutoff)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            return pruned
+        finally:
+            db.close()
+
+    def run(
+        self,
+        poll_interval: float = OUTBOX_POLL_INTERVAL,
+        prune_interval: float = OUTBOX_PRUNE_INTERVAL,
+    ):
+        """Relay events until interrupted, polling when the outbox is drained"""
+        logger.info(f"Outbox relay started, batch size {self.batch_size}")
+        prune_at = time.monotonic()
+        while True:
+            if time.monotonic() >= prune_at:
+                prune_at = time.monotonic() + prune_interval
+                try:
+                    pruned = self.prune()
+                    if pruned:
+                        logger.info(f"Pruned {pruned} published outbox events")
+                except Exception as e:
+                    logger.error(f"Error pruning outbox events: {str(e)}")
+
+            try:
+                relayed = self.relay_batch()
+            except Exception as e:
+                logger.error(f"Error relaying outbox events: {str(e)}")
+                time.sleep(poll_interval)
+                continue
+
+            if relayed:
+                logger.info(f"Relayed {relayed} outbox events")
+            if relayed < self.batch_size:
+                time.sleep(poll_interval)
+
+    def close(self):
+        """Close connection"""
+        self._reset()
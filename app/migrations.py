@@ -0,0 +1,46 @@
+"""
+Run the Alembic migrations that own the database schema
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+
+from app.config.settings import DATABASE_URL
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Search index objects the migrations create outside the models: the PostgreSQL
+# expression index and the SQLite FTS5 table with its shadow tables
+UNMANAGED_INDEXES = ("ix_products_search",)
+UNMANAGED_TABLE_PREFIX = "products_fts"
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """
+    Keep the unmanaged search index objects out of autogenerate comparisons
+    """
+    if type_ == "table":
+        return not name.startswith(UNMANAGED_TABLE_PREFIX)
+    if type_ == "index":
+        return name not in UNMANAGED_INDEXES
+    return True
+
+
+def alembic_config(url: str = DATABASE_URL) -> Config:
+    """
+    Alembic configuration for the given database, usable from any working directory
+    """
+    config = Config(os.path.join(PROJECT_ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(PROJECT_ROOT, "migrations"))
+    config.set_main_option("sqlalchemy.url", url)
+    # Leave the caller's logging configuration alone
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def upgrade_schema(url: str = DATABASE_URL, revision: str = "head"):
+    """
+    Upgrade the database to the given revision (the latest by default)
+    """
+    command.upgrade(alembic_config(url), revision)
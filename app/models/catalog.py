@@ -0,0 +1,22 @@
+from sqlalchemy import BigInteger, Column, Float, Integer
+from app.models.base import Base
+
+
+class CatalogVersion(Base):
+    """Single row counting product writes; bumped in the same transaction as each one"""
+
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False)
+    changed_at = Column(Float, nullable=False)  # Unix time of the last product write
+
+
+class ProductVersion(Base):
+    """Catalog version of each product's last write (kept after a delete), set in the same transaction"""
+
+    __tablename__ = "product_versions"
+
+    product_id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, index=True)
+    changed_at = Column(Float, nullable=False)  # Unix time of the write
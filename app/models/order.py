@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
+from datetime import datetime, timezone
 from app.models.base import Base
 
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class OrderStatus(str, enum.Enum):
     PENDING = "pending"
     PAID = "paid"
@@ -29,23 +34,38 @@ class Order(Base):
     status = Column(Enum(OrderStatus), default=OrderStatus.PENDING)
     payment_method = Column(Enum(PaymentMethod), nullable=True)
     payment_status = Column(String, default="pending")
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set by the application with microsecond precision, so (created_at, id)
+    # keyset cursors round-trip exactly on every backend
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    # Use string reference to User model and lazy='joined' to avoid N+1 query problems
-    user = relationship(
-        "User", foreign_keys=[user_id], back_populates="orders", lazy="joined"
-    )
+    # Relationships load lazily by default; each query chooses what to eager
+    # load for its response (see the loading profiles in OrderService)
+    user = relationship("User", foreign_keys=[user_id], back_populates="orders")
     items = relationship(
         "OrderItem", back_populates="order", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # A user's order history, newest first, optionally for one status
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index(
+            "ix_orders_user_id_status_created_at_id",
+            "user_id",
+            "status",
+            "created_at",
+            "id",
+        ),
+        # The payment sweep walks pending orders in id order
+        Index("ix_orders_status_id", "status", "id"),
+    )
+
 
 class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
     quantity = Column(Integer)
     price = Column(Float)  # Record the price at the time of purchase
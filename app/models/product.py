@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, Index
 from app.models.base import Base
 
 
@@ -7,5 +7,16 @@ class Product(Base):
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String, index=True)
-    description = Column(String, index=True)
+    description = Column(String)
     price = Column(Float)
+
+    __table_args__ = (
+        # Price-range filters on the paginated catalog listing
+        Index("ix_products_price_id", "price", "id"),
+        # Name-prefix filters (LIKE 'abc%') need pattern ops on non-C collations
+        Index(
+            "ix_products_name_pattern",
+            "name",
+            postgresql_ops={"name": "text_pattern_ops"},
+        ),
+    )
@@ -0,0 +1,84 @@
+from fastapi import APIRouter
+
+from app.database import (
+    async_engine,
+    async_replica_engines,
+    engine,
+    pool_stats,
+    replica_engines,
+    replica_set,
+)
+from app.instrumentation import sql_metrics
+from app.services.order_intake import order_intake
+from app.services.catalog_version import catalog_version_cache
+from app.services.password_hasher import password_hasher
+from app.services.product_cache import product_cache
+from app.services.product_suggest import product_suggester
+from app.services.response_cache import product_response_cache
+
+router = APIRouter(prefix="/internal", include_in_schema=False)
+
+
+@router.get("/db-pool")
+def get_db_pool_stats():
+    """
+    Connection pool statistics per engine, for sizing pools against worker counts
+    """
+    return {
+        "primary": pool_stats(engine.pool),
+        "primary_async": pool_stats(async_engine.sync_engine.pool),
+        "replicas": [
+            {**pool_stats(replica.pool), "lag_seconds": lag}
+            for replica, lag in zip(replica_engines, replica_set.lags)
+        ],
+        "replicas_async": [
+            pool_stats(replica.sync_engine.pool) for replica in async_replica_engines
+        ],
+    }
+
+
+@router.get("/sql-metrics")
+def get_sql_metrics():
+    """
+    SQL statement counts and database time per endpoint, to spot N+1 queries
+    """
+    return sql_metrics.snapshot()
+
+
+@router.get("/order-intake")
+def get_order_intake_stats():
+    """
+    Pending orders and group-commit sizes of the asynchronous order intake
+    """
+    return order_intake.stats()
+
+
+@router.get("/password-hasher")
+def get_password_hasher_stats():
+    """
+    Queue depth, rejections and latency of the bcrypt process pool
+    """
+    return password_hasher.stats()
+
+
+@router.get("/product-cache")
+def get_product_cache_stats():
+    """
+    Hits per tier, database loads and coalesced misses of the product cache,
+    plus the encoded listing responses kept per catalog version and the
+    catalog version this process last saw
+    """
+    return {
+        **product_cache.stats(),
+        "responses": product_response_cache.stats(),
+        "catalog_version": catalog_version_cache.stats(),
+    }
+
+
+@router.get("/product-suggest")
+def get_product_suggest_stats():
+    """
+    Size, catalog version, rebuilds and applied name changes of the product
+    name suggestion index
+    """
+    return product_suggester.stats()
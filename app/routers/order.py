@@ -1,11 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from app.database import get_db
-from app.schemas.order import OrderCreate, OrderResponse, OrderListResponse
+from app.config.settings import (
+    ORDER_BULK_MAX_SIZE,
+    ORDER_INTAKE_MODE,
+    ORDER_PAGE_SIZE,
+    ORDER_PAGE_SIZE_MAX,
+)
+from app.database import get_db, get_read_db
+from app.models.order import Order, OrderStatus
+from app.schemas.order import (
+    OrderAccepted,
+    OrderBulkResponse,
+    OrderCreate,
+    OrderIntakeStatus,
+    OrderResponse,
+    OrderPage,
+)
+from app.services.order_intake import CREATED, order_intake
 from app.services.order_service import OrderService
-from app.errors import NotFoundError
+from app.errors import NotFoundError, ValidationError
 
 
 # Assume we have a simple user authentication mechanism
@@ -17,12 +34,27 @@ def get_current_user_id():
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 
-@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=OrderResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_202_ACCEPTED: {"model": OrderAccepted}},
+)
 def create_order(
     order_data: OrderCreate,
     db: Session = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id),
 ):
+    if ORDER_INTAKE_MODE == "async":
+        # Queue for the group-commit writer; the client polls the status URL
+        order_number = order_intake.submit(order_data, current_user_id)
+        status_url = router.url_path_for("get_order_intake_status", order_number=order_number)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"order_number": order_number, "status": "queued", "status_url": status_url},
+            headers={"Location": status_url},
+        )
+
     try:
         order = OrderService.create_order(db, order_data, current_user_id)
         return order
@@ -30,6 +62,47 @@ def create_order(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@router.post("/bulk", response_model=OrderBulkResponse)
+def create_orders_bulk(
+    orders: List[OrderCreate],
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """
+    Create many orders in one request and transaction, reporting each order's outcome
+    """
+    if not orders or len(orders) > ORDER_BULK_MAX_SIZE:
+        raise ValidationError(
+            message=f"Submit between 1 and {ORDER_BULK_MAX_SIZE} orders per request"
+        )
+    results = OrderService.create_orders_bulk(db, orders, current_user_id)
+    created = sum(1 for result in results if result["order"] is not None)
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+
+@router.get("/intake/{order_number}", response_model=OrderIntakeStatus)
+def get_order_intake_status(
+    order_number: str,
+    db: Session = Depends(get_read_db),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """
+    Status of an order accepted with 202: queued, created (with its id) or failed
+    """
+    intake_status = order_intake.status(order_number)
+    if intake_status is None:
+        # Accepted by another worker, or no longer tracked: created orders are in the database
+        order_id = (
+            db.query(Order.id)
+            .filter(Order.order_number == order_number, Order.user_id == current_user_id)
+            .scalar()
+        )
+        if order_id is None:
+            raise NotFoundError(message="Order not found")
+        intake_status = {"status": CREATED, "order_id": order_id}
+    return {"order_number": order_number, **intake_status}
+
+
 @router.get("/{order_id}", response_model=OrderResponse)
 def get_order(
     order_id: int,
@@ -42,12 +115,26 @@ def get_order(
     return order
 
 
-@router.get("/", response_model=List[OrderListResponse])
+@router.get("/", response_model=OrderPage)
 def get_user_orders(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    limit: int = Query(ORDER_PAGE_SIZE, ge=1, le=ORDER_PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    order_status: Optional[OrderStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: Session = Depends(get_read_db),
     current_user_id: int = Depends(get_current_user_id),
 ):
-    orders = OrderService.get_user_orders(db, current_user_id, skip, limit)
-    return orders
+    try:
+        orders, next_cursor = OrderService.get_user_orders(
+            db,
+            current_user_id,
+            limit=limit,
+            cursor=cursor,
+            status=order_status,
+            created_from=created_from,
+            created_to=created_to,
+        )
+    except ValueError as e:
+        raise ValidationError(message=str(e))
+    return {"items": orders, "next_cursor": next_cursor}
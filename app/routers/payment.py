@@ -2,10 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.order import PaymentMethod
 from app.services.payment_service import PaymentService
-from app.tasks.order_tasks import verify_payment_status
 
 router = APIRouter(prefix="/payments", tags=["payments"])
 
@@ -34,16 +33,13 @@ def process_payment(
             status_code=status.HTTP_400_BAD_REQUEST, detail=result["message"]
         )
 
-    # If payment is successful, asynchronously verify payment status in the background
-    if result["success"]:
-        # Use Celery task to asynchronously verify payment status
-        verify_payment_status.delay(payment_data.order_id)
+    # Successful payments are confirmed by the periodic verify_pending_payments sweep
 
     return result
 
 
 @router.get("/status/{order_id}", status_code=status.HTTP_200_OK)
-def check_payment_status(order_id: int, db: Session = Depends(get_db)):
+def check_payment_status(order_id: int, db: Session = Depends(get_read_db)):
     result = PaymentService.verify_payment_status(db, order_id)
 
     if not result["verified"]:
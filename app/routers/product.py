@@ -1,41 +1,158 @@
-from fastapi import APIRouter, Depends
-from typing import List
-from sqlalchemy.orm import Session
-from app.schemas.product import ProductSchema
-from app.database import get_db
+import hashlib
+import time
+from urllib.parse import urlencode
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config.settings import (
+    PRODUCT_PAGE_SIZE,
+    PRODUCT_PAGE_SIZE_MAX,
+    PRODUCT_SUGGEST_LIMIT,
+    PRODUCT_SUGGEST_LIMIT_MAX,
+    REPLICA_MAX_LAG,
+)
+from app.schemas.product import ProductSchema, ProductPage, ProductSuggestion
+from app.database import async_replica_engines, get_async_db, get_async_read_db
 from app.services.product import (
-    create_product,
-    get_products,
-    get_product,
-    update_product,
-    delete_product,
+    create_product_async,
+    get_products_async,
+    search_products_async,
+    get_product_async,
+    update_product_async,
+    delete_product_async,
 )
+from app.services.catalog_version import VersionInfo, catalog_version_cache
+from app.services.product_suggest import product_suggester
+from app.services.response_cache import product_response_cache
 from app.services.user import get_current_user
 from app.models.user import User
-from app.errors import NotFoundError
+from app.errors import NotFoundError, ValidationError
 
 router = APIRouter()
 
 
+def _catalog_etag(request: Request, version: VersionInfo) -> str:
+    """
+    Strong ETag for a catalog read: the catalog version plus the URL it answers,
+    since every product write bumps the version in its own transaction
+    """
+    query = urlencode(sorted(request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{request.url.path}?{query}".encode()).hexdigest()[:16]
+    return f'"{version.number}-{digest}"'
+
+
+def _not_modified(if_none_match: Optional[str], etag: str) -> Optional[Response]:
+    """A 304 response when the client already holds this ETag (weak comparison, RFC 9110)"""
+    if if_none_match and etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
+
+
+def _tag_response(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def _page_response(body: bytes, etag: str) -> Response:
+    response = Response(content=body, media_type="application/json")
+    _tag_response(response, etag)
+    return response
+
+
 @router.post("/products/", response_model=ProductSchema, status_code=201)
 async def create_product_endpoint(
     product: ProductSchema,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    return create_product(db, product)
+    return await create_product_async(db, product)
+
+
+@router.get("/products/", response_model=ProductPage)
+async def read_products_endpoint(
+    request: Request,
+    limit: int = Query(PRODUCT_PAGE_SIZE, ge=1, le=PRODUCT_PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    name_prefix: Optional[str] = Query(None, min_length=1),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    # Read the version before the rows, so the ETag never claims data newer than it sent.
+    # Pages read from a replica are only tagged once every replica can have the last write.
+    etag = None
+    version = await catalog_version_cache.current()
+    if not async_replica_engines or time.time() - version.changed_at > REPLICA_MAX_LAG:
+        etag = _catalog_etag(request, version)
+        not_modified = _not_modified(if_none_match, etag)
+        if not_modified is not None:
+            return not_modified
+        body = product_response_cache.get(etag)
+        if body is not None:
+            return _page_response(body, etag)
+
+    try:
+        products, next_cursor = await get_products_async(
+            db,
+            limit=limit,
+            cursor=cursor,
+            min_price=min_price,
+            max_price=max_price,
+            name_prefix=name_prefix,
+        )
+    except ValueError as e:
+        raise ValidationError(message=str(e))
+    page = {"items": products, "next_cursor": next_cursor}
+    if etag is None:
+        return page
+    # Encode once with pydantic-core and keep the bytes; later hits skip response_model entirely
+    body = ProductPage.model_validate(page, from_attributes=True).model_dump_json().encode()
+    product_response_cache.put(etag, body)
+    return _page_response(body, etag)
+
+
+@router.get("/products/search", response_model=ProductPage)
+async def search_products_endpoint(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(PRODUCT_PAGE_SIZE, ge=1, le=PRODUCT_PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    try:
+        products, next_cursor = await search_products_async(db, q, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise ValidationError(message=str(e))
+    return {"items": products, "next_cursor": next_cursor}
 
 
-@router.get("/products/", response_model=List[ProductSchema])
-async def read_products_endpoint(db: Session = Depends(get_db)):
-    return get_products(db)
+@router.get("/products/suggest", response_model=List[ProductSuggestion])
+async def suggest_products_endpoint(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(PRODUCT_SUGGEST_LIMIT, ge=1, le=PRODUCT_SUGGEST_LIMIT_MAX),
+):
+    # Served from the in-memory name index; no database session is opened
+    return await product_suggester.suggest(prefix, limit)
 
 
 @router.get("/products/{product_id}", response_model=ProductSchema)
-async def read_product_endpoint(product_id: int, db: Session = Depends(get_db)):
-    product = get_product(db, product_id)
+async def read_product_endpoint(
+    product_id: int,
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    version = await catalog_version_cache.current()
+    etag = _catalog_etag(request, version)
+    not_modified = _not_modified(if_none_match, etag)
+    if not_modified is not None:
+        return not_modified
+
+    product = await get_product_async(db, product_id, catalog_version=version.number)
     if product is None:
         raise NotFoundError(message="Product not found")
+    _tag_response(response, etag)
     return product
 
 
@@ -43,10 +160,10 @@ async def read_product_endpoint(product_id: int, db: Session = Depends(get_db)):
 async def update_product_endpoint(
     product_id: int,
     product: ProductSchema,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    updated_product = update_product(db, product_id, product)
+    updated_product = await update_product_async(db, product_id, product)
     if updated_product is None:
         raise NotFoundError(message="Product not found")
     return updated_product
@@ -55,10 +172,10 @@ async def update_product_endpoint(
 @router.delete("/products/{product_id}", status_code=204)
 async def delete_product_endpoint(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    success = delete_product(db, product_id)
+    success = await delete_product_async(db, product_id)
     if not success:
         raise NotFoundError(message="Product not found")
     return {"detail": "Product deleted"}
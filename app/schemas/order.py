@@ -54,3 +54,33 @@ class OrderListResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class OrderPage(BaseModel):
+    items: List[OrderListResponse]
+    next_cursor: Optional[str] = None
+
+
+class OrderBulkResult(BaseModel):
+    index: int  # Position of the order in the request array
+    order: Optional[OrderListResponse] = None
+    error: Optional[str] = None
+
+
+class OrderBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[OrderBulkResult]
+
+
+class OrderAccepted(BaseModel):
+    order_number: str
+    status: str
+    status_url: str
+
+
+class OrderIntakeStatus(BaseModel):
+    order_number: str
+    status: str  # queued, created or failed
+    order_id: Optional[int] = None
+    error: Optional[str] = None
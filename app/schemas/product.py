@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class ProductSchema(BaseModel):
@@ -7,3 +7,13 @@ class ProductSchema(BaseModel):
     name: str
     description: Optional[str] = None
     price: float
+
+
+class ProductPage(BaseModel):
+    items: List[ProductSchema]
+    next_cursor: Optional[str] = None
+
+
+class ProductSuggestion(BaseModel):
+    id: int
+    name: str
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config.settings import CATALOG_VERSION_TTL, PRODUCT_CACHE_TTL
+from app.database import AsyncSessionLocal
+from app.models.catalog import CatalogVersion, ProductVersion
+
+CATALOG_VERSION_ID = 1
+
+
+class VersionInfo(NamedTuple):
+    number: int
+    changed_at: float  # Unix time of the last product write
+
+
+def _bump_statement(now: float):
+    return (
+        update(CatalogVersion)
+        .where(CatalogVersion.id == CATALOG_VERSION_ID)
+        .values(version=CatalogVersion.version + 1, changed_at=now)
+        .returning(CatalogVersion.version, CatalogVersion.changed_at)
+    )
+
+
+def _first_version(now: float) -> CatalogVersion:
+    # Only databases built without the migrations lack the row
+    return CatalogVersion(id=CATALOG_VERSION_ID, version=int(now * 1000), changed_at=now)
+
+
+def _record_statements(product_id: int, version: VersionInfo):
+    values = {"version": version.number, "changed_at": version.changed_at}
+    return (
+        update(ProductVersion).where(ProductVersion.product_id == product_id).values(**values),
+        insert(ProductVersion).values(product_id=product_id, **values),
+    )
+
+
+def bump_catalog_version(db: Session, product_id: int) -> VersionInfo:
+    """
+    Increment the catalog version in the caller's transaction, so it commits
+    (or rolls back) with the write to product_id, and record it as that
+    product's version. The row stays locked until then, so call it just
+    before committing.
+    """
+    now = time.time()
+    row = db.execute(_bump_statement(now)).first()
+    if row is None:
+        db.add(_first_version(now))
+        db.flush()
+        version = VersionInfo(int(now * 1000), now)
+    else:
+        version = VersionInfo(*row)
+    # The catalog version row lock serialises this update-or-insert
+    record, first_record = _record_statements(product_id, version)
+    if db.execute(record).rowcount == 0:
+        db.execute(first_record)
+    return version
+
+
+async def read_catalog_version(db: AsyncSession) -> VersionInfo:
+    """The committed catalog version, read through the caller's session"""
+    row = (
+        await db.execute(
+            select(CatalogVersion.version, CatalogVersion.changed_at).where(
+                CatalogVersion.id == CATALOG_VERSION_ID
+            )
+        )
+    ).first()
+    return VersionInfo(*row) if row is not None else VersionInfo(0, 0.0)
+
+
+async def bump_catalog_version_async(db: AsyncSession, product_id: int) -> VersionInfo:
+    """Async version of bump_catalog_version"""
+    now = time.time()
+    row = (await db.execute(_bump_statement(now))).first()
+    if row is None:
+        db.add(_first_version(now))
+        await db.flush()
+        version = VersionInfo(int(now * 1000), now)
+    else:
+        version = VersionInfo(*row)
+    record, first_record = _record_statements(product_id, version)
+    if (await db.execute(record)).rowcount == 0:
+        await db.execute(first_record)
+    return version
+
+
+class CatalogVersionCache:
+    """
+    This process's view of the catalog version, and of which products the
+    recent versions wrote.
+
+    current() re-reads the version from the primary at most every ttl
+    seconds (concurrent callers share one query), together with the
+    product versions recorded since the last read, and observe() takes the
+    version a local write has just committed, which is equally current.
+    A write in another process is therefore seen after at most ttl.
+    product_version() answers from the writes of the last window seconds
+    (the life of a product cache entry); older writes precede any entry
+    still cached.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        ttl: float = CATALOG_VERSION_TTL,
+        window: float = PRODUCT_CACHE_TTL,
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.window = window
+        self.reads = 0
+        self._version: Optional[VersionInfo] = None
+        self._expires = 0.0
+        self._read_task: Optional["asyncio.Task[VersionInfo]"] = None
+        # Product id -> (version, changed_at) of its last write seen, and the
+        # catalog version product writes have been read up to
+        self._products: Dict[int, Tuple[int, float]] = {}
+        self._products_read_to: Optional[int] = None
+
+    async def current(self) -> VersionInfo:
+        """The catalog version, as of at most ttl seconds ago"""
+        if self._version is not None and time.monotonic() < self._expires:
+            return self._version
+        if self._read_task is None or self._read_task.done():
+            self._read_task = asyncio.ensure_future(self._read())
+        # Shielded so one caller going away does not cancel the read the others wait on
+        return await asyncio.shield(self._read_task)
+
+    def product_version(self, product_id: int) -> int:
+        """The version of the product's last write seen, 0 if none in the window"""
+        return self._products.get(product_id, (0, 0.0))[0]
+
+    def observe(self, version: VersionInfo, product_id: Optional[int] = None):
+        """Take a version committed by this process; the view never moves backwards"""
+        if product_id is not None:
+            self._record(product_id, version.number, version.changed_at)
+        if self._version is None or version.number >= self._version.number:
+            self._version = version
+            self._expires = time.monotonic() + self.ttl
+
+    def stats(self):
+        return {
+            "version": self._version.number if self._version else None,
+            "reads": self.reads,
+            "recent_product_writes": len(self._products),
+        }
+
+    async def _read(self) -> VersionInfo:
+        started = time.monotonic()
+        async with self.session_factory() as db:
+            # The version first: every product write up to it is then visible
+            version = await read_catalog_version(db)
+            query = select(
+                ProductVersion.product_id, ProductVersion.version, ProductVersion.changed_at
+            )
+            if self._products_read_to is None:
+                query = query.where(ProductVersion.changed_at >= time.time() - self.window)
+            else:
+                query = query.where(ProductVersion.version > self._products_read_to)
+            writes = (await db.execute(query)).all()
+        self.reads += 1
+        for product_id, number, changed_at in writes:
+            self._record(product_id, number, changed_at)
+        self._products_read_to = version.number
+        self._forget_before(time.time() - self.window)
+        if self._version is None or version.number >= self._version.number:
+            self._version = version
+        self._expires = started + self.ttl
+        return self._version
+
+    def _record(self, product_id: int, number: int, changed_at: float):
+        if number > self.product_version(product_id):
+            # Re-inserted, so the dict stays in write order for _forget_before
+            self._products.pop(product_id, None)
+            self._products[product_id] = (number, changed_at)
+
+    def _forget_before(self, cutoff: float):
+        while self._products:
+            product_id, (_, changed_at) = next(iter(self._products.items()))
+            if changed_at >= cutoff:
+                return
+            del self._products[product_id]
+
+
+catalog_version_cache = CatalogVersionCache()
@@ -0,0 +1,253 @@
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError, DisconnectionError, OperationalError
+from sqlalchemy.orm import Session
+
+from app.config.settings import (
+    ORDER_INTAKE_BATCH_SIZE,
+    ORDER_INTAKE_CLOSE_TIMEOUT,
+    ORDER_INTAKE_MAX_PENDING,
+    ORDER_INTAKE_RETRIES,
+    ORDER_INTAKE_RETRY_BACKOFF,
+    ORDER_INTAKE_STATUS_MAX,
+)
+from app.database import SessionLocal
+from app.errors import ServiceUnavailableError
+from app.models.order import Order
+from app.schemas.order import OrderCreate
+from app.services.order_service import OrderService, new_order_number
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+CREATED = "created"
+FAILED = "failed"
+
+Submission = Tuple[OrderCreate, int, str]
+
+
+def _is_transient(error: Exception) -> bool:
+    """Deadlocks, serialization failures and dropped connections, which may succeed if retried"""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, (OperationalError, DisconnectionError))
+
+
+class OrderIntake:
+    """
+    Accepts orders without writing them, for a background writer to commit in groups.
+
+    submit() only assigns an order number and enqueues; a single writer
+    thread, started on first use, takes everything queued (up to batch_size)
+    and writes it with OrderService.write_orders in one transaction. While
+    one group commits the next accumulates, so under load throughput is
+    bounded by group commits rather than a round trip per order. At most
+    max_pending orders may wait; beyond that submit() raises
+    ServiceUnavailableError (503).
+
+    A group failing with a transient database error (deadlock,
+    serialization failure, dropped connection) is retried up to retries
+    times, backing off from retry_backoff seconds; if it still fails, or
+    fails otherwise, its orders are written one at a time, so only the
+    orders that cannot be saved are marked failed.
+
+    The queue lives in this process's memory: close() writes what is
+    queued for at most close_timeout seconds, then logs the order numbers
+    it drops.
+
+    Statuses of queued and failed orders are kept in this process only
+    (the most recent status_max); created orders can also be found in the
+    database by order number.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: int = ORDER_INTAKE_BATCH_SIZE,
+        max_pending: int = ORDER_INTAKE_MAX_PENDING,
+        status_max: int = ORDER_INTAKE_STATUS_MAX,
+        retries: int = ORDER_INTAKE_RETRIES,
+        retry_backoff: float = ORDER_INTAKE_RETRY_BACKOFF,
+        close_timeout: float = ORDER_INTAKE_CLOSE_TIMEOUT,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.status_max = status_max
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.close_timeout = close_timeout
+        self._queue: "queue.Queue[Submission]" = queue.Queue(max_pending)
+        self._statuses: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._groups = 0
+        self._written = 0
+        self._largest_group = 0
+        self._retries = 0
+        self._split_groups = 0
+        self._dropped = 0
+
+    def submit(self, order_data: OrderCreate, user_id: int) -> str:
+        """Queue an order and return its number"""
+        order_number = new_order_number()
+        self._set_status(order_number, {"status": QUEUED})
+        try:
+            self._queue.put_nowait((order_data, user_id, order_number))
+        except queue.Full:
+            with self._lock:
+                self._statuses.pop(order_number, None)
+            raise ServiceUnavailableError(message="Order intake is full, please retry")
+        self._ensure_writer()
+        return order_number
+
+    def status(self, order_number: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            status = self._statuses.get(order_number)
+            return dict(status) if status is not None else None
+
+    def _set_status(self, order_number: str, status: Dict[str, Any]):
+        with self._lock:
+            self._statuses[order_number] = status
+            self._statuses.move_to_end(order_number)
+            while len(self._statuses) > self.status_max:
+                self._statuses.popitem(last=False)
+
+    def _ensure_writer(self):
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._stopping.clear()
+                self._writer = threading.Thread(
+                    target=self._run, name="order-intake-writer", daemon=True
+                )
+                self._writer.start()
+
+    def _run(self):
+        while True:
+            group = self._next_group()
+            if group is None:
+                return
+            if group:
+                self._write(group)
+
+    def _next_group(self) -> Optional[List[Submission]]:
+        """Everything queued, up to batch_size; None once stopped and drained"""
+        try:
+            group = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return None if self._stopping.is_set() else []
+        while len(group) < self.batch_size:
+            try:
+                group.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return group
+
+    def _write(self, group: List[Submission]):
+        try:
+            results = self._write_with_retries(group)
+        except Exception as e:
+            logger.error(
+                f"Error writing a group of {len(group)} orders, writing them one at a time: {str(e)}"
+            )
+            with self._lock:
+                self._split_groups += 1
+            results = [self._write_alone(submission) for submission in group]
+
+        for (_, _, order_number), result in zip(group, results):
+            if result["order"] is not None:
+                status = {"status": CREATED, "order_id": result["order"].id}
+            else:
+                status = {"status": FAILED, "error": result["error"]}
+            self._set_status(order_number, status)
+        with self._lock:
+            self._groups += 1
+            self._written += len(group)
+            self._largest_group = max(self._largest_group, len(group))
+
+    def _write_with_retries(self, submissions: List[Submission]) -> List[Dict[str, Any]]:
+        """OrderService.write_orders, retried with backoff on transient errors"""
+        for attempt in range(self.retries + 1):
+            db = self.session_factory()
+            try:
+                return OrderService.write_orders(db, submissions)
+            except Exception as e:
+                db.rollback()
+                if attempt == self.retries or not _is_transient(e):
+                    raise
+                logger.warning(f"Transient error writing {len(submissions)} orders, retrying: {str(e)}")
+                with self._lock:
+                    self._retries += 1
+            finally:
+                db.close()
+            time.sleep(self.retry_backoff * 2 ** attempt)
+
+    def _write_alone(self, submission: Submission) -> Dict[str, Any]:
+        order_number = submission[2]
+        try:
+            return self._write_with_retries([submission])[0]
+        except Exception as e:
+            # A commit whose connection dropped may have gone through after all
+            existing = self._find_order(order_number)
+            if existing is not None:
+                return {"order": existing, "error": None}
+            logger.error(f"Error writing order {order_number}: {str(e)}")
+            return {"order": None, "error": "Order could not be saved"}
+
+    def _find_order(self, order_number: str) -> Optional[Order]:
+        try:
+            with self.session_factory() as db:
+                return db.scalars(select(Order).where(Order.order_number == order_number)).first()
+        except Exception as e:
+            logger.error(f"Error looking up order {order_number}: {str(e)}")
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": self._queue.qsize(),
+                "groups": self._groups,
+                "orders": self._written,
+                "mean_group_size": round(self._written / self._groups, 3) if self._groups else 0.0,
+                "largest_group": self._largest_group,
+                "retries": self._retries,
+                "split_groups": self._split_groups,
+                "dropped": self._dropped,
+            }
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Write everything still queued and stop the writer, waiting at most
+        timeout seconds (close_timeout by default); orders still queued
+        then are dropped and logged
+        """
+        self._stopping.set()
+        with self._lock:
+            writer = self._writer
+        if writer is not None:
+            writer.join(self.close_timeout if timeout is None else timeout)
+        dropped = []
+        while True:
+            try:
+                dropped.append(self._queue.get_nowait()[2])
+            except queue.Empty:
+                break
+        if dropped:
+            logger.error(
+                f"Order intake closed with {len(dropped)} orders unwritten: {', '.join(dropped)}"
+            )
+            for order_number in dropped:
+                self._set_status(order_number, {"status": FAILED, "error": "Order was not saved"})
+            with self._lock:
+                self._dropped += len(dropped)
+        if writer is not None and writer.is_alive():
+            logger.error("Order intake writer still running at shutdown; its group may be lost")
+
+
+order_intake = OrderIntake()
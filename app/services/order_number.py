@@ -0,0 +1,277 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Callable, Optional, Tuple
+
+from app.config.settings import ORDER_NUMBER_NODE_ID, ORDER_NUMBER_NODE_LEASE_TTL, REDIS_URL
+from app.errors import ServiceUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Layout of the 63-bit id: | 41 bits ms since EPOCH_MS | 10 bits node | 12 bits sequence |
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+MAX_NODE_ID = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z; 41 bits of ms last ~69 years
+
+PREFIX = "ORD-"
+# Crockford base32: no I, L, O or U, so numbers are unambiguous when read out
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+WIDTH = 13  # 13 base32 digits hold 65 bits
+
+NODE_COUNTER_KEY = "order_number:nodes"
+NODE_LEASE_KEY = "order_number:node:{}"
+
+
+def default_node_id() -> int:
+    """Node id from the host name and process id, for when none can be leased"""
+    return zlib.crc32(f"{socket.gethostname()}:{os.getpid()}".encode()) & MAX_NODE_ID
+
+
+def _connect_redis():
+    # Imported here so the API does not load the Redis client until first use
+    import redis
+
+    return redis.Redis.from_url(
+        REDIS_URL, socket_timeout=1, socket_connect_timeout=1, decode_responses=True
+    )
+
+
+class NodeIdLease:
+    """
+    Node id leased from Redis, for processes without ORDER_NUMBER_NODE_ID.
+
+    INCR on a shared counter proposes ids in turn and SET NX claims the
+    first one no live process holds, for ttl seconds. A daemon thread
+    renews the claim every ttl/3. The lease is fenced locally: it counts
+    as held only until ttl seconds after the last successful claim or
+    renewal was sent, which is never later than Redis expires the key, so
+    once another process can take the id over this one has stopped using
+    it. A renewal that finds the id taken over claims a new one.
+    """
+
+    def __init__(
+        self,
+        redis_factory: Callable[[], Any] = _connect_redis,
+        ttl: float = ORDER_NUMBER_NODE_LEASE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.redis_factory = redis_factory
+        self.ttl = ttl
+        self.clock = clock
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        self.node_id: Optional[int] = None
+        self.expires_at = 0.0
+        self._redis: Any = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def acquire(self) -> int:
+        """Claim a node id and start renewing it"""
+        self._redis = self.redis_factory()
+        self._claim()
+        threading.Thread(target=self._keep_alive, name="order-number-lease", daemon=True).start()
+        return self.node_id
+
+    def current(self) -> Optional[int]:
+        """The leased node id, or None once the lease may have expired"""
+        with self._lock:
+            if self.clock() < self.expires_at:
+                return self.node_id
+            return None
+
+    def _held_until(self, node_id: int, sent_at: float):
+        with self._lock:
+            self.node_id = node_id
+            self.expires_at = sent_at + self.ttl
+
+    def _claim(self):
+        for _ in range(MAX_NODE_ID + 1):
+            sent_at = self.clock()
+            node_id = (self._redis.incr(NODE_COUNTER_KEY) - 1) & MAX_NODE_ID
+            if self._redis.set(
+                NODE_LEASE_KEY.format(node_id), self.owner, nx=True, px=int(self.ttl * 1000)
+            ):
+                self._held_until(node_id, sent_at)
+                return
+        raise RuntimeError("Every order number node id is leased")
+
+    def _extend(self, key: str) -> bool:
+        """Extend the key's expiry if this process still owns it, atomically"""
+        from redis.exceptions import WatchError
+
+        with self._redis.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                if pipe.get(key) != self.owner:
+                    return False
+                pipe.multi()
+                pipe.pexpire(key, int(self.ttl * 1000))
+                return bool(pipe.execute()[0])
+            except WatchError:
+                # The key changed hands between the check and the extension
+                return False
+
+    def renew(self):
+        """Extend the claim, or claim another id if it has been taken over"""
+        sent_at = self.clock()
+        node_id = self.node_id
+        key = NODE_LEASE_KEY.format(node_id)
+        if self._extend(key) or self._redis.set(
+            key, self.owner, nx=True, px=int(self.ttl * 1000)
+        ):
+            self._held_until(node_id, sent_at)
+            return
+        self._claim()
+        logger.warning(f"Order number node id {node_id} was taken over, now using {self.node_id}")
+
+    def _keep_alive(self):
+        while not self._stopped.wait(self.ttl / 3):
+            try:
+                self.renew()
+            except Exception as e:
+                logger.warning(f"Error renewing the order number node id lease: {str(e)}")
+
+    def release(self):
+        """Stop renewing and free the id for other processes"""
+        self._stopped.set()
+        with self._lock:
+            self.expires_at = 0.0
+        if self._redis is None or self.node_id is None:
+            return
+        try:
+            key = NODE_LEASE_KEY.format(self.node_id)
+            if self._redis.get(key) == self.owner:
+                self._redis.delete(key)
+            self._redis.close()
+        except Exception as e:
+            logger.warning(f"Error releasing the order number node id lease: {str(e)}")
+
+
+def encode(value: int) -> str:
+    digits = []
+    for _ in range(WIDTH):
+        value, digit = divmod(value, 32)
+        digits.append(ALPHABET[digit])
+    return PREFIX + "".join(reversed(digits))
+
+
+def decode(order_number: str) -> Tuple[int, int, int]:
+    """Split an order number into (unix time in ms, node id, sequence)"""
+    if not order_number.startswith(PREFIX) or len(order_number) != len(PREFIX) + WIDTH:
+        raise ValueError(f"Not a generated order number: {order_number}")
+    value = 0
+    for char in order_number[len(PREFIX):]:
+        value = value * 32 + ALPHABET.index(char)
+    sequence = value & MAX_SEQUENCE
+    node_id = (value >> SEQUENCE_BITS) & MAX_NODE_ID
+    timestamp_ms = (value >> (NODE_BITS + SEQUENCE_BITS)) + EPOCH_MS
+    return timestamp_ms, node_id, sequence
+
+
+class OrderNumberGenerator:
+    """
+    Snowflake-style order numbers: time, node id and a per-millisecond sequence.
+
+    Numbers are unique as long as every process writing orders has its own
+    node id (ORDER_NUMBER_NODE_ID, else leased from Redis on first use, else
+    a host/pid hash that may collide), so inserts never hit the unique index, and they increase
+    monotonically within a process, so they append to the end of the index
+    instead of landing on random pages. They are fixed-width base32, which
+    keeps string order equal to numeric order. When the clock goes
+    backwards, or more than 4096 numbers are drawn in one millisecond, the
+    generator keeps counting from its last timestamp rather than waiting.
+    """
+
+    def __init__(
+        self,
+        node_id: Optional[int] = ORDER_NUMBER_NODE_ID,
+        clock: Callable[[], float] = time.time,
+        lease_factory: Callable[[], NodeIdLease] = NodeIdLease,
+    ):
+        if node_id is not None and not 0 <= node_id <= MAX_NODE_ID:
+            raise ValueError(f"Order number node id must be between 0 and {MAX_NODE_ID}")
+        self._node_id = node_id
+        self._lease: Optional[NodeIdLease] = None
+        self.lease_factory = lease_factory
+        self.clock = clock
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._lease_lock = threading.Lock()
+
+    def _start_lease(self) -> Optional[NodeIdLease]:
+        """Lease a node id on first use; on failure fall back to the host/pid hash"""
+        with self._lease_lock:
+            if self._lease is not None or self._node_id is not None:
+                return self._lease
+            lease = self.lease_factory()
+            try:
+                lease.acquire()
+            except Exception as e:
+                lease.release()
+                self._node_id = default_node_id()
+                logger.warning(
+                    f"Could not lease an order number node id, using {self._node_id} from the "
+                    f"host name and process id, which may collide with another process; "
+                    f"set ORDER_NUMBER_NODE_ID: {str(e)}"
+                )
+                return None
+            self._lease = lease
+            return lease
+
+    @property
+    def node_id(self) -> int:
+        """
+        The node id to generate with. Apart from the first lease this does no
+        I/O: a leased id is only checked against its local expiry, and while
+        the lease is lost (not renewed within its ttl) no numbers are handed out.
+        """
+        if self._node_id is not None:
+            return self._node_id
+        lease = self._lease or self._start_lease()
+        if lease is None:
+            return self._node_id
+        node_id = lease.current()
+        if node_id is None:
+            raise ServiceUnavailableError(
+                message="Order numbers are unavailable until the node id lease is renewed"
+            )
+        return node_id
+
+    def next_id(self) -> int:
+        node_id = self.node_id
+        with self._lock:
+            now_ms = int(self.clock() * 1000) - EPOCH_MS
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            elif self._sequence < MAX_SEQUENCE:
+                self._sequence += 1
+            else:
+                # Sequence exhausted (or clock behind): borrow the next millisecond
+                self._last_ms += 1
+                self._sequence = 0
+            return (
+                (self._last_ms << (NODE_BITS + SEQUENCE_BITS))
+                | (node_id << SEQUENCE_BITS)
+                | self._sequence
+            )
+
+    def next(self) -> str:
+        return encode(self.next_id())
+
+    def close(self):
+        """Release a leased node id"""
+        with self._lease_lock:
+            lease, self._lease = self._lease, None
+        if lease is not None:
+            lease.release()
+
+
+order_number_generator = OrderNumberGenerator()
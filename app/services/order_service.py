@@ -1,26 +1,83 @@
-from sqlalchemy.orm import Session
-import uuid
-from typing import List
+from sqlalchemy import insert, tuple_
+from sqlalchemy.orm import Session, load_only, raiseload, selectinload
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import logging
 
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.product import Product
 from app.schemas.order import OrderCreate
-from app.messaging.order_events import OrderEventProducer
+from app.messaging.order_events import (
+    ORDER_EXCHANGE,
+    ORDER_CREATED_KEY,
+    order_created_message,
+)
+from app.messaging.outbox import enqueue_event, enqueue_events
+from app.services.order_number import order_number_generator
+from app.services.pagination import decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
+# Loading profiles: each fetches exactly what its response model returns.
+# Order detail (OrderResponse) needs the items, loaded with one IN query.
+ORDER_DETAIL_OPTIONS = (selectinload(Order.items), raiseload(Order.user))
+# Order history (OrderListResponse) needs a few columns and no relationships;
+# anything else raises instead of silently issuing a query per row.
+ORDER_LIST_OPTIONS = (
+    load_only(
+        Order.id,
+        Order.order_number,
+        Order.total_amount,
+        Order.status,
+        Order.created_at,
+        raiseload=True,
+    ),
+    raiseload("*"),
+)
+
+
+def _product_prices(db: Session, product_ids: Iterable[int]) -> Dict[int, float]:
+    """Resolve the current price of every product with a single IN query"""
+    product_ids = set(product_ids)
+    if not product_ids:
+        return {}
+    return dict(
+        db.query(Product.id, Product.price).filter(Product.id.in_(product_ids)).all()
+    )
+
+
+def _missing_products_error(order_data: OrderCreate, prices: Dict[int, float]) -> Optional[str]:
+    missing_ids = sorted({item.product_id for item in order_data.items} - prices.keys())
+    if missing_ids:
+        return f"Product IDs do not exist: {', '.join(map(str, missing_ids))}"
+    return None
+
+
+def _order_total(order_data: OrderCreate, prices: Dict[int, float]) -> float:
+    return sum(prices[item.product_id] * item.quantity for item in order_data.items)
+
+
+def new_order_number() -> str:
+    return order_number_generator.next()
+
 
 class OrderService:
     @staticmethod
     def create_order(db: Session, order_data: OrderCreate, user_id: int) -> Order:
 
-        order_number = f"ORD-{uuid.uuid4().hex[:8].upper()}"
+        prices = _product_prices(db, (item.product_id for item in order_data.items))
+        error = _missing_products_error(order_data, prices)
+        if error:
+            raise ValueError(error)
+
+        total_amount = _order_total(order_data, prices)
+
+        order_number = new_order_number()
 
         db_order = Order(
             order_number=order_number,
             user_id=user_id,
-            total_amount=0,  
+            total_amount=total_amount,
             status=OrderStatus.PENDING,
             payment_method=order_data.payment_method,
         )
@@ -28,67 +85,203 @@ class OrderService:
         db.add(db_order)
         db.flush()  # Get order ID
 
-        # Process order items
-        total_amount = 0
-
-        for item in order_data.items:
-            # Get product
-            product = (
-                db.query(Product).filter(Product.id == item.product_id).first()
-            )
-            if not product:
-                db.rollback()
-                raise ValueError(f"Product ID {item.product_id} does not exist")
-
-            # Create order item
-            order_item = OrderItem(
-                order_id=db_order.id,
-                product_id=product.id,
-                quantity=item.quantity,
-                price=product.price,
+        # Insert all order items in one executemany statement,
+        # recording the price at the time of purchase
+        if order_data.items:
+            db.execute(
+                insert(OrderItem),
+                [
+                    {
+                        "order_id": db_order.id,
+                        "product_id": item.product_id,
+                        "quantity": item.quantity,
+                        "price": prices[item.product_id],
+                    }
+                    for item in order_data.items
+                ],
             )
 
-            db.add(order_item)
-
-            # Calculate total amount
-            total_amount += product.price * item.quantity
-
-        db_order.total_amount = total_amount
+        # Stage the order_created event in the same transaction as the order;
+        # the outbox relay publishes it to RabbitMQ after commit
+        enqueue_event(
+            db,
+            ORDER_EXCHANGE,
+            ORDER_CREATED_KEY,
+            order_created_message(db_order.id, user_id, total_amount),
+        )
 
         db.commit()
         db.refresh(db_order)
 
-        # Publish order creation event to RabbitMQ
-        try:
-            producer = OrderEventProducer()
-            producer.publish_order_created(
-                order_id=db_order.id, user_id=user_id, total_amount=total_amount
+        return db_order
+
+    @staticmethod
+    def create_orders_bulk(
+        db: Session, orders_data: List[OrderCreate], user_id: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Create many orders for one user in one transaction, returning one result per input
+        """
+        return OrderService.write_orders(
+            db,
+            [(order_data, user_id, new_order_number()) for order_data in orders_data],
+        )
+
+    @staticmethod
+    def write_orders(
+        db: Session, submissions: List[Tuple[OrderCreate, int, str]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Write (order, user_id, order_number) submissions in one transaction.
+
+        All items of all orders are priced with one product lookup; orders,
+        items and their order_created outbox events are each written with a
+        single multi-row insert. An order referencing unknown products is
+        reported in its result and skipped, without failing the others.
+        """
+        prices = _product_prices(
+            db,
+            (item.product_id for order_data, _, _ in submissions for item in order_data.items),
+        )
+
+        results: List[Dict[str, Any]] = []
+        accepted: List[Tuple[Dict[str, Any], OrderCreate]] = []
+        order_rows: List[Dict[str, Any]] = []
+        for index, (order_data, user_id, order_number) in enumerate(submissions):
+            result = {"index": index, "order": None, "error": None}
+            results.append(result)
+            error = _missing_products_error(order_data, prices)
+            if error:
+                result["error"] = error
+                continue
+            accepted.append((result, order_data))
+            order_rows.append(
+                {
+                    "order_number": order_number,
+                    "user_id": user_id,
+                    "total_amount": _order_total(order_data, prices),
+                    "status": OrderStatus.PENDING,
+                    "payment_method": order_data.payment_method,
+                }
             )
-            producer.close()
-        except Exception as e:
-            logger.error(f"Error publishing order creation event: {str(e)}")
 
-        return db_order
+        if order_rows:
+            # RETURNING rows may come back in any order; match them to the
+            # accepted orders by their (unique) order numbers. Requiring
+            # parameter order would make some drivers insert row by row.
+            returned = {
+                order.order_number: order
+                for order in db.execute(
+                    insert(Order).returning(
+                        Order.id,
+                        Order.order_number,
+                        Order.user_id,
+                        Order.total_amount,
+                        Order.status,
+                        Order.created_at,
+                    ),
+                    order_rows,
+                )
+            }
+            created = [returned[row["order_number"]] for row in order_rows]
+
+            item_rows = [
+                {
+                    "order_id": order.id,
+                    "product_id": item.product_id,
+                    "quantity": item.quantity,
+                    "price": prices[item.product_id],
+                }
+                for order, (_, order_data) in zip(created, accepted)
+                for item in order_data.items
+            ]
+            if item_rows:
+                db.execute(insert(OrderItem), item_rows)
+
+            enqueue_events(
+                db,
+                ORDER_EXCHANGE,
+                ORDER_CREATED_KEY,
+                [
+                    order_created_message(order.id, order.user_id, order.total_amount)
+                    for order in created
+                ],
+            )
+            for order, (result, _) in zip(created, accepted):
+                result["order"] = order
+
+        db.commit()
+        return results
 
     @staticmethod
     def get_order_by_id(db: Session, order_id: int, user_id: int) -> Order:
         return (
             db.query(Order)
+            .options(*ORDER_DETAIL_OPTIONS)
             .filter(Order.id == order_id, Order.user_id == user_id)
             .first()
         )
 
     @staticmethod
     def get_user_orders(
-        db: Session, user_id: int, skip: int = 0, limit: int = 100
-    ) -> List[Order]:
-        return (
+        db: Session,
+        user_id: int,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        status: Optional[OrderStatus] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> Tuple[List[Order], Optional[str]]:
+        """
+        One page of a user's orders, newest first, and the cursor of the next page.
+
+        Pages are keyset-based on (created_at, id), served by the
+        (user_id[, status], created_at, id) indexes, so a deep page costs
+        the same as the first and stays stable while new orders arrive.
+        created_from is inclusive and created_to exclusive.
+        """
+        query = (
             db.query(Order)
+            .options(*ORDER_LIST_OPTIONS)
             .filter(Order.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
+        )
+        if status is not None:
+            query = query.filter(Order.status == status)
+        if created_from is not None:
+            query = query.filter(Order.created_at >= created_from)
+        if created_to is not None:
+            query = query.filter(Order.created_at < created_to)
+        if cursor:
+            after_created_at, after_id = OrderService._decode_order_cursor(cursor)
+            query = query.filter(
+                tuple_(Order.created_at, Order.id) < tuple_(after_created_at, after_id)
+            )
+
+        # Fetch one extra row to find out whether another page exists
+        orders = (
+            query.order_by(Order.created_at.desc(), Order.id.desc())
+            .limit(limit + 1)
             .all()
         )
+        next_cursor = None
+        if len(orders) > limit:
+            orders = orders[:limit]
+            last = orders[-1]
+            next_cursor = encode_cursor(
+                {"created_at": last.created_at.isoformat(), "id": last.id}
+            )
+        return orders, next_cursor
+
+    @staticmethod
+    def _decode_order_cursor(cursor: str) -> Tuple[datetime, int]:
+        position = decode_cursor(cursor)
+        created_at, order_id = position.get("created_at"), position.get("id")
+        if not isinstance(created_at, str) or not isinstance(order_id, int):
+            raise ValueError("Invalid pagination cursor")
+        try:
+            return datetime.fromisoformat(created_at), order_id
+        except ValueError:
+            raise ValueError("Invalid pagination cursor")
 
     @staticmethod
     def update_order_status(db: Session, order_id: int, status: OrderStatus) -> Order:
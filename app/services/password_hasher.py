@@ -0,0 +1,129 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from passlib.context import CryptContext
+
+from app.config.settings import PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_WORKERS
+from app.errors import ServiceUnavailableError
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+# Module-level so they can be pickled into the worker processes
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_password(password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated, size-limited process pool.
+
+    At most max_pending hash/verify calls may be queued or running at once;
+    beyond that callers get a ServiceUnavailableError (503) immediately, so
+    a login burst can neither pin every request thread on CPU nor queue up
+    unbounded work. A pool broken by a dying worker is replaced, and the
+    calls it failed are retried once on the new one.
+    """
+
+    def __init__(
+        self,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_pending: int = PASSWORD_HASH_MAX_PENDING,
+    ):
+        if workers < 1 or max_pending < 1:
+            raise ValueError(
+                f"PASSWORD_HASH_WORKERS and PASSWORD_HASH_MAX_PENDING must be positive, "
+                f"got {workers} and {max_pending}"
+            )
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._restarts = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash_password, password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._run(_verify_password, password, hashed_password)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _replace_executor(self, broken: ProcessPoolExecutor):
+        """Drop a broken pool so the next call starts a fresh one"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+            self._restarts += 1
+        broken.shutdown(wait=False)
+
+    def _submit(self, func: Callable, *args) -> Any:
+        executor = self._get_executor()
+        try:
+            return executor.submit(func, *args).result()
+        except BrokenProcessPool:
+            self._replace_executor(executor)
+            return self._get_executor().submit(func, *args).result()
+
+    def _run(self, func: Callable, *args) -> Any:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise ServiceUnavailableError(message="Password service is busy, please retry")
+
+        start = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return self._submit(func, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+                self._total_seconds += elapsed
+                self._max_seconds = max(self._max_seconds, elapsed)
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, rejections and hash latency (including queue wait)"""
+        with self._lock:
+            mean = self._total_seconds / self._completed if self._completed else 0.0
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "pool_restarts": self._restarts,
+                "mean_latency_ms": round(mean * 1000, 3),
+                "max_latency_ms": round(self._max_seconds * 1000, 3),
+            }
+
+    def close(self):
+        """Shut down the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher()
@@ -1,11 +1,13 @@
 from sqlalchemy.orm import Session
 import random
 from datetime import datetime
-import logging
 from app.models.order import Order, OrderStatus
-from app.messaging.order_events import OrderEventProducer
-
-logger = logging.getLogger(__name__)
+from app.messaging.order_events import (
+    ORDER_EXCHANGE,
+    PAYMENT_PROCESSED_KEY,
+    payment_processed_message,
+)
+from app.messaging.outbox import enqueue_event
 
 
 class PaymentService:
@@ -33,21 +35,15 @@ class PaymentService:
         if success:
             order.status = OrderStatus.PAID
             order.payment_status = "completed"
+            enqueue_event(
+                db,
+                ORDER_EXCHANGE,
+                PAYMENT_PROCESSED_KEY,
+                payment_processed_message(order.id, "completed", payment_method),
+            )
             db.commit()
             db.refresh(order)
 
-            # Publish payment processing event to RabbitMQ
-            try:
-                producer = OrderEventProducer()
-                producer.publish_payment_processed(
-                    order_id=order.id,
-                    payment_status="completed",
-                    payment_method=payment_method,
-                )
-                producer.close()
-            except Exception as e:
-                logger.error(f"Error publishing payment processing event: {str(e)}")
-
             return {
                 "success": True,
                 "message": "Payment successful",
@@ -58,21 +54,15 @@ class PaymentService:
             }
         else:
             order.payment_status = "failed"
+            enqueue_event(
+                db,
+                ORDER_EXCHANGE,
+                PAYMENT_PROCESSED_KEY,
+                payment_processed_message(order.id, "failed", payment_method),
+            )
             db.commit()
             db.refresh(order)
 
-            # Publish payment processing event to RabbitMQ
-            try:
-                producer = OrderEventProducer()
-                producer.publish_payment_processed(
-                    order_id=order.id,
-                    payment_status="failed",
-                    payment_method=payment_method,
-                )
-                producer.close()
-            except Exception as e:
-                logger.error(f"Error publishing payment processing event: {str(e)}")
-
             return {
                 "success": False,
                 "message": "Payment failed, please try again later",
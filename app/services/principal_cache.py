@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.config.settings import AUTH_CACHE_MAX_SIZE, AUTH_CACHE_TTL
+
+# Other processes only see a user change once their entry expires, so the
+# TTL is how long a deleted or renamed user can stay authenticated there
+MAX_TTL = 60.0
+
+
+class PrincipalCache:
+    """
+    Bounded LRU cache of verified access tokens to user principals.
+
+    An entry lives until the token's own exp claim or the TTL, whichever
+    comes first. When a user changes, this process drops every entry for
+    that user at once; other processes keep theirs until the TTL runs out,
+    which is why it may not exceed MAX_TTL. Lookups are keyed by the exact
+    token string, so a hit means the same token already passed signature
+    verification.
+    """
+
+    def __init__(self, max_size: int = AUTH_CACHE_MAX_SIZE, ttl: float = AUTH_CACHE_TTL):
+        if ttl > MAX_TTL:
+            raise ValueError(f"AUTH_CACHE_TTL may be at most {MAX_TTL:g} seconds, got {ttl:g}")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Any, str, float]]" = OrderedDict()
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Any]:
+        """Return the cached principal for a token, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[2] > time.time():
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                self._remove(token)
+            self.misses += 1
+            return None
+
+    def put(self, token: str, principal: Any, username: str, expires_at: Optional[float] = None):
+        """Cache a verified principal until the token expires or the TTL elapses"""
+        expires = time.time() + self.ttl
+        if expires_at is not None:
+            expires = min(expires, expires_at)
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (principal, username, expires)
+            self._tokens_by_user.setdefault(username, set()).add(token)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, username: str):
+        """Drop every cached token belonging to a user"""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(username, ())):
+                self._remove(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _remove(self, token: str):
+        _, username, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(username)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[username]
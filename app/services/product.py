@@ -1,23 +1,177 @@
+import re
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import Select, and_, column, func, literal_column, or_, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.config.settings import PRODUCT_PAGE_SIZE
+from app.errors import ServiceUnavailableError
 from app.models.product import Product
 from app.schemas.product import ProductSchema
+from app.services.catalog_version import (
+    bump_catalog_version,
+    bump_catalog_version_async,
+    catalog_version_cache,
+)
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.product_cache import product_cache
+from app.services.product_suggest import product_suggester
 
 
-def create_product(db: Session, product: ProductSchema) -> Product:
-    new_product = Product(
+def _new_product(product: ProductSchema) -> Product:
+    return Product(
         id=product.id,
         name=product.name,
         description=product.description,
         price=product.price,
     )
+
+
+def _product_data(product: Product) -> Dict[str, Any]:
+    return ProductSchema.model_validate(product, from_attributes=True).model_dump()
+
+
+def _apply_update(existing_product: Product, product: ProductSchema):
+    existing_product.name = product.name
+    existing_product.description = product.description
+    existing_product.price = product.price
+
+
+def _products_page_query(
+    limit: int,
+    cursor: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    name_prefix: Optional[str],
+) -> Select:
+    """Build the keyset query for one page, fetching one extra row"""
+    query = select(Product)
+    if cursor:
+        after_id = decode_cursor(cursor).get("id")
+        if not isinstance(after_id, int):
+            raise ValueError("Invalid pagination cursor")
+        query = query.where(Product.id > after_id)
+    if min_price is not None:
+        query = query.where(Product.price >= min_price)
+    if max_price is not None:
+        query = query.where(Product.price <= max_price)
+    if name_prefix:
+        query = query.where(Product.name.startswith(name_prefix, autoescape=True))
+
+    # Fetch one extra row to find out whether another page exists
+    return query.order_by(Product.id).limit(limit + 1)
+
+
+def _page_result(products: list[Product], limit: int) -> Tuple[list[Product], Optional[str]]:
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        next_cursor = encode_cursor({"id": products[-1].id})
+    return products, next_cursor
+
+
+# Weighted search document; must stay identical to the expression migration 0004
+# indexes (ix_products_search), or PostgreSQL cannot use the GIN index
+_PG_SEARCH_DOCUMENT = literal_column(
+    "(setweight(to_tsvector('english', coalesce(products.name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(products.description, '')), 'B'))"
+)
+_PG_SEARCH_CONFIG = literal_column("'english'")
+
+# SQLite FTS5 table created by migration 0004 and kept in step by triggers
+_products_fts = table("products_fts", column("rowid"))
+
+
+def _search_terms(search_text: str) -> list[str]:
+    return re.findall(r"\w+", search_text)
+
+
+def _search_query(
+    dialect: str, search_text: str, terms: list[str], limit: int, cursor: Optional[str]
+) -> Select:
+    """
+    Build the ranked query for one page of search results, fetching one extra row.
+
+    Pages continue from the (score, id) of the last result. ts_rank scores a
+    product from its own text alone, but SQLite's bm25 also depends on corpus
+    statistics (document count, average length, term frequencies), so on
+    SQLite every score shifts when products change between two pages and a
+    cursor may then skip or repeat results.
+    """
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery(_PG_SEARCH_CONFIG, search_text)
+        matches = select(
+            Product.id.label("id"),
+            func.ts_rank(_PG_SEARCH_DOCUMENT, tsquery).label("score"),
+        ).where(_PG_SEARCH_DOCUMENT.op("@@")(tsquery))
+    elif dialect == "sqlite":
+        # bm25 is lower for better matches; a name match weighs ten times a description match
+        fts = literal_column("products_fts")
+        matches = select(
+            _products_fts.c.rowid.label("id"),
+            (-func.bm25(fts, 10.0, 1.0)).label("score"),
+        ).where(fts.op("MATCH")(" ".join(f'"{term}"' for term in terms)))
+    else:
+        raise ServiceUnavailableError(message=f"Product search is not available on {dialect}")
+
+    matches = matches.subquery()
+    query = select(Product, matches.c.score).join(matches, matches.c.id == Product.id)
+    if cursor:
+        position = decode_cursor(cursor)
+        score, after_id = position.get("score"), position.get("id")
+        if not isinstance(score, (int, float)) or not isinstance(after_id, int):
+            raise ValueError("Invalid pagination cursor")
+        query = query.where(
+            or_(matches.c.score < score, and_(matches.c.score == score, Product.id > after_id))
+        )
+    # Best match first; ties (and the cursor) broken by id
+    return query.order_by(matches.c.score.desc(), Product.id).limit(limit + 1)
+
+
+def _search_result(rows: list, limit: int) -> Tuple[list[Product], Optional[str]]:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({"score": rows[-1].score, "id": rows[-1].Product.id})
+    return [row.Product for row in rows], next_cursor
+
+
+def create_product(db: Session, product: ProductSchema) -> Product:
+    new_product = _new_product(product)
     db.add(new_product)
+    db.flush()
+    bump_catalog_version(db, new_product.id)
     db.commit()
     db.refresh(new_product)
     return new_product
 
 
-def get_products(db: Session) -> list[Product]:
-    return db.query(Product).all()
+def get_products(
+    db: Session,
+    limit: int = PRODUCT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    name_prefix: Optional[str] = None,
+) -> Tuple[list[Product], Optional[str]]:
+    """
+    Return one page of products ordered by id, plus the cursor for the next page
+    """
+    query = _products_page_query(limit, cursor, min_price, max_price, name_prefix)
+    return _page_result(list(db.scalars(query)), limit)
+
+
+def search_products(
+    db: Session, search_text: str, limit: int = PRODUCT_PAGE_SIZE, cursor: Optional[str] = None
+) -> Tuple[list[Product], Optional[str]]:
+    """
+    Return one page of products matching the search text, best match first,
+    plus the cursor for the next page
+    """
+    terms = _search_terms(search_text)
+    if not terms:
+        return [], None
+    query = _search_query(db.get_bind().dialect.name, search_text, terms, limit, cursor)
+    return _search_result(db.execute(query).all(), limit)
 
 
 def get_product(db: Session, product_id: int) -> Product:
@@ -27,9 +181,8 @@ def get_product(db: Session, product_id: int) -> Product:
 def update_product(db: Session, product_id: int, product: ProductSchema) -> Product:
     existing_product = db.query(Product).filter(Product.id == product_id).first()
     if existing_product:
-        existing_product.name = product.name
-        existing_product.description = product.description
-        existing_product.price = product.price
+        _apply_update(existing_product, product)
+        bump_catalog_version(db, product_id)
         db.commit()
         db.refresh(existing_product)
     return existing_product
@@ -39,6 +192,110 @@ def delete_product(db: Session, product_id: int) -> bool:
     product = db.query(Product).filter(Product.id == product_id).first()
     if product:
         db.delete(product)
+        bump_catalog_version(db, product_id)
         db.commit()
         return True
     return False
+
+
+# Async versions for the async endpoints, backed by app.database.AsyncSessionLocal.
+# Reads by id go through product_cache; the writes below keep it and the
+# suggestion index current. Every write, sync or async, bumps the catalog
+# version and records it as the product's version in its own transaction.
+
+
+async def create_product_async(db: AsyncSession, product: ProductSchema) -> Product:
+    new_product = _new_product(product)
+    db.add(new_product)
+    await db.flush()
+    version = await bump_catalog_version_async(db, new_product.id)
+    await db.commit()
+    catalog_version_cache.observe(version, new_product.id)
+    await db.refresh(new_product)
+    await product_cache.put(_product_data(new_product), version.number)
+    product_suggester.upsert(new_product.id, new_product.name, version.number)
+    await product_suggester.publish(version.number, new_product.id, new_product.name)
+    return new_product
+
+
+async def get_products_async(
+    db: AsyncSession,
+    limit: int = PRODUCT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    name_prefix: Optional[str] = None,
+) -> Tuple[list[Product], Optional[str]]:
+    """
+    Return one page of products ordered by id, plus the cursor for the next page
+    """
+    query = _products_page_query(limit, cursor, min_price, max_price, name_prefix)
+    return _page_result(list(await db.scalars(query)), limit)
+
+
+async def search_products_async(
+    db: AsyncSession,
+    search_text: str,
+    limit: int = PRODUCT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Tuple[list[Product], Optional[str]]:
+    """
+    Return one page of products matching the search text, best match first,
+    plus the cursor for the next page
+    """
+    terms = _search_terms(search_text)
+    if not terms:
+        return [], None
+    query = _search_query(db.get_bind().dialect.name, search_text, terms, limit, cursor)
+    return _search_result((await db.execute(query)).all(), limit)
+
+
+async def get_product_async(
+    db: AsyncSession, product_id: int, catalog_version: int
+) -> Optional[ProductSchema]:
+    """
+    Return a product through the product cache; pass the catalog version read
+    for this request. Cache entries from before the product's last write
+    seen by then are skipped, and loads are cached as of that version, so
+    db must read from the primary.
+    """
+
+    async def load():
+        product = await db.get(Product, product_id)
+        return _product_data(product) if product is not None else None
+
+    changed = catalog_version_cache.product_version(product_id)
+    product = await product_cache.get(product_id, load, catalog_version, changed)
+    return ProductSchema(**product) if product is not None else None
+
+
+async def update_product_async(
+    db: AsyncSession, product_id: int, product: ProductSchema
+) -> Optional[Product]:
+    existing_product = await db.get(Product, product_id)
+    if existing_product:
+        _apply_update(existing_product, product)
+        version = await bump_catalog_version_async(db, product_id)
+        await db.commit()
+        catalog_version_cache.observe(version, product_id)
+        await db.refresh(existing_product)
+        await product_cache.put(_product_data(existing_product), version.number)
+        product_suggester.upsert(existing_product.id, existing_product.name, version.number)
+        await product_suggester.publish(
+            version.number, existing_product.id, existing_product.name
+        )
+    return existing_product
+
+
+async def delete_product_async(db: AsyncSession, product_id: int) -> bool:
+    product = await db.get(Product, product_id)
+    if product:
+        await db.delete(product)
+        version = await bump_catalog_version_async(db, product_id)
+        await db.commit()
+        catalog_version_cache.observe(version, product_id)
+        await product_cache.invalidate(product_id, version.number)
+        product_suggester.remove(product_id, version.number)
+        await product_suggester.publish(version.number, product_id, None)
+        return True
+    return False
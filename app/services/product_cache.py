@@ -0,0 +1,289 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.config.settings import (
+    PRODUCT_CACHE_L1_SIZE,
+    PRODUCT_CACHE_L1_TTL,
+    PRODUCT_CACHE_MISSING_TTL,
+    PRODUCT_CACHE_REDIS_RETRY,
+    PRODUCT_CACHE_REDIS_TIMEOUT,
+    PRODUCT_CACHE_REFILL_LOCK_TTL,
+    PRODUCT_CACHE_REFILL_WAIT,
+    PRODUCT_CACHE_TTL,
+    REDIS_URL,
+)
+
+logger = logging.getLogger(__name__)
+
+# Cached value of a product that does not exist (also written on delete)
+_MISSING = "null"
+
+
+def _connect_redis():
+    # Imported here so the API does not load the Redis client until first use
+    import redis.asyncio
+
+    return redis.asyncio.Redis.from_url(
+        REDIS_URL,
+        socket_timeout=PRODUCT_CACHE_REDIS_TIMEOUT,
+        socket_connect_timeout=PRODUCT_CACHE_REDIS_TIMEOUT,
+    )
+
+
+class ProductCache:
+    """
+    Read-through cache of products by id: an in-process LRU (L1) in front
+    of Redis (L2), which every API process shares.
+
+    get() checks L1, then L2, and only then calls the loader. Concurrent
+    misses for one product share a single load in each process, and across
+    processes the first to take a short Redis lock refills L2 while the
+    others wait briefly for its value, so an expiring hot product costs one
+    query rather than one per waiting request. Products that do not exist
+    are cached for missing_ttl.
+
+    Entries in both tiers carry a catalog version: the version the write
+    committed, or the one the reader held before loading (the data can
+    only be newer). get() is also given the version of the product's own
+    last write and treats older entries of that product as misses, so
+    after it is written the next reader reloads it from the database,
+    whether or not the write reached Redis, while writes to other products
+    leave its entries alone. Writes go through put() (create, update) and
+    invalidate() (delete), which overwrite L2 (retried once, even while
+    Redis is marked down) and this process's L1; a refill never replaces
+    an entry at a newer version.
+
+    Redis is only an optimisation: when it fails the cache logs, skips L2
+    reads for redis_retry seconds and reads through to the database.
+    """
+
+    def __init__(
+        self,
+        redis_factory: Callable[[], Any] = _connect_redis,
+        l1_size: int = PRODUCT_CACHE_L1_SIZE,
+        l1_ttl: float = PRODUCT_CACHE_L1_TTL,
+        ttl: float = PRODUCT_CACHE_TTL,
+        missing_ttl: float = PRODUCT_CACHE_MISSING_TTL,
+        refill_lock_ttl: float = PRODUCT_CACHE_REFILL_LOCK_TTL,
+        refill_wait: float = PRODUCT_CACHE_REFILL_WAIT,
+        redis_retry: float = PRODUCT_CACHE_REDIS_RETRY,
+    ):
+        self.redis_factory = redis_factory
+        self.l1_size = l1_size
+        self.l1_ttl = l1_ttl
+        self.ttl = ttl
+        self.missing_ttl = missing_ttl
+        self.refill_lock_ttl = refill_lock_ttl
+        self.refill_wait = refill_wait
+        self.redis_retry = redis_retry
+        self._redis = None
+        self._redis_down_until = 0.0
+        self._l1: "OrderedDict[int, Tuple[str, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refills: Dict[Tuple[int, int], "asyncio.Task[str]"] = {}
+        self._counters = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "loads": 0,
+            "coalesced": 0,
+            "redis_errors": 0,
+        }
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = self.redis_factory()
+        return self._redis
+
+    @redis.setter
+    def redis(self, client):
+        self._redis = client
+        self._redis_down_until = 0.0
+
+    @staticmethod
+    def key(product_id: int) -> str:
+        return f"product:{product_id}"
+
+    async def get(
+        self,
+        product_id: int,
+        load: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+        version: int,
+        changed: int,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return the product data as of at least changed, the catalog version
+        of the product's last write, calling load() to refill on a miss;
+        version is the caller's catalog version, which loads are stored at
+        """
+        value = self._l1_get(product_id, changed)
+        if value is not None:
+            self._count("l1_hits")
+            return json.loads(value)
+
+        refill_key = (product_id, changed)
+        refill = self._refills.get(refill_key)
+        if refill is None:
+            refill = asyncio.ensure_future(self._refill(product_id, load, version, changed))
+            self._refills[refill_key] = refill
+            refill.add_done_callback(lambda _: self._refills.pop(refill_key, None))
+        else:
+            self._count("coalesced")
+        # Shielded so one caller going away does not cancel the load the others wait on
+        return json.loads(await asyncio.shield(refill))
+
+    async def put(self, product: Dict[str, Any], version: int):
+        """Write a created or updated product, committed at version, through to both tiers"""
+        await self._write(product["id"], json.dumps(product), self.ttl, version)
+
+    async def invalidate(self, product_id: int, version: int):
+        """Mark a product deleted at version as missing in both tiers"""
+        await self._write(product_id, _MISSING, self.missing_ttl, version)
+
+    def clear(self):
+        """Empty this process's L1"""
+        with self._lock:
+            self._l1.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"l1_size": len(self._l1), **self._counters}
+
+    async def close(self):
+        if self._redis is not None:
+            client, self._redis = self._redis, None
+            await client.aclose()
+
+    async def _refill(self, product_id: int, load, version: int, changed: int) -> str:
+        key = self.key(product_id)
+        entry = _current(await self._l2(lambda redis: redis.get(key)), changed)
+        if entry is not None:
+            self._count("l2_hits")
+            return self._l1_put(product_id, entry[1], entry[0], overwrite=False)
+
+        # Only the process holding the refill lock loads; the others poll L2 for its value
+        lock_key = f"{key}:refill"
+        locked = await self._l2(
+            lambda redis: redis.set(lock_key, 1, nx=True, px=int(self.refill_lock_ttl * 1000)),
+            default=True,
+        )
+        if not locked:
+            deadline = time.monotonic() + self.refill_wait
+            while time.monotonic() < deadline and self._redis_available():
+                await asyncio.sleep(0.01)
+                entry = _current(await self._l2(lambda redis: redis.get(key)), changed)
+                if entry is not None:
+                    self._count("l2_hits")
+                    return self._l1_put(product_id, entry[1], entry[0], overwrite=False)
+
+        try:
+            self._count("loads")
+            product = await load()
+            if product is None:
+                value, ttl = _MISSING, self.missing_ttl
+            else:
+                value, ttl = json.dumps(product), self.ttl
+            await self._l2(lambda redis: self._store_loaded(redis, key, version, value, ttl))
+        finally:
+            if locked:
+                await self._l2(lambda redis: redis.delete(lock_key))
+        return self._l1_put(product_id, value, version, overwrite=False)
+
+    async def _store_loaded(self, redis, key: str, version: int, value: str, ttl: float):
+        """Replace an older L2 entry with a loaded value, unless a write stored a newer one"""
+        from redis.exceptions import WatchError
+
+        async with redis.pipeline(transaction=True) as pipe:
+            await pipe.watch(key)
+            stored = await pipe.get(key)
+            if stored is not None and _current(stored, version + 1) is not None:
+                return
+            pipe.multi()
+            pipe.set(key, _entry(version, value), px=int(ttl * 1000))
+            try:
+                await pipe.execute()
+            except WatchError:
+                # Written meanwhile; that value is at least as new as this one
+                pass
+
+    async def _write(self, product_id: int, value: str, ttl: float, version: int):
+        self._l1_put(product_id, value, version)
+        key = self.key(product_id)
+        for _ in range(2):
+            try:
+                await self.redis.set(key, _entry(version, value), px=int(ttl * 1000))
+                return
+            except Exception as e:
+                self._redis_failed(e)
+
+    async def _l2(self, command, default=None):
+        """Run a Redis command; default while Redis is unavailable"""
+        if not self._redis_available():
+            return default
+        try:
+            return await command(self.redis)
+        except Exception as e:
+            self._redis_failed(e)
+            return default
+
+    def _redis_failed(self, error: Exception):
+        self._count("redis_errors")
+        self._redis_down_until = time.monotonic() + self.redis_retry
+        logger.warning(f"Product cache Redis unavailable, reading through: {str(error)}")
+
+    def _redis_available(self) -> bool:
+        return time.monotonic() >= self._redis_down_until
+
+    def _l1_get(self, product_id: int, changed: int) -> Optional[str]:
+        with self._lock:
+            entry = self._l1.get(product_id)
+            if entry is not None and entry[1] > time.monotonic() and entry[2] >= changed:
+                self._l1.move_to_end(product_id)
+                return entry[0]
+            if entry is not None:
+                del self._l1[product_id]
+            return None
+
+    def _l1_put(self, product_id: int, value: str, version: int, overwrite: bool = True) -> str:
+        """Store a value; a refill (overwrite=False) keeps one a write stored meanwhile"""
+        with self._lock:
+            entry = self._l1.get(product_id)
+            if (
+                not overwrite
+                and entry is not None
+                and entry[1] > time.monotonic()
+                and entry[2] >= version
+            ):
+                return entry[0]
+            self._l1[product_id] = (value, time.monotonic() + self.l1_ttl, version)
+            self._l1.move_to_end(product_id)
+            while len(self._l1) > self.l1_size:
+                self._l1.popitem(last=False)
+        return value
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+
+def _entry(version: int, value: str) -> str:
+    """L2 value: the catalog version the data is at least as new as, then the data"""
+    return f"{version} {value}"
+
+
+def _current(raw: Optional[bytes], version: int) -> Optional[Tuple[int, str]]:
+    """The (version, value) of an L2 entry, unless it is missing or older than version"""
+    if raw is None:
+        return None
+    stored, _, value = raw.decode().partition(" ")
+    if int(stored) < version:
+        return None
+    return int(stored), value
+
+
+product_cache = ProductCache()
@@ -0,0 +1,367 @@
+import asyncio
+import json
+import logging
+import re
+import threading
+from array import array
+from bisect import bisect_left, insort
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings import (
+    PRODUCT_SUGGEST_CHANGE_LOG_SIZE,
+    PRODUCT_SUGGEST_GAP_WAIT,
+    PRODUCT_SUGGEST_SYNC_INTERVAL,
+)
+from app.database import AsyncSessionLocal
+from app.errors import ServiceUnavailableError
+from app.models.product import Product
+from app.services.catalog_version import catalog_version_cache, read_catalog_version
+from app.services.product_cache import product_cache
+
+logger = logging.getLogger(__name__)
+
+# An index entry packs a product id and the offset of a word in its name into one integer
+_OFFSET_BITS = 16
+_OFFSET_MASK = (1 << _OFFSET_BITS) - 1
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def _word_offsets(name: str) -> List[int]:
+    """Offsets of each word after the first, e.g. that of "Shoes" in "Running Shoes"."""
+    return [
+        match.start() for match in re.finditer(r"\w+", name) if match.start() <= _OFFSET_MASK
+    ][1:]
+
+
+async def _load_catalog(
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    The catalog version and every product name, from one primary session.
+
+    The version is read first, so the names are at least as new as it; an
+    index stamped with a version newer than its names (as a lagging replica
+    would give) would treat the missing writes as already applied.
+    """
+    async with session_factory() as db:
+        version = await read_catalog_version(db)
+        rows = [tuple(row) for row in await db.execute(select(Product.id, Product.name))]
+    return version.number, rows
+
+
+async def _catalog_version() -> Optional[int]:
+    return (await catalog_version_cache.current()).number
+
+
+def _product_cache_redis():
+    return product_cache.redis
+
+
+# A name change: (catalog version of the write, product id, new name or None if deleted)
+NameChange = Tuple[int, int, Optional[str]]
+
+
+class NameChangeLog:
+    """
+    Recent product name changes in Redis, shared by every API process: a
+    sorted set scored by the catalog version of each write, trimmed to the
+    newest size entries.
+    """
+
+    KEY = "catalog:name_changes"
+
+    def __init__(
+        self,
+        redis: Callable[[], Any] = _product_cache_redis,
+        size: int = PRODUCT_SUGGEST_CHANGE_LOG_SIZE,
+    ):
+        self.redis = redis
+        self.size = size
+
+    async def publish(self, version: int, product_id: int, name: Optional[str]):
+        async with self.redis().pipeline(transaction=True) as pipe:
+            pipe.zadd(self.KEY, {json.dumps([version, product_id, name]): version})
+            pipe.zremrangebyrank(self.KEY, 0, -self.size - 1)
+            await pipe.execute()
+
+    async def since(self, after: int, until: int) -> List[NameChange]:
+        """The changes with versions after `after`, up to and including `until`"""
+        rows = await self.redis().zrangebyscore(self.KEY, f"({after}", until)
+        return [tuple(json.loads(row)) for row in rows]
+
+
+class ProductSuggester:
+    """
+    In-memory prefix index of product names for type-ahead suggestions.
+
+    Each name is held once, as written; the index is two sorted arrays of
+    packed (product id, word offset) integers ordered by the normalized
+    name from that offset on: one entry per name, and one per later word.
+    suggest() binary-searches both, so names starting with the prefix come
+    first, then names with a later word starting with it, alphabetically,
+    and only reads memory.
+
+    The index is built with one query (at startup, or in the background
+    after a failed start) and then follows this process's product writes
+    through upsert() and remove(), which publish() shares with the other
+    processes. It remembers the catalog version it reflects; the task
+    start() runs checks the version every sync_interval seconds and, when a
+    write elsewhere has moved it on, applies the published changes in
+    version order while the current index keeps answering. Only when a
+    version is still missing after gap_wait (its publish failed, it came
+    from a sync write, or it was trimmed) is the index rebuilt from the
+    database.
+    """
+
+    def __init__(
+        self,
+        load_catalog: Callable[[], Awaitable[Tuple[int, List[Tuple[int, str]]]]] = _load_catalog,
+        catalog_version: Callable[[], Awaitable[Optional[int]]] = _catalog_version,
+        changes: Optional[NameChangeLog] = None,
+        sync_interval: float = PRODUCT_SUGGEST_SYNC_INTERVAL,
+        gap_wait: float = PRODUCT_SUGGEST_GAP_WAIT,
+    ):
+        self.load_catalog = load_catalog
+        self.catalog_version = catalog_version
+        self.changes = changes if changes is not None else NameChangeLog()
+        self.sync_interval = sync_interval
+        self.gap_wait = gap_wait
+        self.version: Optional[int] = None
+        self.built = False
+        self.rebuilds = 0
+        self.changes_applied = 0
+        self._display: Dict[int, str] = {}
+        self._names = array("q")
+        self._words = array("q")
+        self._lock = threading.Lock()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._sync_task: Optional["asyncio.Task[None]"] = None
+
+    async def build(self):
+        """Load every product name and replace the index"""
+        version, rows = await self.load_catalog()
+        # Sorting a large catalog takes seconds; a thread leaves the event loop serving
+        display, names, words = await asyncio.to_thread(_index, rows)
+        with self._lock:
+            self._display, self._names, self._words = display, names, words
+            self.version = version
+            self.built = True
+            self.rebuilds += 1
+
+    async def ensure_built(self) -> bool:
+        """Build the index unless it already is; False if building failed (logged)"""
+        if not self.built:
+            await asyncio.shield(self._start_rebuild())
+        return self.built
+
+    def start(self):
+        """Keep the index in step with the catalog from a background task"""
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Stop the background task and any rebuild or catch-up in progress"""
+        tasks = [task for task in (self._sync_task, self._task) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._sync_task = self._task = None
+
+    async def sync(self):
+        """
+        Bring the index up to the catalog version: build it if it is not,
+        apply the changes published since, or rebuild if the catalog moved
+        backwards (e.g. a restored database)
+        """
+        if not self.built:
+            await asyncio.shield(self._start_rebuild())
+            return
+        try:
+            version = await self.catalog_version()
+        except Exception as e:
+            logger.warning(f"Error reading the catalog version for suggestions: {str(e)}")
+            return
+        if version is None or self.version is None or version == self.version:
+            return
+        if version > self.version:
+            await asyncio.shield(self._start(lambda: self._logged(self._catch_up(version))))
+        else:
+            await asyncio.shield(self._start_rebuild())
+
+    async def suggest(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        """Up to limit products whose name, or a word in it, starts with the prefix"""
+        if not self.built:
+            self._start_rebuild()
+            raise ServiceUnavailableError(message="Product suggestions are unavailable, please retry")
+
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            key = _sort_key(self._display)
+            ids: List[int] = []
+            seen: Set[int] = set()
+            for entries in (self._names, self._words):
+                index = bisect_left(entries, (prefix,), key=key)
+                while index < len(entries) and len(ids) < limit:
+                    text, entry = key(entries[index])
+                    if not text.startswith(prefix):
+                        break
+                    product_id = entry >> _OFFSET_BITS
+                    if product_id not in seen:
+                        seen.add(product_id)
+                        ids.append(product_id)
+                    index += 1
+            return [{"id": product_id, "name": self._display[product_id]} for product_id in ids]
+
+    def upsert(self, product_id: int, name: Optional[str], version: Optional[int] = None):
+        """Apply a created or renamed product written by this process"""
+        with self._lock:
+            if not self.built:
+                return
+            self._replace(product_id, name)
+            self._advance(version)
+
+    def remove(self, product_id: int, version: Optional[int] = None):
+        """Apply a product deleted by this process"""
+        with self._lock:
+            if not self.built:
+                return
+            self._replace(product_id, None)
+            self._advance(version)
+
+    async def publish(self, version: int, product_id: int, name: Optional[str]):
+        """Share a name change written by this process (None for a delete)"""
+        try:
+            await self.changes.publish(version, product_id, name)
+        except Exception as e:
+            logger.warning(f"Error publishing a product name change: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "products": len(self._display),
+                "entries": len(self._names) + len(self._words),
+                "version": self.version,
+                "rebuilds": self.rebuilds,
+                "changes_applied": self.changes_applied,
+            }
+
+    def _replace(self, product_id: int, name: Optional[str]):
+        self._remove(product_id)
+        if name:
+            self._display[product_id] = name
+            key = _sort_key(self._display)
+            for entries, added in zip((self._names, self._words), _entries(product_id, name)):
+                for entry in added:
+                    insort(entries, entry, key=key)
+
+    def _remove(self, product_id: int):
+        name = self._display.get(product_id)
+        if name is None:
+            return
+        key = _sort_key(self._display)
+        for entries, removed in zip((self._names, self._words), _entries(product_id, name)):
+            for entry in removed:
+                index = bisect_left(entries, key(entry), key=key)
+                if index < len(entries) and entries[index] == entry:
+                    del entries[index]
+        del self._display[product_id]
+
+    def _advance(self, version: Optional[int]):
+        # Only a write directly after the indexed version keeps the index current;
+        # after a gap the next sync applies the missing changes first
+        if version is not None and self.version is not None and version == self.version + 1:
+            self.version = version
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self._logged(self.sync())
+
+    async def _catch_up(self, target: int):
+        """Apply the published changes up to target; rebuild if one stays missing"""
+        for attempt in range(2):
+            if attempt:
+                await asyncio.sleep(self.gap_wait)
+            try:
+                changes = await self.changes.since(self.version, target)
+            except Exception as e:
+                logger.warning(f"Error reading product name changes, rebuilding: {str(e)}")
+                break
+            with self._lock:
+                for version, product_id, name in sorted(changes):
+                    if version <= self.version:
+                        continue
+                    if version > self.version + 1:
+                        break
+                    self._replace(product_id, name)
+                    self.version = version
+                    self.changes_applied += 1
+                if self.version >= target:
+                    return
+        await self.build()
+
+    def _start_rebuild(self) -> "asyncio.Task[None]":
+        return self._start(lambda: self._logged(self.build()))
+
+    def _start(self, job: Callable[[], Awaitable[None]]) -> "asyncio.Task[None]":
+        """Start a rebuild or catch-up unless one is already running"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(job())
+        return self._task
+
+    async def _logged(self, job: Awaitable[None]):
+        try:
+            await job
+        except Exception as e:
+            logger.error(f"Error updating the product suggestion index: {str(e)}")
+
+
+def _index(rows: List[Tuple[int, str]]) -> Tuple[Dict[int, str], "array[int]", "array[int]"]:
+    """The names by product id, and the sorted name and later-word entries"""
+    display = {product_id: name for product_id, name in rows if name}
+    names, words = [], []
+    for product_id, name in display.items():
+        name_entries, word_entries = _entries(product_id, name)
+        names.extend(name_entries)
+        words.extend(word_entries)
+    key = _sort_key(display)
+    return display, _sorted(names, key), _sorted(words, key)
+
+
+def _entries(product_id: int, name: str) -> Tuple[List[int], List[int]]:
+    """A product's name entry and later-word entries"""
+    packed = product_id << _OFFSET_BITS
+    return [packed], [packed | offset for offset in _word_offsets(name)]
+
+
+def _sorted(entries: List[int], key: Callable[[int], Tuple[str, int]]) -> "array[int]":
+    """
+    Entries in index order, sorted one leading character at a time so
+    that only one bucket's sort keys are held at once, not a normalized
+    copy of every name and suffix
+    """
+    buckets: Dict[str, List[int]] = {}
+    for entry in entries:
+        buckets.setdefault(key(entry)[0][:1], []).append(entry)
+    ordered = array("q")
+    for first in sorted(buckets):
+        ordered.extend(sorted(buckets.pop(first), key=key))
+    return ordered
+
+
+def _sort_key(display: Dict[int, str]) -> Callable[[int], Tuple[str, int]]:
+    """Order of entries: the normalized name from the entry's offset on, then the entry"""
+    def key(entry: int) -> Tuple[str, int]:
+        return _normalize(display[entry >> _OFFSET_BITS][entry & _OFFSET_MASK:]), entry
+    return key
+
+
+product_suggester = ProductSuggester()
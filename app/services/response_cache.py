@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.config.settings import PRODUCT_RESPONSE_CACHE_MAX_AGE, PRODUCT_RESPONSE_CACHE_MAX_BYTES
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of encoded response bodies, limited by their total size.
+
+    Keys must identify the exact representation, e.g. the ETag built from the
+    catalog version and the request URL; entries for older versions are never
+    asked for again and age out as new ones arrive. No entry is served for
+    longer than max_age seconds after it was stored, whatever its key. A
+    body larger than the whole budget is not cached.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = PRODUCT_RESPONSE_CACHE_MAX_BYTES,
+        max_age: float = PRODUCT_RESPONSE_CACHE_MAX_AGE,
+    ):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (body, time.monotonic() + self.max_age)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters, entries and bytes held"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _remove(self, key: str):
+        body, _ = self._entries.pop(key)
+        self.size -= len(body)
+
+
+product_response_cache = ResponseCache()
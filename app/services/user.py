@@ -1,23 +1,37 @@
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError
 
 from ..models.user import User
 from ..schemas.user import UserCreate
 from .jwt_service import JWTService
+from .password_hasher import password_hasher
+from .principal_cache import PrincipalCache
 from ..database import get_db
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 jwt_service = JWTService()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
 
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_principal(mapper, connection, target):
+    # Any change to a user (or its removal) must revoke its cached tokens,
+    # including those issued under a username it has just been renamed from
+    usernames = {target.username, *inspect(target).attrs.username.history.deleted}
+    for username in usernames:
+        principal_cache.invalidate_user(username)
+
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    # bcrypt runs in the bounded hashing pool, not on the request thread
+    return password_hasher.hash(password)
 
 
 def create_user(db: Session, user: UserCreate):
@@ -31,7 +45,7 @@ def create_user(db: Session, user: UserCreate):
 
 def authenticate_user(db: Session, username: str, password: str):
     user = db.query(User).filter(User.username == username).first()
-    if not user or not pwd_context.verify(password, user.hashed_password):
+    if not user or not password_hasher.verify(password, user.hashed_password):
         return False
     return user
 
@@ -56,7 +70,14 @@ def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    payload = decode_access_token(token)
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    try:
+        payload = decode_access_token(token)
+    except JWTError:
+        raise credentials_exception
     if payload is None:
         raise credentials_exception
     username: str = payload.get("sub")
@@ -65,4 +86,8 @@ def get_current_user(
     user = db.query(User).filter(User.username == username).first()
     if user is None:
         raise credentials_exception
-    return user
+
+    # Cache a detached snapshot so hits skip both JWT verification and the query
+    principal = User(id=user.id, username=user.username)
+    principal_cache.put(token, principal, user.username, payload.get("exp"))
+    return principal
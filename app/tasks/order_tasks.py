@@ -1,22 +1,58 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from sqlalchemy import update
 from app.celery_app import celery_app
 from celery.utils.log import get_task_logger
-import time
+from app.config.settings import (
+    PAYMENT_VERIFY_BATCH_SIZE,
+    PAYMENT_VERIFY_DELAY,
+    PAYMENT_VERIFY_MAX_RETRIES,
+    PAYMENT_VERIFY_STALE_AFTER,
+    TASK_RETRY_BACKOFF_MAX,
+)
 from app.database import SessionLocal
+from app.messaging.order_events import (
+    ORDER_EXCHANGE,
+    PAYMENT_PROCESSED_KEY,
+    payment_processed_message,
+)
+from app.messaging.outbox import enqueue_events
 from app.models.order import Order, OrderStatus
 
 logger = get_task_logger(__name__)
 
 
-@celery_app.task(name="verify_payment_status")
-def verify_payment_status(order_id: int):
+class EmailDeliveryError(Exception):
+    """Transient failure talking to the email service"""
+
+
+def deliver_email(to: str, subject: str, body: str):
+    """
+    Hand a message to the email service
+
+    Connection errors and timeouts (OSError, which also covers smtplib
+    errors) propagate to the caller.
+    """
+    # In a real system, this would call an email service
+    logger.debug(f"Email to {to}: {subject}")
+
+
+def retry_countdown(retries: int) -> int:
+    """Exponential backoff for the given retry number, capped at the maximum"""
+    return min(PAYMENT_VERIFY_DELAY * 2**retries, TASK_RETRY_BACKOFF_MAX)
+
+
+@celery_app.task(name="verify_payment_status", bind=True, max_retries=PAYMENT_VERIFY_MAX_RETRIES)
+def verify_payment_status(self, order_id: int):
     """
     Asynchronous task for verifying payment status
+
+    While the payment is still pending the task reschedules itself with
+    exponential backoff rather than sleeping, so the worker slot is free
+    for other verifications in the meantime.
     """
     logger.info(f"Starting verification of payment status for order #{order_id}")
 
-    # Simulate network delay
-    time.sleep(5)
-
     # In a real system, this would call a payment provider's API
 
     # Get database connection
@@ -40,30 +76,142 @@ def verify_payment_status(order_id: int):
             logger.info(f"Payment for order #{order_id} confirmed and updated")
             return {"success": True, "status": "paid", "message": "Payment confirmed and updated"}
 
-        logger.warning(f"Payment for order #{order_id} not yet completed")
-        return {
-            "success": False,
-            "status": order.payment_status,
-            "message": "Payment not yet completed",
-        }
+        payment_status = order.payment_status
+    finally:
+        db.close()
+
+    if payment_status == "pending" and self.request.retries < self.max_retries:
+        countdown = retry_countdown(self.request.retries)
+        logger.info(f"Payment for order #{order_id} still pending, retrying in {countdown}s")
+        raise self.retry(countdown=countdown)
+
+    logger.warning(f"Payment for order #{order_id} not yet completed")
+    return {
+        "success": False,
+        "status": payment_status,
+        "message": "Payment not yet completed",
+    }
+
 
+def fetch_payment_statuses(order_ids: List[int]) -> Dict[int, str]:
+    """
+    Ask the payment provider for the status of a batch of payments
+
+    Returns "completed" or "failed" for each payment the provider has
+    settled; payments it still reports as in progress are left out.
+    """
+    # In a real system, this would look the whole batch up with the payment provider
+    return {}
+
+
+@celery_app.task(name="verify_pending_payments")
+def verify_pending_payments(
+    batch_size: int = PAYMENT_VERIFY_BATCH_SIZE,
+    stale_after: float = PAYMENT_VERIFY_STALE_AFTER,
+):
+    """
+    Periodic sweep settling payments stuck in pending
+
+    process_payment marks an order PAID in the same commit that completes
+    its payment, so only payments that never reached a terminal status get
+    stuck: PENDING orders whose payment_status is still "pending" after
+    stale_after seconds. Runs on the beat schedule instead of one task per
+    payment; each batch costs one query, one provider lookup and a bulk
+    UPDATE per outcome, and records payment_processed events in the outbox.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=stale_after)
+    db = SessionLocal()
+    confirmed = failed = 0
+    last_id = 0
+    try:
+        while True:
+            # Locked until the batch commits, so a concurrent payment cannot be settled twice
+            orders = (
+                db.query(Order.id, Order.payment_method)
+                .filter(
+                    Order.status == OrderStatus.PENDING,
+                    Order.payment_status == "pending",
+                    Order.created_at < cutoff,
+                    Order.id > last_id,
+                )
+                .order_by(Order.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if not orders:
+                break
+            last_id = orders[-1].id
+
+            statuses = fetch_payment_statuses([order.id for order in orders])
+            events = []
+            for payment_status, values in (
+                ("completed", {"status": OrderStatus.PAID, "payment_status": "completed"}),
+                ("failed", {"payment_status": "failed"}),
+            ):
+                settled = [order for order in orders if statuses.get(order.id) == payment_status]
+                if not settled:
+                    continue
+                db.execute(
+                    update(Order)
+                    .where(Order.id.in_([order.id for order in settled]))
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                events.extend(
+                    payment_processed_message(
+                        order.id,
+                        payment_status,
+                        order.payment_method.value if order.payment_method else None,
+                    )
+                    for order in settled
+                )
+                if payment_status == "completed":
+                    confirmed += len(settled)
+                else:
+                    failed += len(settled)
+            enqueue_events(db, ORDER_EXCHANGE, PAYMENT_PROCESSED_KEY, events)
+            db.commit()
+            if len(orders) < batch_size:
+                break
     finally:
         db.close()
 
+    if confirmed or failed:
+        logger.info(f"Settled stuck payments: {confirmed} completed, {failed} failed")
+    return {"success": True, "confirmed": confirmed, "failed": failed}
 
-@celery_app.task(name="send_order_confirmation_email")
+
+@celery_app.task(
+    name="send_order_confirmation_email",
+    autoretry_for=(EmailDeliveryError,),
+    retry_backoff=True,
+    retry_backoff_max=TASK_RETRY_BACKOFF_MAX,
+    retry_jitter=True,
+    max_retries=5,
+)
 def send_order_confirmation_email(
     order_id: int, user_email: str = "example@example.com"
 ):
     """
     Asynchronous order confirmation email sending
+
+    Network failures reaching the email service are raised as
+    EmailDeliveryError, which Celery retries with exponential backoff
+    instead of blocking the worker.
     """
     logger.info(f"Preparing to send order #{order_id} confirmation email to {user_email}")
 
-    # Simulate email sending delay
-    time.sleep(3)
+    try:
+        deliver_email(
+            user_email,
+            f"Order #{order_id} confirmation",
+            f"Thank you for your order #{order_id}.",
+        )
+    except OSError as e:
+        logger.warning(f"Order #{order_id} confirmation email not sent, will retry: {str(e)}")
+        raise EmailDeliveryError(str(e)) from e
 
-    # In a real system, this would call an email service
     logger.info(f"Order #{order_id} confirmation email successfully sent to {user_email}")
 
     return {"success": True, "message": f"Order confirmation email sent to {user_email}"}
@@ -1,13 +1,24 @@
 #!/usr/bin/env python
 """
 E-Commerce Platform API Service Entry Point
+
+Importing this module has no side effects: it connects to nothing and does
+not load the broker, Celery or Redis clients. Database connections, the
+password-hashing pool, the order number node lease and the product
+cache's Redis client are created on first use and released by the
+lifespan hook at shutdown; the hook's only startup work is building the in-memory product
+suggestion index and starting the task that keeps it in step with the
+catalog.
 """
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 from app.routers import product
 from app.routers import user
 from app.routers import order
 from app.routers import payment
+from app.routers import internal
 from app.errors import (
     BaseAPIError, 
     api_exception_handler, 
@@ -15,34 +26,59 @@ from app.errors import (
     validation_exception_handler,
     default_exception_handler
 )
+from app.database import dispose_engines
+from app.instrumentation import SQLInstrumentationMiddleware
+from app.services.order_intake import order_intake
+from app.services.order_number import order_number_generator
+from app.services.password_hasher import password_hasher
+from app.services.product_cache import product_cache
+from app.services.product_suggest import product_suggester
+
 
-# Import required models and engine
-from app.models.base import Base
-from app.database import engine
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan: only the product suggestion index is built at
+    startup (one query; if it fails its background task retries), and
+    whatever was created lazily while serving is released at shutdown
+    """
+    await product_suggester.ensure_built()
+    product_suggester.start()
+    yield
+    await product_suggester.stop()
+    order_intake.close()
+    order_number_generator.close()
+    password_hasher.close()
+    await product_cache.close()
+    await dispose_engines()
 
-# Ensure all models are imported so Base.metadata can collect all table definitions
 
 # Create FastAPI application instance
 app = FastAPI(
     title="E-Commerce Platform API",
     description="API providing product management, user management, order processing and payment features",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Count and time the SQL statements of every request (Server-Timing header)
+app.add_middleware(SQLInstrumentationMiddleware)
+
 # Register error handlers
 app.add_exception_handler(BaseAPIError, api_exception_handler)
 app.add_exception_handler(HTTPException, http_exception_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(Exception, default_exception_handler)
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
+# The schema is owned by the Alembic migrations (alembic upgrade head),
+# which run before the server starts rather than on import
 
 # Register routes
 app.include_router(product.router, tags=["Products"])
 app.include_router(user.router, tags=["Users"])
 app.include_router(order.router, tags=["Orders"])
 app.include_router(payment.router, tags=["Payments"])
+app.include_router(internal.router, tags=["Internal"])
 
 
 @app.get("/", tags=["Root"])
@@ -0,0 +1,43 @@
+"""product listing indexes
+
+Indexes for the keyset-paginated catalog listing: price-range filters
+walk (price, id), and name-prefix filters (LIKE 'abc%') need pattern ops
+on PostgreSQL databases with a non-C collation.
+
+Databases created by create_all after these indexes were added to the
+model already have them, so each is only created where it is missing.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-18 17:05:44.302871
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001a"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("products")}
+    if "ix_products_price_id" not in existing:
+        op.create_index("ix_products_price_id", "products", ["price", "id"])
+    if "ix_products_name_pattern" not in existing:
+        op.create_index(
+            "ix_products_name_pattern",
+            "products",
+            ["name"],
+            postgresql_ops={"name": "text_pattern_ops"},
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_name_pattern", table_name="products")
+    op.drop_index("ix_products_price_id", table_name="products")
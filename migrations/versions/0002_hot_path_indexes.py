@@ -0,0 +1,41 @@
+"""hot path indexes
+
+Indexes for the queries the services actually run: loading an order's
+items, a user's order history and the pending-payment sweep. On
+PostgreSQL they are built CONCURRENTLY so writes to orders are not
+blocked while the indexes build.
+
+Revision ID: 0002
+Revises: 0001b
+Create Date: 2026-10-18 05:52:10.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_order_items_order_id", "order_items", ["order_id"]),
+    ("ix_orders_user_id_created_at_id", "orders", ["user_id", "created_at", "id"]),
+    ("ix_orders_status_id", "orders", ["status", "id"]),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
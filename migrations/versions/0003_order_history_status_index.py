@@ -0,0 +1,40 @@
+"""order history status index
+
+Serves GET /orders/ filtered by status with the same keyset ordering as
+the unfiltered history (user_id, created_at, id).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 07:12:43.502981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_orders_user_id_status_created_at_id",
+            "orders",
+            ["user_id", "status", "created_at", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_orders_user_id_status_created_at_id",
+            table_name="orders",
+            postgresql_concurrently=True,
+        )
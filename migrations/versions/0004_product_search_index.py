@@ -0,0 +1,102 @@
+"""product search index
+
+Full-text index for GET /products/search over product names (weighted
+higher) and descriptions. PostgreSQL gets a GIN index on the weighted
+tsvector expression the search query uses; SQLite gets an FTS5 table
+kept in step with products by triggers. Either way the index is updated
+in the same transaction as the product write.
+
+The plain B-tree index on description served no query and is dropped.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 09:41:27.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must stay identical to the document expression in app/services/product.py,
+# or PostgreSQL will not use the index for the search query
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+SQLITE_TRIGGERS = (
+    """
+    CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_update AFTER UPDATE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts (rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == "postgresql":
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY ix_products_search ON products "
+                f"USING gin (({SEARCH_DOCUMENT}))"
+            )
+            op.drop_index(
+                "ix_products_description", table_name="products", postgresql_concurrently=True
+            )
+        return
+
+    if dialect == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE products_fts USING fts5("
+            "name, description, content='products', content_rowid='id', "
+            "tokenize='porter unicode61')"
+        )
+        for trigger in SQLITE_TRIGGERS:
+            op.execute(trigger)
+        # Index the products that already exist
+        op.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+    op.drop_index("ix_products_description", table_name="products")
+
+
+def downgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_products_description",
+                "products",
+                ["description"],
+                postgresql_concurrently=True,
+            )
+            op.execute("DROP INDEX CONCURRENTLY ix_products_search")
+        return
+
+    op.create_index("ix_products_description", "products", ["description"])
+    if dialect == "sqlite":
+        for trigger in ("products_fts_insert", "products_fts_delete", "products_fts_update"):
+            op.execute(f"DROP TRIGGER {trigger}")
+        op.execute("DROP TABLE products_fts")
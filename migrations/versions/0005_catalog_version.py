@@ -0,0 +1,41 @@
+"""catalog version
+
+Counter of product writes, incremented in the same transaction as each
+one. ETags, the encoded listing cache and the product cache key on it,
+so it can never lag behind a committed product change. It starts from
+the clock (in ms), so a recreated database does not repeat versions that
+clients may still hold in ETags.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 14:02:51.730164
+
+"""
+import time
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    catalog_version = op.create_table(
+        "catalog_version",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("changed_at", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    now = time.time()
+    op.bulk_insert(catalog_version, [{"id": 1, "version": int(now * 1000), "changed_at": now}])
+
+
+def downgrade() -> None:
+    op.drop_table("catalog_version")
@@ -0,0 +1,39 @@
+"""product versions
+
+Catalog version of each product's last write, recorded in the same
+transaction as the write. Processes read the rows newer than the version
+they last saw, so a cached product is only treated as stale when that
+product was written, not after any catalog write.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 16:40:12.518304
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_versions",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("changed_at", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("product_id"),
+    )
+    op.create_index("ix_product_versions_version", "product_versions", ["version"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_versions_version", table_name="product_versions")
+    op.drop_table("product_versions")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Order Event Consumer Throughput Benchmark
+
+Drains a queue of events from the in-process broker stand-in with the
+previous single-delivery settings (prefetch 1, one worker, one ack per
+message) and with the concurrent runtime settings, and reports messages
+per second and the number of ack frames sent.
+"""
+import argparse
+import json
+import logging
+import sys
+import os
+import time
+
+# Add project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.messaging.rabbitmq import RabbitMQClient
+from broker_stub import StubBroker
+
+QUEUE_NAME = "order_created"
+WORK_SECONDS = 0.002
+
+
+def handle_message(message):
+    """Stand-in handler: I/O-bound work such as enqueueing a Celery task"""
+    time.sleep(WORK_SECONDS)
+
+
+def run(label, messages, rtt, **consume_options):
+    broker = StubBroker(rtt)
+    for i in range(messages):
+        broker.queues[QUEUE_NAME].append(json.dumps({"order_id": i}))
+
+    client = RabbitMQClient(connection_factory=broker.connection_factory())
+    channel = client.connect()
+    channel.stop_when_idle = True
+
+    start = time.perf_counter()
+    client.consume_messages(QUEUE_NAME, handle_message, **consume_options)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{label:<10} {messages / elapsed:9.0f} msg/s  "
+        f"elapsed={elapsed:6.2f} s  ack frames={channel.ack_frames}"
+    )
+    return messages / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Order event consumer throughput benchmark")
+    parser.add_argument("--messages", type=int, default=1000, help="Messages to drain")
+    parser.add_argument("--rtt-ms", type=float, default=0.5, help="Simulated broker round-trip time")
+    parser.add_argument("--work-ms", type=float, default=2.0, help="Simulated handler time per message")
+    parser.add_argument("--prefetch", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--pool", type=str, choices=["thread", "process"], default="thread")
+    parser.add_argument("--ack-batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    # Silence per-message logging so it does not dominate the timings
+    logging.basicConfig(level=logging.WARNING)
+    WORK_SECONDS = args.work_ms / 1000
+    rtt = args.rtt_ms / 1000
+
+    print(
+        f"Draining {args.messages} messages "
+        f"(rtt={args.rtt_ms} ms, handler={args.work_ms} ms)"
+    )
+    before = run(
+        "baseline", args.messages, rtt,
+        prefetch_count=1, workers=1, pool="thread", ack_batch_size=1,
+    )
+    after = run(
+        "runtime", args.messages, rtt,
+        prefetch_count=args.prefetch,
+        workers=args.workers,
+        pool=args.pool,
+        ack_batch_size=args.ack_batch_size,
+    )
+    print(f"Speedup: {after / before:.1f}x")
+
+# To run this benchmark, run:
+# python scripts/bench_consumer.py --workers 16 --prefetch 64
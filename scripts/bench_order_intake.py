@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Order Intake Throughput Benchmark
+
+Compares creating orders one transaction at a time (POST /orders/ in sync
+mode) against the asynchronous intake, whose writer commits queued orders
+in groups. Runs against a temporary SQLite database by default, or any
+database with --url (the schema is migrated first).
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+# Add project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.migrations import upgrade_schema
+from app.models.product import Product
+from app.models.user import User  # noqa: F401  (registers the Order.user target)
+from app.schemas.order import OrderCreate
+from app.services.order_intake import OrderIntake
+from app.services.order_service import OrderService
+
+
+def per_order(Session, orders):
+    """One transaction (flush, insert, commit, refresh) per order"""
+    for order_data in orders:
+        with Session() as db:
+            OrderService.create_order(db, order_data, user_id=1)
+
+
+def group_commit(Session, orders, batch_size):
+    """Queue every order and let the intake writer commit them in groups"""
+    intake = OrderIntake(Session, batch_size=batch_size, max_pending=len(orders))
+    for order_data in orders:
+        intake.submit(order_data, user_id=1)
+    intake.close()
+    return intake.stats()
+
+
+def measure(label, run, count):
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<13} {count / elapsed:10.1f} orders/s  ({elapsed * 1000:.1f} ms)")
+    return elapsed, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Order intake throughput benchmark")
+    parser.add_argument("--orders", type=int, default=1000, help="Orders per scenario")
+    parser.add_argument("--batch-size", type=int, default=200, help="Maximum orders per group commit")
+    parser.add_argument("--url", type=str, default=None, help="Benchmark a real database instead")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    upgrade_schema(url)
+    engine = create_engine(url)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        product = Product(name="Benchmark product", price=9.99)
+        db.add(product)
+        db.commit()
+        product_id = product.id
+
+    orders = [
+        OrderCreate(items=[{"product_id": product_id, "quantity": 1}])
+        for _ in range(args.orders)
+    ]
+    print(f"Creating {args.orders} orders per scenario ({engine.url.render_as_string()})")
+
+    before, _ = measure("per-order", lambda: per_order(Session, orders), args.orders)
+    after, stats = measure(
+        "group-commit", lambda: group_commit(Session, orders, args.batch_size), args.orders
+    )
+    print(f"Groups: {stats['groups']}, mean size {stats['mean_group_size']}")
+    print(f"Speedup: {before / after:.1f}x")
+
+# To run this benchmark, run:
+# python scripts/bench_order_intake.py --orders 1000
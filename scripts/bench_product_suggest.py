@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Product Suggestion Latency Benchmark
+
+Builds the in-memory name index over generated product names, reports the
+memory it holds, and times suggest() for short and longer prefixes, as
+typed on the storefront. No database or Redis is involved; the names are
+generated in memory.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Add project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.product_suggest import ProductSuggester
+
+WORDS = (
+    "red blue green black white running trail wool cotton leather desk floor "
+    "lamp shoes shirt jacket kettle teapot mug socks hat bag chair table"
+).split()
+
+
+async def run(products, words, lookups, limit):
+    rng = random.Random(42)
+    names = [
+        (i, " ".join(rng.choice(WORDS) for _ in range(words - 1)) + f" {i}") for i in range(products)
+    ]
+
+    async def load_catalog():
+        # Copies, so the index's memory does not include the generated names
+        return 1, [(product_id, "".join(name)) for product_id, name in names]
+
+    async def catalog_version():
+        return 1
+
+    suggester = ProductSuggester(load_catalog, catalog_version, sync_interval=3600)
+    tracemalloc.start()
+    start = time.perf_counter()
+    await suggester.build()
+    elapsed = time.perf_counter() - start
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Built index of {products} names in {elapsed * 1000:.0f} ms "
+          f"({suggester.stats()['entries']} entries, {held / 2**20:.0f} MB held, "
+          f"{peak / 2**20:.0f} MB peak while building)")
+
+    start = time.perf_counter()
+    suggester.upsert(products, "Brand new teapot", version=2)
+    print(f"Incremental upsert: {(time.perf_counter() - start) * 1000:.3f} ms")
+
+    for length in (1, 3, 6):
+        timings = []
+        for _ in range(lookups):
+            prefix = rng.choice(names)[1][:length]
+            start = time.perf_counter()
+            await suggester.suggest(prefix, limit)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"prefix length {length}: p50={statistics.median(timings):.3f} ms  "
+              f"p99={timings[int(len(timings) * 0.99) - 1]:.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Product suggestion latency benchmark")
+    parser.add_argument("--products", type=int, default=100000, help="Product names to index")
+    parser.add_argument("--words", type=int, default=4, help="Words per product name")
+    parser.add_argument("--lookups", type=int, default=2000, help="Lookups timed per prefix length")
+    parser.add_argument("--limit", type=int, default=10, help="Suggestions per lookup")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.products, args.words, args.lookups, args.limit))
+
+# To run this benchmark, run:
+# python scripts/bench_product_suggest.py --products 100000
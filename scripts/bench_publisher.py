@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Order Event Publish Throughput Benchmark
+
+Compares the old per-call producer (connect, declare topology, publish,
+close for every event) against the outbox relay, which publishes staged
+events over one long-lived connection and commits each batch in a single
+channel transaction. Runs against a temporary SQLite outbox and the
+in-process broker stand-in by default, or a real broker with --url.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+# Add project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.messaging.rabbitmq import RabbitMQClient
+from app.messaging.order_events import (
+    ORDER_EXCHANGE,
+    ORDER_CREATED_KEY,
+    declare_order_topology,
+    order_created_message,
+)
+from app.messaging.outbox import OutboxRelay, enqueue_events
+from app.migrations import upgrade_schema
+from broker_stub import stub_connection_factory
+
+
+def publish_per_call(url, connection_factory, events):
+    """Previous behaviour: a fresh connection and topology per event"""
+    for message in events:
+        client = RabbitMQClient(url, connection_factory)
+        client.connect()
+        declare_order_topology(client)
+        client.publish_message(ORDER_EXCHANGE, ORDER_CREATED_KEY, message)
+        client.close()
+
+
+def relay_outbox(Session, url, connection_factory, events, batch_size):
+    """Stage the events in the outbox and let the relay drain it"""
+    with Session() as db:
+        enqueue_events(db, ORDER_EXCHANGE, ORDER_CREATED_KEY, events)
+        db.commit()
+    relay = OutboxRelay(
+        Session,
+        client=RabbitMQClient(url, connection_factory),
+        setup=declare_order_topology,
+        batch_size=batch_size,
+    )
+    start = time.perf_counter()
+    while relay.relay_batch():
+        pass
+    elapsed = time.perf_counter() - start
+    relay.close()
+    return elapsed
+
+
+def report(label, elapsed, count):
+    print(f"{label:<13} {count / elapsed:10.1f} events/s  ({elapsed * 1000:.1f} ms)")
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Order event publish throughput benchmark")
+    parser.add_argument("--events", type=int, default=500, help="Events per scenario")
+    parser.add_argument("--batch-size", type=int, default=100, help="Relay batch size")
+    parser.add_argument(
+        "--rtt-ms",
+        type=float,
+        default=0.5,
+        help="Simulated broker round-trip time for the stand-in broker",
+    )
+    parser.add_argument("--url", type=str, default=None, help="Benchmark a real broker instead")
+    args = parser.parse_args()
+
+    # Silence per-message info logging so it does not dominate the timings
+    logging.basicConfig(level=logging.WARNING)
+
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    upgrade_schema(database_url)
+    Session = sessionmaker(bind=create_engine(database_url), autoflush=False)
+
+    factory = None if args.url else stub_connection_factory(args.rtt_ms / 1000)
+    target = args.url or f"stand-in broker, rtt={args.rtt_ms} ms"
+    print(f"Publishing {args.events} events per scenario ({target})")
+
+    events = [order_created_message(i, 1, 9.99) for i in range(args.events)]
+
+    start = time.perf_counter()
+    publish_per_call(args.url, factory, events)
+    before = report("per-call", time.perf_counter() - start, args.events)
+
+    after = report(
+        f"relay x{args.batch_size}",
+        relay_outbox(Session, args.url, factory, events, args.batch_size),
+        args.events,
+    )
+
+    print(f"Speedup: {before / after:.1f}x")
+
+# To run this benchmark, run:
+# python scripts/bench_publisher.py --rtt-ms 0.5
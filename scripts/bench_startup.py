@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+API Startup Time Benchmark
+
+Imports main in fresh interpreters with `python -X importtime` and checks
+the import cost against a budget. Also fails when importing the API loads
+modules that only background processes need or that should load on first
+use (the broker and Redis clients, Celery, Alembic), which is how startup
+cost usually creeps back in.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Modules the API process must not load at import time
+FORBIDDEN_MODULES = ("pika", "celery", "kombu", "redis", "alembic", "app.tasks.order_tasks")
+
+
+def import_times(module: str = "main") -> Dict[str, Tuple[int, int]]:
+    """Import the module in a fresh interpreter; map every module loaded to (self, cumulative) microseconds"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API startup (import) time benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument(
+        "--budget-ms", type=float, default=2000, help="Maximum median import time of main"
+    )
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    args = parser.parse_args()
+
+    # Warm the bytecode cache so the first run does not count compilation
+    import_times()
+    runs = [import_times() for _ in range(args.runs)]
+    totals = [times["main"][1] / 1000 for times in runs]
+    median = statistics.median(totals)
+
+    print(f"import main: median={median:.1f} ms  min={min(totals):.1f} ms  ({args.runs} runs)")
+    print("Slowest modules (self time, last run):")
+    for name, (self_us, _) in sorted(runs[-1].items(), key=lambda item: -item[1][0])[: args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    loaded = [name for name in FORBIDDEN_MODULES if name in runs[-1]]
+    if loaded:
+        print(f"FAIL: importing main loaded {', '.join(loaded)}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"FAIL: median import time {median:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print(f"OK: within the {args.budget_ms:.0f} ms budget")
+    sys.exit(1 if failed else 0)
+
+# To run this benchmark, run:
+# python scripts/bench_startup.py --budget-ms 2000
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+"""
+In-process RabbitMQ stand-in for benchmarks
+
+Mimics the subset of pika's BlockingConnection/channel API used by
+app.messaging.rabbitmq, charging a simulated network round trip for every
+synchronous AMQP method so connection and topology costs show up in timings.
+Consumers get deliveries within the prefetch window; a window slot freed by
+an ack becomes usable again one round trip later.
+"""
+import heapq
+import itertools
+import queue
+import time
+from collections import defaultdict, deque
+from types import SimpleNamespace
+
+
+class StubBroker:
+    """Shared in-memory queues and the simulated round-trip time"""
+
+    def __init__(self, rtt=0.001):
+        self.rtt = rtt
+        self.queues = defaultdict(deque)
+
+    def connection_factory(self):
+        """Return a pika.BlockingConnection replacement bound to this broker"""
+
+        def factory(parameters):
+            return StubBlockingConnection(parameters, broker=self)
+
+        return factory
+
+
+class StubChannel:
+    """Channel whose synchronous methods each cost one simulated round trip"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.broker = connection.broker
+        self.published = 0
+        self.ack_frames = 0
+        self.is_open = True
+        self.prefetch_count = 0
+        self.stop_when_idle = False
+        self._consumer = None
+        self._consuming = False
+        self._delivery_tags = itertools.count(1)
+        self._unacked = set()
+        self._slots = []
+
+    def _round_trip(self):
+        time.sleep(self.broker.rtt)
+
+    def exchange_declare(self, exchange, exchange_type="direct", durable=False):
+        self._round_trip()
+
+    def queue_declare(self, queue, durable=False):
+        self._round_trip()
+
+    def queue_bind(self, queue, exchange, routing_key=None):
+        self._round_trip()
+
+    def basic_qos(self, prefetch_count=0):
+        self._round_trip()
+        self.prefetch_count = prefetch_count
+
+    def confirm_delivery(self):
+        self._round_trip()
+
+    def tx_select(self):
+        self._round_trip()
+
+    def tx_commit(self):
+        self._round_trip()
+
+    def basic_publish(self, exchange, routing_key, body, properties=None):
+        # basic.publish is asynchronous in AMQP: no round trip without confirms
+        self.published += 1
+        self.broker.queues[routing_key].append(body)
+
+    def basic_consume(self, queue, on_message_callback):
+        self._round_trip()
+        self._consumer = (queue, on_message_callback)
+        ready_at = time.monotonic()
+        self._slots = [ready_at] * max(1, self.prefetch_count)
+
+    def _settle(self, delivery_tags):
+        # The freed window slots reach the broker and come back with a delivery
+        ready_at = time.monotonic() + self.broker.rtt
+        for delivery_tag in delivery_tags:
+            self._unacked.discard(delivery_tag)
+            heapq.heappush(self._slots, ready_at)
+
+    def basic_ack(self, delivery_tag, multiple=False):
+        self.ack_frames += 1
+        if multiple:
+            self._settle([tag for tag in self._unacked if tag <= delivery_tag])
+        else:
+            self._settle([delivery_tag])
+
+    def basic_nack(self, delivery_tag, multiple=False, requeue=True):
+        self.basic_ack(delivery_tag, multiple)
+
+    def start_consuming(self):
+        queue_name, on_message = self._consumer
+        messages = self.broker.queues[queue_name]
+        self._consuming = True
+        while self._consuming:
+            now = time.monotonic()
+            while messages and self._slots and self._slots[0] <= now:
+                heapq.heappop(self._slots)
+                delivery_tag = next(self._delivery_tags)
+                self._unacked.add(delivery_tag)
+                method = SimpleNamespace(delivery_tag=delivery_tag)
+                on_message(self, method, None, messages.popleft())
+
+            if self.stop_when_idle and not messages and not self._unacked:
+                break
+
+            wait = 0.001
+            if messages and self._slots:
+                wait = min(wait, max(0.0, self._slots[0] - time.monotonic()))
+            self.connection.process_data_events(time_limit=wait)
+        self._consuming = False
+
+    def stop_consuming(self):
+        self._consuming = False
+
+
+class StubBlockingConnection:
+    """Connection whose handshake costs several simulated round trips"""
+
+    # TCP + protocol header, Start/StartOk, Tune/TuneOk, Open/OpenOk
+    HANDSHAKE_ROUND_TRIPS = 4
+
+    def __init__(self, parameters=None, broker=None):
+        self.broker = broker or StubBroker()
+        self.is_open = True
+        self._callbacks = queue.Queue()
+        self._timers = []
+        self._timer_ids = itertools.count()
+        time.sleep(self.broker.rtt * self.HANDSHAKE_ROUND_TRIPS)
+
+    @property
+    def is_closed(self):
+        return not self.is_open
+
+    def channel(self):
+        time.sleep(self.broker.rtt)
+        self.last_channel = StubChannel(self)
+        return self.last_channel
+
+    def add_callback_threadsafe(self, callback):
+        self._callbacks.put(callback)
+
+    def call_later(self, delay, callback):
+        heapq.heappush(
+            self._timers, (time.monotonic() + delay, next(self._timer_ids), callback)
+        )
+
+    def process_data_events(self, time_limit=0):
+        """Run thread-safe callbacks and due timers, waiting up to time_limit"""
+        try:
+            callback = self._callbacks.get(timeout=time_limit) if time_limit else self._callbacks.get_nowait()
+            callback()
+            while True:
+                self._callbacks.get_nowait()()
+        except queue.Empty:
+            pass
+        now = time.monotonic()
+        while self._timers and self._timers[0][0] <= now:
+            _, _, callback = heapq.heappop(self._timers)
+            callback()
+
+    def close(self):
+        time.sleep(self.broker.rtt)
+        self.is_open = False
+
+
+def stub_connection_factory(rtt: float):
+    """Return a pika.BlockingConnection replacement with the given round-trip time"""
+    return StubBroker(rtt).connection_factory()
@@ -11,6 +11,11 @@ import os
 # Add project root directory to Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from app.config.settings import (
+    RABBITMQ_ACK_BATCH_SIZE,
+    RABBITMQ_CONSUMER_WORKERS,
+    RABBITMQ_PREFETCH_COUNT,
+)
 from app.messaging.order_events import OrderEventConsumer
 
 # Configure logging
@@ -20,12 +25,12 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def start_order_created_consumer():
+def start_order_created_consumer(**consume_options):
     """Start order creation event consumer"""
     logger.info("Starting order creation event consumer...")
     consumer = OrderEventConsumer()
     try:
-        consumer.start_order_created_consumer()
+        consumer.start_order_created_consumer(**consume_options)
     except KeyboardInterrupt:
         logger.info("Interrupt signal received, shutting down consumer...")
     finally:
@@ -33,12 +38,12 @@ def start_order_created_consumer():
         logger.info("Order creation event consumer has been closed")
 
 
-def start_payment_processed_consumer():
+def start_payment_processed_consumer(**consume_options):
     """Start payment processing event consumer"""
     logger.info("Starting payment processing event consumer...")
     consumer = OrderEventConsumer()
     try:
-        consumer.start_payment_processed_consumer()
+        consumer.start_payment_processed_consumer(**consume_options)
     except KeyboardInterrupt:
         logger.info("Interrupt signal received, shutting down consumer...")
     finally:
@@ -67,23 +72,59 @@ if __name__ == "__main__":
         help="Queue name to consume, or use 'setup' to just create queues",
     )
 
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=RABBITMQ_PREFETCH_COUNT,
+        help="Maximum unacknowledged deliveries per consumer",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=RABBITMQ_CONSUMER_WORKERS,
+        help="Number of workers processing deliveries concurrently",
+    )
+    parser.add_argument(
+        "--pool",
+        type=str,
+        choices=["thread", "process"],
+        default="thread",
+        help="Worker pool type",
+    )
+    parser.add_argument(
+        "--ack-batch-size",
+        type=int,
+        default=RABBITMQ_ACK_BATCH_SIZE,
+        help="Completed deliveries acknowledged together with one multiple ack",
+    )
+
     args = parser.parse_args()
+    consume_options = {
+        "prefetch_count": args.prefetch,
+        "workers": args.workers,
+        "pool": args.pool,
+        "ack_batch_size": args.ack_batch_size,
+    }
 
     if args.queue == "setup":
         declare_queues()
     elif args.queue == "order_created":
         # Declare queues before starting consumer
         declare_queues()
-        start_order_created_consumer()
+        start_order_created_consumer(**consume_options)
     elif args.queue == "payment_processed":
-        start_payment_processed_consumer()
+        start_payment_processed_consumer(**consume_options)
     elif args.queue == "all":
         logger.info("Starting all consumers...")
         import threading
 
         # Create threads to run multiple consumers in parallel
-        order_thread = threading.Thread(target=start_order_created_consumer)
-        payment_thread = threading.Thread(target=start_payment_processed_consumer)
+        order_thread = threading.Thread(
+            target=start_order_created_consumer, kwargs=consume_options
+        )
+        payment_thread = threading.Thread(
+            target=start_payment_processed_consumer, kwargs=consume_options
+        )
 
         # Start threads
         order_thread.start()
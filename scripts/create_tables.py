@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 """
 Database Table Creation Script
+
+Applies the Alembic migrations, which own the schema.
 """
 import logging
 import sys
@@ -9,10 +11,7 @@ import os
 # Add project root directory to Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from app.database import engine
-from app.models.base import Base
-
-# Ensure all models are imported so Base.metadata can collect all table definitions
+from app.migrations import upgrade_schema
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,10 +20,9 @@ logger = logging.getLogger(__name__)
 
 def create_tables():
     try:
-        # Since all models now use the same Base, we can create all tables at once
-        logger.info("Creating all database tables...")
-        Base.metadata.create_all(bind=engine)
-        logger.info("All tables created successfully!")
+        logger.info("Applying database migrations...")
+        upgrade_schema()
+        logger.info("Database schema is up to date!")
     except Exception as e:
         logger.error(f"Error creating tables: {str(e)}")
         raise
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Outbox Relay Startup Script
+"""
+import logging
+import argparse
+import sys
+import os
+
+# Add project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config.settings import OUTBOX_BATCH_SIZE, OUTBOX_POLL_INTERVAL, OUTBOX_PRUNE_INTERVAL
+from app.messaging.order_events import declare_order_topology
+from app.messaging.outbox import OutboxRelay
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relay outbox events to RabbitMQ")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=OUTBOX_BATCH_SIZE,
+        help="Maximum number of events published per batch",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=OUTBOX_POLL_INTERVAL,
+        help="Seconds to wait when the outbox is drained",
+    )
+    parser.add_argument(
+        "--prune-interval",
+        type=float,
+        default=OUTBOX_PRUNE_INTERVAL,
+        help="Seconds between deletions of old published events",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Relay a single batch and exit",
+    )
+
+    args = parser.parse_args()
+
+    relay = OutboxRelay(setup=declare_order_topology, batch_size=args.batch_size)
+    try:
+        if args.once:
+            logger.info(f"Relayed {relay.relay_batch()} outbox events")
+        else:
+            relay.run(poll_interval=args.poll_interval, prune_interval=args.prune_interval)
+    except KeyboardInterrupt:
+        logger.info("Interrupt signal received, shutting down relay...")
+    finally:
+        relay.close()
+        logger.info("Outbox relay has been closed")
+
+# To start the relay, run:
+# python scripts/outbox_relay.py
@@ -66,4 +66,50 @@ async def test_method_not_allowed(client: AsyncClient):
             assert error_data["error"]["code"] == "ERR_405"
         else:
             # FastAPI default error format
-            assert "detail" in error_data 
\ No newline at end of file
+            assert "detail" in error_data 
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_db_pool_stats(client: AsyncClient):
+    """
+    Test that the internal endpoint reports pool usage for each engine
+    """
+    response = await client.get("/internal/db-pool")
+    assert response.status_code == 200
+    stats = response.json()
+    for engine_name in ("primary", "primary_async"):
+        assert "checkedout" in stats[engine_name]
+        assert "overflow" in stats[engine_name]
+
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_sql_metrics_per_endpoint(client: AsyncClient):
+    """
+    Test that each response carries a db Server-Timing entry and is aggregated per route
+    """
+    response = await client.get("/products/", params={"limit": 1})
+    assert response.status_code == 200
+    assert response.headers["server-timing"].startswith("db;dur=")
+
+    response = await client.get("/internal/sql-metrics")
+    assert response.status_code == 200
+    metrics = response.json()["GET /products/"]
+    assert metrics["requests"] >= 1
+    assert metrics["queries_max"] >= 1
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_password_hasher_stats(client: AsyncClient):
+    """
+    Test that the internal endpoint reports the password hashing pool's queue and latency
+    """
+    response = await client.get("/internal/password-hasher")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["max_pending"] > 0
+    assert "in_flight" in stats
+    assert "pool_restarts" in stats
@@ -1,10 +1,14 @@
 """
 Tests for order API endpoints
 """
+import asyncio
 import pytest
 import uuid
 from httpx import AsyncClient
-from tests.utils import get_auth_headers
+from app.database import SessionLocal, engine
+from app.models.outbox import OutboxEvent
+from app.routers import order as order_router
+from tests.utils import assert_max_queries, count_queries, get_auth_headers, query_count
 
 
 @pytest.mark.api
@@ -121,4 +125,302 @@ async def test_invalid_order_data(client: AsyncClient):
     assert response.status_code == 422
     error_data = response.json()
     assert error_data["success"] is False
-    assert error_data["error"]["code"] == "ERR_VALIDATION" 
\ No newline at end of file
+    assert error_data["error"]["code"] == "ERR_VALIDATION" 
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_create_order_query_count_is_constant(client: AsyncClient, product_data):
+    """
+    Test that order creation runs the same number of statements regardless of item count
+    """
+    headers = await get_auth_headers(client)
+    product_ids = []
+    for i in range(20):
+        product = dict(product_data)
+        product["name"] = f"Bulk Line {i} {uuid.uuid4().hex[:8]}"
+        response = await client.post("/products/", json=product, headers=headers)
+        product_ids.append(response.json()["id"])
+
+    statement_counts = []
+    for item_count in (1, 20):
+        order = {
+            "items": [
+                {"product_id": product_id, "quantity": 1}
+                for product_id in product_ids[:item_count]
+            ],
+            "payment_method": "credit_card",
+        }
+        with count_queries(engine) as statements:
+            response = await client.post("/orders/", json=order)
+        assert response.status_code == 201
+        assert len(response.json()["items"]) == item_count
+        statement_counts.append(len(statements))
+
+    assert statement_counts[0] == statement_counts[1]
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_create_order_reports_all_missing_products(client: AsyncClient):
+    """
+    Test that every unknown product id is reported at once
+    """
+    order = {
+        "items": [
+            {"product_id": 999991, "quantity": 1},
+            {"product_id": 999992, "quantity": 1},
+        ],
+        "payment_method": "credit_card",
+    }
+    response = await client.post("/orders/", json=order)
+    assert response.status_code == 400
+    message = response.json()["error"]["message"]
+    assert "999991" in message
+    assert "999992" in message
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_create_order_stages_outbox_event(client: AsyncClient, product_data):
+    """
+    Test that the order_created event is written to the outbox with the order
+    """
+    headers = await get_auth_headers(client)
+    product_response = await client.post("/products/", json=product_data, headers=headers)
+    order = {
+        "items": [{"product_id": product_response.json()["id"], "quantity": 1}],
+        "payment_method": "credit_card",
+    }
+    response = await client.post("/orders/", json=order)
+    assert response.status_code == 201
+    order_id = response.json()["id"]
+
+    with SessionLocal() as db:
+        events = (
+            db.query(OutboxEvent)
+            .filter(OutboxEvent.routing_key == "order.created")
+            .all()
+        )
+        assert any(event.payload["order_id"] == order_id for event in events)
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_order_read_query_budget(client: AsyncClient, product_data):
+    """
+    Test that reading orders does not issue a statement per item (N+1)
+    """
+    headers = await get_auth_headers(client)
+    product_response = await client.post("/products/", json=product_data, headers=headers)
+    order = {
+        "items": [{"product_id": product_response.json()["id"], "quantity": 1}] * 5,
+        "payment_method": "credit_card",
+    }
+    order_id = (await client.post("/orders/", json=order)).json()["id"]
+
+    response = await client.get(f"/orders/{order_id}")
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 5
+    assert_max_queries(response, 2)
+
+    response = await client.get("/orders/")
+    assert response.status_code == 200
+    assert_max_queries(response, 1)
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_order_queries_load_only_what_responses_need(client: AsyncClient, product_data):
+    """
+    Test the loading profiles: detail selects items in one IN query, the list skips users and unused columns
+    """
+    headers = await get_auth_headers(client)
+    product_response = await client.post("/products/", json=product_data, headers=headers)
+    order = {
+        "items": [{"product_id": product_response.json()["id"], "quantity": 1}] * 3,
+        "payment_method": "credit_card",
+    }
+    order_id = (await client.post("/orders/", json=order)).json()["id"]
+
+    with count_queries(engine) as statements:
+        response = await client.get(f"/orders/{order_id}")
+    assert response.status_code == 200
+    assert len(statements) == 2
+    assert "IN (" in statements[1] and "FROM order_items" in statements[1]
+
+    with count_queries(engine) as statements:
+        response = await client.get("/orders/")
+    assert response.status_code == 200
+    assert len(statements) == 1
+    assert "users" not in statements[0]
+    assert "payment_status" not in statements[0]
+
+
+async def create_orders(client: AsyncClient, product_data, count):
+    headers = await get_auth_headers(client)
+    product_response = await client.post("/products/", json=product_data, headers=headers)
+    order = {
+        "items": [{"product_id": product_response.json()["id"], "quantity": 1}],
+        "payment_method": "credit_card",
+    }
+    return [(await client.post("/orders/", json=order)).json() for _ in range(count)]
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_paginate_orders_with_cursor(client: AsyncClient, product_data):
+    """
+    Test that following next_cursor walks the history newest first without gaps or repeats
+    """
+    created = await create_orders(client, product_data, 5)
+    params = {"limit": 2, "created_from": created[0]["created_at"]}
+
+    seen = []
+    response = await client.get("/orders/", params=params)
+    while True:
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen.extend(order["id"] for order in page["items"])
+        if page["next_cursor"] is None:
+            break
+        response = await client.get("/orders/", params={**params, "cursor": page["next_cursor"]})
+
+    assert seen == [order["id"] for order in reversed(created)]
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_filter_orders_by_status_and_date_range(client: AsyncClient, product_data):
+    """
+    Test the status filter and the inclusive/exclusive created_at range
+    """
+    created = await create_orders(client, product_data, 3)
+    response = await client.get(
+        "/orders/",
+        params={
+            "status": "pending",
+            "created_from": created[0]["created_at"],
+            "created_to": created[2]["created_at"],
+        },
+    )
+    assert response.status_code == 200
+    assert [order["id"] for order in response.json()["items"]] == [created[1]["id"], created[0]["id"]]
+
+    response = await client.get(
+        "/orders/", params={"status": "paid", "created_from": created[0]["created_at"]}
+    )
+    assert response.json()["items"] == []
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_invalid_order_cursor(client: AsyncClient):
+    """
+    Test that a malformed cursor returns a validation error
+    """
+    response = await client.get("/orders/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 422
+    assert response.json()["error"]["code"] == "ERR_VALIDATION"
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_bulk_create_orders_reports_each_order(client: AsyncClient, product_data):
+    """
+    Test that valid orders are created, invalid ones reported, and events staged for the created ones
+    """
+    headers = await get_auth_headers(client)
+    product = (await client.post("/products/", json=product_data, headers=headers)).json()
+    valid = {"items": [{"product_id": product["id"], "quantity": 2}], "payment_method": "paypal"}
+    invalid = {"items": [{"product_id": 999999, "quantity": 1}]}
+
+    response = await client.post("/orders/bulk", json=[valid, invalid, valid])
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 1
+    assert [result["index"] for result in data["results"]] == [0, 1, 2]
+    assert data["results"][1]["order"] is None
+    assert "999999" in data["results"][1]["error"]
+
+    order_ids = [data["results"][i]["order"]["id"] for i in (0, 2)]
+    for order_id in order_ids:
+        order = (await client.get(f"/orders/{order_id}")).json()
+        assert order["total_amount"] == pytest.approx(product["price"] * 2)
+        assert order["payment_method"] == "paypal"
+        assert len(order["items"]) == 1
+
+    with SessionLocal() as db:
+        staged = {
+            event.payload["order_id"]
+            for event in db.query(OutboxEvent).filter(OutboxEvent.routing_key == "order.created")
+        }
+    assert set(order_ids) <= staged
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_bulk_create_orders_query_count_is_constant(client: AsyncClient, product_data):
+    """
+    Test that a bulk request runs the same number of statements for 2 or 50 orders
+    """
+    headers = await get_auth_headers(client)
+    product = (await client.post("/products/", json=product_data, headers=headers)).json()
+    order = {"items": [{"product_id": product["id"], "quantity": 1}] * 3}
+
+    counts = []
+    for batch_size in (2, 50):
+        response = await client.post("/orders/bulk", json=[order] * batch_size)
+        assert response.json()["created"] == batch_size
+        counts.append(query_count(response))
+    assert counts[0] == counts[1]
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_bulk_create_orders_rejects_empty_batch(client: AsyncClient):
+    """
+    Test that an empty batch is a validation error
+    """
+    response = await client.post("/orders/bulk", json=[])
+    assert response.status_code == 422
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_async_intake_accepts_and_reports_status(client: AsyncClient, product_data, monkeypatch):
+    """
+    Test that in async intake mode an order is accepted with 202 and its status URL reports the created order
+    """
+    monkeypatch.setattr(order_router, "ORDER_INTAKE_MODE", "async")
+    headers = await get_auth_headers(client)
+    product = (await client.post("/products/", json=product_data, headers=headers)).json()
+    order = {"items": [{"product_id": product["id"], "quantity": 3}], "payment_method": "credit_card"}
+
+    response = await client.post("/orders/", json=order)
+    assert response.status_code == 202
+    accepted = response.json()
+    assert response.headers["location"] == accepted["status_url"]
+
+    for _ in range(100):
+        status = (await client.get(accepted["status_url"])).json()
+        if status["status"] != "queued":
+            break
+        await asyncio.sleep(0.05)
+    assert status["status"] == "created"
+
+    created = (await client.get(f"/orders/{status['order_id']}")).json()
+    assert created["order_number"] == accepted["order_number"]
+    assert created["total_amount"] == pytest.approx(product["price"] * 3)
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_unknown_intake_status_not_found(client: AsyncClient):
+    """
+    Test that an order number that was never accepted returns 404
+    """
+    response = await client.get("/orders/intake/ORD-UNKNOWN")
+    assert response.status_code == 404
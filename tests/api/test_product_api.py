@@ -2,9 +2,13 @@
 Tests for product API endpoints
 """
 import pytest
+import uuid
 from httpx import AsyncClient
 from main import app
-from tests.utils import get_auth_headers
+from app.database import engine
+from app.services.product_cache import product_cache
+from app.services.product_suggest import product_suggester
+from tests.utils import assert_max_queries, count_queries, get_auth_headers
 
 
 @pytest.mark.api
@@ -16,7 +20,9 @@ async def test_get_all_products(client: AsyncClient):
     async with AsyncClient(app=app, base_url="http://localhost:8000") as client:
         response = await client.get("/products/")
         assert response.status_code == 200
-        assert isinstance(response.json(), list)
+        data = response.json()
+        assert isinstance(data["items"], list)
+        assert "next_cursor" in data
 
 
 @pytest.mark.api
@@ -132,4 +138,324 @@ async def test_product_not_found(client: AsyncClient):
         error_data = response.json()
         assert error_data["success"] is False
         assert error_data["error"]["code"] == "ERR_NOT_FOUND"
-        assert error_data["error"]["message"] == "Product not found" 
\ No newline at end of file
+        assert error_data["error"]["message"] == "Product not found" 
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_paginate_products_with_cursor(client: AsyncClient):
+    """
+    Test walking the product listing page by page with the opaque cursor
+    """
+    headers = await get_auth_headers(client)
+    prefix = f"Paged {uuid.uuid4().hex[:8]}"
+    created_ids = []
+    for i in range(5):
+        response = await client.post(
+            "/products/",
+            json={"name": f"{prefix} {i}", "description": "Paged", "price": 10.0 + i},
+            headers=headers,
+        )
+        created_ids.append(response.json()["id"])
+
+    seen_ids = []
+    params = {"name_prefix": prefix, "limit": 2}
+    while True:
+        response = await client.get("/products/", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen_ids.extend(item["id"] for item in page["items"])
+        if page["next_cursor"] is None:
+            break
+        params["cursor"] = page["next_cursor"]
+
+    assert seen_ids == created_ids
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_filter_products_by_price_range(client: AsyncClient):
+    """
+    Test price-range filters combined with a name prefix
+    """
+    headers = await get_auth_headers(client)
+    prefix = f"Priced {uuid.uuid4().hex[:8]}"
+    for price in (5.0, 15.0, 25.0):
+        await client.post(
+            "/products/",
+            json={"name": f"{prefix} {price}", "description": "Priced", "price": price},
+            headers=headers,
+        )
+
+    response = await client.get(
+        "/products/",
+        params={"name_prefix": prefix, "min_price": 10, "max_price": 20},
+    )
+    assert response.status_code == 200
+    prices = [item["price"] for item in response.json()["items"]]
+    assert prices == [15.0]
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_invalid_product_cursor(client: AsyncClient):
+    """
+    Test that a malformed cursor returns a validation error
+    """
+    response = await client.get("/products/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 422
+    error_data = response.json()
+    assert error_data["success"] is False
+    assert error_data["error"]["code"] == "ERR_VALIDATION"
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_repeat_auth_skips_user_lookup(client: AsyncClient, product_data):
+    """
+    Test that a token verified once is served from the principal cache
+    """
+    headers = await get_auth_headers(client)
+    await client.post("/products/", json=product_data, headers=headers)
+
+    with count_queries(engine) as statements:
+        response = await client.post("/products/", json=product_data, headers=headers)
+    assert response.status_code == 201
+    assert not any("FROM users" in statement for statement in statements)
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_product_read_query_budget(client: AsyncClient, product_data):
+    """
+    Test that listing and fetching products each run a single statement
+    """
+    headers = await get_auth_headers(client)
+    product_response = await client.post("/products/", json=product_data, headers=headers)
+
+    response = await client.get("/products/")
+    assert response.status_code == 200
+    assert_max_queries(response, 1)
+
+    response = await client.get(f"/products/{product_response.json()['id']}")
+    assert response.status_code == 200
+    assert_max_queries(response, 1)
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_product_detail_served_from_cache(client: AsyncClient, product_data):
+    """
+    Test that repeat reads skip the database and writes are visible immediately
+    """
+    headers = await get_auth_headers(client)
+    product_id = (await client.post("/products/", json=product_data, headers=headers)).json()["id"]
+
+    response = await client.get(f"/products/{product_id}")
+    assert response.status_code == 200
+    assert_max_queries(response, 0)
+
+    update = {**product_data, "price": 1.5}
+    await client.put(f"/products/{product_id}", json=update, headers=headers)
+    response = await client.get(f"/products/{product_id}")
+    assert response.json()["price"] == 1.5
+    assert_max_queries(response, 0)
+
+    await client.delete(f"/products/{product_id}", headers=headers)
+    response = await client.get(f"/products/{product_id}")
+    assert response.status_code == 404
+    assert_max_queries(response, 0)
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_writing_a_product_keeps_others_cached(client: AsyncClient, product_data):
+    """
+    Test that updating one product does not reload another from the database
+    """
+    headers = await get_auth_headers(client)
+    first_id = (await client.post("/products/", json=product_data, headers=headers)).json()["id"]
+    second_id = (await client.post("/products/", json=product_data, headers=headers)).json()["id"]
+    await client.get(f"/products/{second_id}")
+    loads = product_cache.stats()["loads"]
+
+    await client.put(f"/products/{first_id}", json={**product_data, "price": 4.5}, headers=headers)
+    response = await client.get(f"/products/{second_id}")
+    assert response.status_code == 200
+    assert_max_queries(response, 0)
+    assert product_cache.stats()["loads"] == loads
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_product_detail_conditional_get(client: AsyncClient, product_data):
+    """
+    Test that a matching If-None-Match gets 304 without a query, until the product changes
+    """
+    headers = await get_auth_headers(client)
+    product_id = (await client.post("/products/", json=product_data, headers=headers)).json()["id"]
+
+    response = await client.get(f"/products/{product_id}")
+    etag = response.headers["ETag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+    response = await client.get(f"/products/{product_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert_max_queries(response, 0)
+
+    await client.put(f"/products/{product_id}", json={**product_data, "price": 2.5}, headers=headers)
+    response = await client.get(f"/products/{product_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["price"] == 2.5
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_product_etag_changes_while_redis_is_down(client: AsyncClient, product_data):
+    """
+    Test that a write made while Redis fails still moves the ETag, so no stale 304 is sent
+    """
+
+    class BrokenRedis:
+        def pipeline(self, *args, **kwargs):
+            raise ConnectionError("Redis is down")
+
+        def __getattr__(self, name):
+            async def fail(*args, **kwargs):
+                raise ConnectionError("Redis is down")
+
+            return fail
+
+    headers = await get_auth_headers(client)
+    product_id = (await client.post("/products/", json=product_data, headers=headers)).json()["id"]
+    etag = (await client.get(f"/products/{product_id}")).headers["ETag"]
+
+    redis = product_cache.redis
+    product_cache.redis = BrokenRedis()
+    try:
+        response = await client.put(
+            f"/products/{product_id}", json={**product_data, "price": 7.5}, headers=headers
+        )
+        assert response.status_code == 200
+        response = await client.get(f"/products/{product_id}", headers={"If-None-Match": etag})
+    finally:
+        product_cache.redis = redis
+    assert response.status_code == 200
+    assert response.json()["price"] == 7.5
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_product_list_conditional_get(client: AsyncClient, product_data):
+    """
+    Test that list ETags depend on the query and change when the catalog does
+    """
+    headers = await get_auth_headers(client)
+    response = await client.get("/products/", params={"limit": 5})
+    etag = response.headers["ETag"]
+    assert etag != (await client.get("/products/", params={"limit": 6})).headers["ETag"]
+
+    response = await client.get(
+        "/products/", params={"limit": 5}, headers={"If-None-Match": f'"other", W/{etag}'}
+    )
+    assert response.status_code == 304
+    assert_max_queries(response, 0)
+
+    await client.post("/products/", json=product_data, headers=headers)
+    response = await client.get("/products/", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_product_list_served_from_encoded_responses(client: AsyncClient, product_data):
+    """
+    Test that a repeated listing returns the same bytes without a query until the catalog changes
+    """
+    headers = await get_auth_headers(client)
+    params = {"name_prefix": product_data["name"]}
+    await client.post("/products/", json=product_data, headers=headers)
+
+    first = await client.get("/products/", params=params)
+    second = await client.get("/products/", params=params)
+    assert second.status_code == 200
+    assert second.headers["content-type"] == "application/json"
+    assert second.content == first.content
+    assert [item["name"] for item in second.json()["items"]] == [product_data["name"]]
+    assert_max_queries(second, 0)
+
+    await client.post("/products/", json={**product_data, "price": 5.0}, headers=headers)
+    response = await client.get("/products/", params=params)
+    assert [item["price"] for item in response.json()["items"]] == [product_data["price"], 5.0]
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_search_products(client: AsyncClient):
+    """
+    Test ranked full-text search with cursor pagination
+    """
+    headers = await get_auth_headers(client)
+    token = f"zq{uuid.uuid4().hex[:8]}"
+    in_description = (await client.post(
+        "/products/",
+        json={"name": "Plain mug", "description": f"Glazed {token} finish", "price": 8.0},
+        headers=headers,
+    )).json()["id"]
+    in_name = (await client.post(
+        "/products/", json={"name": f"{token} kettle", "price": 30.0}, headers=headers
+    )).json()["id"]
+
+    response = await client.get("/products/search", params={"q": token, "limit": 1})
+    assert response.status_code == 200
+    page = response.json()
+    assert [item["id"] for item in page["items"]] == [in_name]
+
+    response = await client.get(
+        "/products/search", params={"q": token, "limit": 1, "cursor": page["next_cursor"]}
+    )
+    page = response.json()
+    assert [item["id"] for item in page["items"]] == [in_description]
+    assert page["next_cursor"] is None
+
+    response = await client.get("/products/search", params={"q": token, "cursor": "not-a-cursor"})
+    assert response.status_code == 422
+    response = await client.get("/products/search")
+    assert response.status_code == 422
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_suggest_products(client: AsyncClient):
+    """
+    Test that suggestions follow product writes without querying the database
+    """
+    headers = await get_auth_headers(client)
+    token = f"Sg{uuid.uuid4().hex[:8]}"
+    # Built by the lifespan when the API starts
+    await product_suggester.ensure_built()
+
+    product_id = (await client.post(
+        "/products/", json={"name": f"{token} Teapot", "price": 12.0}, headers=headers
+    )).json()["id"]
+    response = await client.get("/products/suggest", params={"prefix": token.lower()})
+    assert response.status_code == 200
+    assert response.json() == [{"id": product_id, "name": f"{token} Teapot"}]
+    assert_max_queries(response, 0)
+
+    await client.put(
+        f"/products/{product_id}", json={"name": f"{token} Kettle", "price": 12.0}, headers=headers
+    )
+    response = await client.get("/products/suggest", params={"prefix": f"{token} k"})
+    assert [item["id"] for item in response.json()] == [product_id]
+
+    await client.delete(f"/products/{product_id}", headers=headers)
+    response = await client.get("/products/suggest", params={"prefix": token})
+    assert response.json() == []
+    assert (await client.get("/products/suggest")).status_code == 422
@@ -3,6 +3,7 @@ Pytest configuration file containing test fixtures
 """
 import asyncio
 import os
+import fakeredis.aioredis
 import pytest
 import uuid
 from typing import Generator
@@ -10,7 +11,10 @@ from fastapi import FastAPI
 from httpx import AsyncClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from app.config.settings import DATABASE_URL
+from app.migrations import upgrade_schema
 from app.models.base import Base
+from app.services.product_cache import product_cache
 from main import app as main_app
 
 # Test database URL (using SQLite in memory for tests)
@@ -27,6 +31,24 @@ def event_loop() -> Generator:
     loop.close()
 
 
+@pytest.fixture(scope="session", autouse=True)
+def app_schema():
+    """
+    Migrate the application database the API tests run against.
+    """
+    upgrade_schema(DATABASE_URL)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def product_cache_redis():
+    """
+    Back the product cache with an in-memory Redis instead of a server.
+    """
+    product_cache.redis = fakeredis.aioredis.FakeRedis()
+    yield product_cache.redis
+    product_cache.clear()
+
+
 @pytest.fixture(scope="session")
 def test_engine():
     """
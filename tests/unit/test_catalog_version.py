@@ -0,0 +1,120 @@
+"""
+Tests for the transactional catalog version
+"""
+import asyncio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.migrations import upgrade_schema
+from app.models.catalog import ProductVersion
+from app.models.product import Product
+from app.services.catalog_version import CatalogVersionCache, VersionInfo, bump_catalog_version
+from app.services.product import create_product
+from app.schemas.product import ProductSchema
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    """
+    Path of a fresh migrated SQLite database
+    """
+    path = tmp_path / "catalog.db"
+    upgrade_schema(f"sqlite:///{path}")
+    return path
+
+
+@pytest.fixture
+def db(database_path):
+    engine = create_engine(f"sqlite:///{database_path}")
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+async def version_cache(database_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}")
+    yield CatalogVersionCache(async_sessionmaker(engine), ttl=60)
+    await engine.dispose()
+
+
+@pytest.mark.unit
+def test_version_commits_and_rolls_back_with_the_write(db):
+    """
+    Test that the version moves exactly when a product write commits
+    """
+    first = bump_catalog_version(db, 1)
+    db.commit()
+
+    db.add(Product(name="Discarded", price=1.0))
+    assert bump_catalog_version(db, 2).number == first.number + 1
+    db.rollback()
+    assert db.get(ProductVersion, 2) is None
+
+    product = create_product(db, ProductSchema(name="Kept", description=None, price=1.0))
+    assert product.id is not None
+    assert db.get(ProductVersion, product.id).version == first.number + 1
+    assert bump_catalog_version(db, 3).number == first.number + 2
+    db.rollback()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_cache_rereads_after_ttl_and_shares_reads(db, version_cache):
+    """
+    Test that concurrent callers share one read, and another process's write shows after the TTL
+    """
+    versions = await asyncio.gather(*(version_cache.current() for _ in range(50)))
+    assert len(set(versions)) == 1
+    assert version_cache.reads == 1
+
+    other_process = bump_catalog_version(db, 1)
+    db.commit()
+    assert await version_cache.current() == versions[0]
+
+    version_cache.ttl = 0
+    version_cache._expires = 0
+    assert await version_cache.current() == other_process
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_observed_local_write_is_current_without_a_read(version_cache):
+    """
+    Test that a version committed by this process is used at once and never moves backwards
+    """
+    version_cache.observe(VersionInfo(10, 1.0))
+    assert await version_cache.current() == VersionInfo(10, 1.0)
+    version_cache.observe(VersionInfo(9, 2.0))
+    assert await version_cache.current() == VersionInfo(10, 1.0)
+    assert version_cache.reads == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_product_versions_follow_each_products_own_writes(db, version_cache):
+    """
+    Test that another process's write moves only that product's version, and local writes count at once
+    """
+    version_cache.ttl = 0
+    start = await version_cache.current()
+    assert version_cache.product_version(1) == 0
+
+    first = bump_catalog_version(db, 1)
+    db.commit()
+    second = bump_catalog_version(db, 1)
+    db.commit()
+    await version_cache.current()
+    assert version_cache.product_version(1) == second.number > first.number > start.number
+    assert version_cache.product_version(2) == 0
+
+    version_cache.observe(VersionInfo(second.number + 1, second.changed_at), product_id=2)
+    assert version_cache.product_version(2) == second.number + 1
+
+    # Writes older than the window precede every cached entry and are forgotten
+    version_cache.window = 0
+    await version_cache.current()
+    assert version_cache.product_version(1) == 0
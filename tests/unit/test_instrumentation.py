@@ -0,0 +1,65 @@
+"""
+Tests for per-request SQL instrumentation
+"""
+import logging
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.instrumentation import SQLInstrumentationMiddleware, SQLMetrics, instrument_engine
+from tests.utils import query_count
+
+
+@pytest.fixture
+def instrumented():
+    """
+    Tiny app whose endpoints run a given number of statements on an instrumented engine
+    """
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    instrument_engine(engine)
+    metrics = SQLMetrics()
+    app = FastAPI()
+    app.add_middleware(SQLInstrumentationMiddleware, metrics=metrics, repeated_statement_threshold=3)
+
+    @app.get("/items/{count}")
+    def run_queries(count: int):
+        with engine.connect() as conn:
+            for i in range(count):
+                conn.execute(text("SELECT :i"), {"i": i})
+        return {}
+
+    yield app, metrics
+    engine.dispose()
+
+
+@pytest.mark.unit
+async def test_counts_statements_per_request(instrumented):
+    """
+    Test that the header and per-route metrics reflect each request's statements
+    """
+    app, metrics = instrumented
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        assert query_count(await client.get("/items/2")) == 2
+        assert query_count(await client.get("/items/0")) == 0
+
+    endpoint = metrics.snapshot()["GET /items/{count}"]
+    assert endpoint["requests"] == 2
+    assert endpoint["queries_total"] == 2
+    assert endpoint["queries_max"] == 2
+
+
+@pytest.mark.unit
+async def test_warns_on_repeated_statement(instrumented, caplog):
+    """
+    Test that a statement repeated past the threshold is logged as a possible N+1
+    """
+    app, _ = instrumented
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        with caplog.at_level(logging.WARNING, logger="app.instrumentation"):
+            await client.get("/items/2")
+            assert "Possible N+1" not in caplog.text
+            await client.get("/items/3")
+    assert "Possible N+1 in GET /items/{count}: statement ran 3 times" in caplog.text
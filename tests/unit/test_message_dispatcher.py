@@ -0,0 +1,82 @@
+"""
+Tests for the concurrent consumer dispatcher
+"""
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, call
+
+from app.messaging.rabbitmq import MessageDispatcher
+
+
+def process(message):
+    if message.get("fail"):
+        raise RuntimeError("handler failed")
+
+
+def make_dispatcher(ack_batch_size):
+    completions = []
+    connection = MagicMock()
+    connection.add_callback_threadsafe.side_effect = completions.append
+    channel = MagicMock()
+    dispatcher = MessageDispatcher(
+        connection, channel, process, workers=4,
+        ack_batch_size=ack_batch_size, ack_flush_interval=0,
+    )
+    return dispatcher, channel, completions
+
+
+def deliver(dispatcher, channel, messages):
+    for delivery_tag, message in enumerate(messages, start=1):
+        method = SimpleNamespace(delivery_tag=delivery_tag)
+        dispatcher.on_message(channel, method, None, json.dumps(message))
+    dispatcher.executor.shutdown(wait=True)
+
+
+@pytest.mark.unit
+def test_multiple_ack_waits_for_head_of_delivery_order():
+    """
+    Test that out-of-order completions are acked together once the head finishes
+    """
+    dispatcher, channel, completions = make_dispatcher(ack_batch_size=10)
+    deliver(dispatcher, channel, [{}, {}, {"fail": True}, {}])
+
+    # Complete in reverse delivery order
+    for completion in sorted(completions, key=lambda c: c.args[0], reverse=True):
+        completion()
+        if completion.args[0] > 1:
+            channel.basic_ack.assert_not_called()
+
+    channel.basic_nack.assert_called_once_with(delivery_tag=3, requeue=False)
+    channel.basic_ack.assert_called_once_with(delivery_tag=4, multiple=True)
+
+
+@pytest.mark.unit
+def test_acks_are_sent_in_batches():
+    """
+    Test that in-order completions produce one ack frame per batch
+    """
+    dispatcher, channel, completions = make_dispatcher(ack_batch_size=3)
+    deliver(dispatcher, channel, [{}] * 7)
+
+    for completion in sorted(completions, key=lambda c: c.args[0]):
+        completion()
+
+    assert channel.basic_ack.call_args_list == [
+        call(delivery_tag=3, multiple=True),
+        call(delivery_tag=6, multiple=True),
+        call(delivery_tag=7, multiple=True),
+    ]
+
+
+@pytest.mark.unit
+def test_undecodable_message_is_rejected():
+    """
+    Test that a malformed body is nacked without reaching the pool
+    """
+    dispatcher, channel, completions = make_dispatcher(ack_batch_size=1)
+    dispatcher.on_message(channel, SimpleNamespace(delivery_tag=1), None, b"not json")
+    dispatcher.executor.shutdown(wait=True)
+
+    channel.basic_nack.assert_called_once_with(delivery_tag=1, requeue=False)
+    assert completions == []
@@ -0,0 +1,178 @@
+"""
+Tests for asynchronous order intake with group commit
+"""
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.errors import ServiceUnavailableError
+from app.models.order import Order
+from app.models.product import Product
+from app.schemas.order import OrderCreate
+from app.services.order_intake import CREATED, FAILED, QUEUED, OrderIntake
+from app.services.order_service import OrderService
+
+
+@pytest.fixture
+def intake_session_factory(test_engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+
+
+@pytest.fixture
+def product_id(intake_session_factory):
+    with intake_session_factory() as db:
+        product = Product(name="Intake product", price=5.0)
+        db.add(product)
+        db.commit()
+        return product.id
+
+
+@pytest.fixture
+def blocked_writer():
+    """
+    Hold the writer inside its first group until released
+    """
+    release = threading.Event()
+    write_orders = OrderService.write_orders
+
+    def blocking_write_orders(db, submissions):
+        release.wait(5)
+        return write_orders(db, submissions)
+
+    with patch.object(OrderService, "write_orders", side_effect=blocking_write_orders):
+        yield release
+
+
+def order(product_id, quantity=1):
+    return OrderCreate(items=[{"product_id": product_id, "quantity": quantity}])
+
+
+@pytest.mark.unit
+def test_orders_are_committed_in_groups(intake_session_factory, product_id, blocked_writer):
+    """
+    Test that orders queued while a group commits are written together in the next group
+    """
+    intake = OrderIntake(intake_session_factory, batch_size=100, max_pending=100)
+    order_numbers = [intake.submit(order(product_id, quantity=i + 1), user_id=7) for i in range(20)]
+    assert intake.status(order_numbers[-1]) == {"status": QUEUED}
+
+    blocked_writer.set()
+    intake.close(timeout=5)
+
+    # The first order may be taken alone before the rest arrive; the rest form one group
+    assert intake.stats()["orders"] == 20
+    assert intake.stats()["groups"] <= 2
+    with intake_session_factory() as db:
+        for i, order_number in enumerate(order_numbers):
+            status = intake.status(order_number)
+            assert status["status"] == CREATED
+            created = db.get(Order, status["order_id"])
+            assert created.order_number == order_number
+            assert created.user_id == 7
+            assert created.total_amount == pytest.approx(5.0 * (i + 1))
+
+
+@pytest.mark.unit
+def test_invalid_order_fails_alone(intake_session_factory, product_id):
+    """
+    Test that an order with unknown products fails without affecting its group
+    """
+    intake = OrderIntake(intake_session_factory)
+    good = intake.submit(order(product_id), user_id=1)
+    bad = intake.submit(order(999999), user_id=1)
+    intake.close(timeout=5)
+
+    assert intake.status(good)["status"] == CREATED
+    assert intake.status(bad) == {"status": FAILED, "error": "Product IDs do not exist: 999999"}
+
+
+@pytest.mark.unit
+def test_full_intake_rejects_with_service_unavailable(intake_session_factory, product_id, blocked_writer):
+    """
+    Test that submissions beyond max_pending are rejected instead of queued
+    """
+    intake = OrderIntake(intake_session_factory, max_pending=2)
+    submitted = []
+    with pytest.raises(ServiceUnavailableError):
+        for _ in range(10):
+            submitted.append(intake.submit(order(product_id), user_id=1))
+    # Two queued, plus possibly one already taken by the blocked writer
+    assert 2 <= len(submitted) <= 3
+
+    blocked_writer.set()
+    intake.close(timeout=5)
+    assert all(intake.status(number)["status"] == CREATED for number in submitted)
+
+
+@pytest.mark.unit
+def test_transient_error_retries_the_group(intake_session_factory, product_id):
+    """
+    Test that a deadlock-style error is retried and the group still commits together
+    """
+    write_orders = OrderService.write_orders
+    calls = []
+
+    def deadlocking_once(db, submissions):
+        calls.append(len(submissions))
+        if len(calls) == 1:
+            raise OperationalError("INSERT", {}, Exception("deadlock detected"))
+        return write_orders(db, submissions)
+
+    intake = OrderIntake(intake_session_factory, retry_backoff=0)
+    with patch.object(OrderService, "write_orders", side_effect=deadlocking_once):
+        numbers = [intake.submit(order(product_id), user_id=1) for _ in range(3)]
+        intake.close(timeout=5)
+
+    assert all(intake.status(number)["status"] == CREATED for number in numbers)
+    assert intake.stats()["retries"] == 1
+    assert intake.stats()["split_groups"] == 0
+
+
+@pytest.mark.unit
+def test_failing_group_is_written_one_order_at_a_time(intake_session_factory, product_id):
+    """
+    Test that a group that keeps failing is split, so only the order that cannot be saved fails
+    """
+    write_orders = OrderService.write_orders
+
+    def reject_user_13(db, submissions):
+        if any(user_id == 13 for _, user_id, _ in submissions):
+            raise ValueError("value too long for column")
+        return write_orders(db, submissions)
+
+    intake = OrderIntake(intake_session_factory, retry_backoff=0)
+    with patch.object(OrderService, "write_orders", side_effect=reject_user_13):
+        good = [intake.submit(order(product_id), user_id=1) for _ in range(2)]
+        bad = intake.submit(order(product_id), user_id=13)
+        intake.close(timeout=5)
+
+    assert all(intake.status(number)["status"] == CREATED for number in good)
+    assert intake.status(bad) == {"status": FAILED, "error": "Order could not be saved"}
+    assert intake.stats()["split_groups"] >= 1
+    # Not transient, so never retried
+    assert intake.stats()["retries"] == 0
+
+
+@pytest.mark.unit
+def test_close_gives_up_after_its_timeout(intake_session_factory, product_id, blocked_writer, caplog):
+    """
+    Test that close returns after the timeout and logs the orders it drops
+    """
+    intake = OrderIntake(intake_session_factory, close_timeout=0.1)
+    first = intake.submit(order(product_id), user_id=1)
+    # Let the writer take the first order and block on it
+    while intake.stats()["pending"]:
+        time.sleep(0.01)
+    queued = [intake.submit(order(product_id), user_id=1) for _ in range(3)]
+
+    intake.close()
+    assert intake.stats()["dropped"] == 3
+    assert all(intake.status(number)["status"] == FAILED for number in queued)
+    assert all(number in caplog.text for number in queued)
+
+    blocked_writer.set()
+    intake._writer.join(5)
+    assert intake.status(first)["status"] == CREATED
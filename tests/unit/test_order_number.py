@@ -0,0 +1,220 @@
+"""
+Tests for the Snowflake-style order number generator
+"""
+import logging
+import threading
+import fakeredis
+import pytest
+
+from app.errors import ServiceUnavailableError
+from app.services.order_number import (
+    EPOCH_MS,
+    MAX_NODE_ID,
+    MAX_SEQUENCE,
+    NODE_LEASE_KEY,
+    NodeIdLease,
+    OrderNumberGenerator,
+    decode,
+    default_node_id,
+)
+
+
+class FakeClock:
+    def __init__(self, ms):
+        self.ms = ms
+
+    def __call__(self):
+        return self.ms / 1000
+
+
+@pytest.mark.unit
+def test_numbers_encode_time_node_and_sequence():
+    """
+    Test that a number decodes back to its timestamp, node id and sequence
+    """
+    clock = FakeClock(EPOCH_MS + 123456)
+    generator = OrderNumberGenerator(node_id=42, clock=clock)
+    first, second = generator.next(), generator.next()
+    assert decode(first) == (EPOCH_MS + 123456, 42, 0)
+    assert decode(second) == (EPOCH_MS + 123456, 42, 1)
+
+    clock.ms += 1
+    assert decode(generator.next()) == (EPOCH_MS + 123457, 42, 0)
+
+
+@pytest.mark.unit
+def test_numbers_sort_in_generation_order():
+    """
+    Test that fixed-width numbers sort as strings in the order they were generated
+    """
+    clock = FakeClock(EPOCH_MS)
+    generator = OrderNumberGenerator(node_id=1, clock=clock)
+    numbers = []
+    for step in (0, 1, 31, 32, 1023, 1 << 20):
+        clock.ms = EPOCH_MS + step
+        numbers.append(generator.next())
+    assert sorted(numbers) == numbers
+    assert len({len(number) for number in numbers}) == 1
+
+
+@pytest.mark.unit
+def test_monotonic_when_clock_goes_backwards_or_sequence_overflows():
+    """
+    Test that numbers keep increasing across a clock step back and a full millisecond
+    """
+    clock = FakeClock(EPOCH_MS + 1000)
+    generator = OrderNumberGenerator(node_id=3, clock=clock)
+    ids = [generator.next_id() for _ in range(MAX_SEQUENCE + 10)]
+    clock.ms -= 500
+    ids += [generator.next_id() for _ in range(10)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+@pytest.mark.unit
+def test_unique_across_threads():
+    """
+    Test that concurrent callers never receive the same number
+    """
+    generator = OrderNumberGenerator(node_id=7)
+    numbers = []
+
+    def draw():
+        numbers.extend(generator.next() for _ in range(2000))
+
+    threads = [threading.Thread(target=draw) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(numbers)) == len(numbers) == 16000
+
+
+@pytest.mark.unit
+def test_node_id_out_of_range_is_rejected():
+    """
+    Test that node ids must fit in the 10-bit node field
+    """
+    with pytest.raises(ValueError):
+        OrderNumberGenerator(node_id=MAX_NODE_ID + 1)
+
+
+@pytest.mark.unit
+def test_unconfigured_generators_lease_distinct_node_ids():
+    """
+    Test that processes without a configured node id lease different ones from Redis
+    """
+    server = fakeredis.FakeServer()
+    leases = []
+
+    def lease_factory():
+        lease = NodeIdLease(lambda: fakeredis.FakeRedis(server=server, decode_responses=True))
+        leases.append(lease)
+        return lease
+
+    generators = [OrderNumberGenerator(node_id=None, lease_factory=lease_factory) for _ in range(3)]
+    try:
+        node_ids = [decode(generator.next())[1] for generator in generators]
+        assert len(set(node_ids)) == 3
+
+        # A released id is free again, a held one is skipped
+        generators[0].close()
+        redis = fakeredis.FakeRedis(server=server)
+        assert not redis.exists(NODE_LEASE_KEY.format(node_ids[0]))
+        assert redis.exists(NODE_LEASE_KEY.format(node_ids[1]))
+    finally:
+        for generator in generators:
+            generator.close()
+
+
+@pytest.mark.unit
+def test_lease_claims_new_id_when_taken_over():
+    """
+    Test that a lease which expired and was claimed by another process moves to a free id
+    """
+    server = fakeredis.FakeServer()
+    lease = NodeIdLease(lambda: fakeredis.FakeRedis(server=server, decode_responses=True))
+    node_id = lease.acquire()
+    try:
+        redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+        redis.set(NODE_LEASE_KEY.format(node_id), "another process")
+
+        lease.renew()
+        assert lease.node_id != node_id
+        assert redis.get(NODE_LEASE_KEY.format(lease.node_id)) == lease.owner
+    finally:
+        lease.release()
+
+
+@pytest.mark.unit
+def test_falls_back_to_hash_with_warning(caplog):
+    """
+    Test that without Redis the host/pid node id is used and the collision risk is logged
+    """
+
+    def unreachable():
+        raise ConnectionError("Redis unreachable")
+
+    generator = OrderNumberGenerator(
+        node_id=None, lease_factory=lambda: NodeIdLease(unreachable)
+    )
+    with caplog.at_level(logging.WARNING, logger="app.services.order_number"):
+        assert decode(generator.next())[1] == default_node_id()
+    assert "ORDER_NUMBER_NODE_ID" in caplog.text
+
+
+class LeaseClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+def test_generation_stops_while_lease_is_lost():
+    """
+    Test that numbers are refused once the lease could not be renewed within its ttl, and resume on renewal
+    """
+    server = fakeredis.FakeServer()
+    clock = LeaseClock()
+    lease = NodeIdLease(lambda: fakeredis.FakeRedis(server=server, decode_responses=True), ttl=60, clock=clock)
+    generator = OrderNumberGenerator(node_id=None, lease_factory=lambda: lease)
+    try:
+        node_id = decode(generator.next())[1]
+
+        # Renewals failed for the whole ttl: another process may now hold the id
+        clock.now = 60
+        with pytest.raises(ServiceUnavailableError):
+            generator.next()
+
+        lease.renew()
+        assert decode(generator.next())[1] == node_id
+    finally:
+        generator.close()
+
+
+class CountingRedis:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = 0
+
+    def __getattr__(self, name):
+        self.calls += 1
+        return getattr(self.redis, name)
+
+
+@pytest.mark.unit
+def test_generation_does_no_redis_io_once_leased():
+    """
+    Test that handing out numbers only checks the lease locally, without calling Redis
+    """
+    redis = CountingRedis(fakeredis.FakeRedis(decode_responses=True))
+    generator = OrderNumberGenerator(node_id=None, lease_factory=lambda: NodeIdLease(lambda: redis))
+    try:
+        generator.next()
+        calls = redis.calls
+        assert len({generator.next() for _ in range(100)}) == 100
+        assert redis.calls == calls
+    finally:
+        generator.close()
@@ -0,0 +1,138 @@
+"""
+Tests for Celery order tasks
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+import pytest
+from unittest.mock import patch
+from celery.exceptions import Retry
+from sqlalchemy.orm import sessionmaker
+
+from app.config.settings import PAYMENT_VERIFY_DELAY, TASK_RETRY_BACKOFF_MAX
+from app.messaging.order_events import PAYMENT_PROCESSED_KEY
+from app.models.order import Order, OrderStatus
+from app.models.outbox import OutboxEvent
+from app.tasks import order_tasks
+from app.tasks.order_tasks import (
+    retry_countdown,
+    send_order_confirmation_email,
+    verify_payment_status,
+    verify_pending_payments,
+)
+from tests.utils import count_queries
+
+
+@pytest.fixture
+def task_session_factory(test_engine):
+    """
+    Point the tasks at the test database
+    """
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    with patch.object(order_tasks, "SessionLocal", Session):
+        yield Session
+
+
+def create_order(Session, payment_status, created_at=None):
+    with Session() as db:
+        order = Order(
+            order_number=f"ORD-{uuid.uuid4().hex[:8].upper()}",
+            user_id=1,
+            total_amount=10,
+            status=OrderStatus.PENDING,
+            payment_status=payment_status,
+        )
+        if created_at is not None:
+            order.created_at = created_at
+        db.add(order)
+        db.commit()
+        return order.id
+
+
+@pytest.mark.unit
+def test_retry_countdown_backs_off_exponentially():
+    """
+    Test that retry delays double and are capped
+    """
+    assert retry_countdown(0) == PAYMENT_VERIFY_DELAY
+    assert retry_countdown(1) == PAYMENT_VERIFY_DELAY * 2
+    assert retry_countdown(50) == TASK_RETRY_BACKOFF_MAX
+
+
+@pytest.mark.unit
+def test_pending_payment_is_rescheduled(task_session_factory):
+    """
+    Test that a pending payment reschedules the task instead of sleeping
+    """
+    order_id = create_order(task_session_factory, "pending")
+
+    with patch.object(verify_payment_status, "retry", side_effect=Retry()) as retry:
+        result = verify_payment_status.apply(args=[order_id])
+
+    assert result.state == "RETRY"
+    retry.assert_called_once_with(countdown=PAYMENT_VERIFY_DELAY)
+
+
+@pytest.mark.unit
+def test_completed_payment_marks_order_paid(task_session_factory):
+    """
+    Test that a completed payment is confirmed without retrying
+    """
+    order_id = create_order(task_session_factory, "completed")
+
+    result = verify_payment_status.apply(args=[order_id]).get()
+
+    assert result["status"] == "paid"
+    with task_session_factory() as db:
+        assert db.get(Order, order_id).status == OrderStatus.PAID
+
+
+@pytest.mark.unit
+def test_sweep_settles_stuck_payments_in_batches(task_session_factory, test_engine):
+    """
+    Test that stale pending payments are settled with one query and lookup per batch
+    """
+    stale = datetime.now(timezone.utc) - timedelta(hours=1)
+    stuck_ids = [create_order(task_session_factory, "pending", created_at=stale) for _ in range(5)]
+    recent_id = create_order(task_session_factory, "pending")
+    # What the provider reports: three completed, one failed, one still in progress
+    reported = {order_id: "completed" for order_id in stuck_ids[:3]}
+    reported[stuck_ids[3]] = "failed"
+    lookups = []
+
+    def fetch_payment_statuses(order_ids):
+        lookups.append(order_ids)
+        return {order_id: reported[order_id] for order_id in order_ids if order_id in reported}
+
+    with patch.object(order_tasks, "fetch_payment_statuses", fetch_payment_statuses), count_queries(
+        test_engine
+    ) as statements:
+        result = verify_pending_payments.apply(kwargs={"batch_size": 2, "stale_after": 600}).get()
+
+    assert result["confirmed"] == 3
+    assert result["failed"] == 1
+    assert lookups == [stuck_ids[:2], stuck_ids[2:4], stuck_ids[4:]]
+    # Per batch a SELECT, an UPDATE per outcome and one outbox INSERT
+    assert len(statements) == 3 + 4 + 1
+    with task_session_factory() as db:
+        orders = [db.get(Order, order_id) for order_id in stuck_ids]
+        assert [order.status for order in orders] == [OrderStatus.PAID] * 3 + [OrderStatus.PENDING] * 2
+        assert [order.payment_status for order in orders] == ["completed"] * 3 + ["failed", "pending"]
+        assert db.get(Order, recent_id).payment_status == "pending"
+        events = db.query(OutboxEvent).filter(OutboxEvent.routing_key == PAYMENT_PROCESSED_KEY).all()
+        assert {(event.payload["order_id"], event.payload["payment_status"]) for event in events} >= {
+            (order_id, reported[order_id]) for order_id in stuck_ids[:4]
+        }
+
+
+@pytest.mark.unit
+def test_email_delivery_failure_is_retried():
+    """
+    Test that a failure reaching the email service retries the task until the email is sent
+    """
+    with patch.object(
+        order_tasks, "deliver_email", side_effect=[ConnectionError("refused"), None]
+    ) as deliver:
+        result = send_order_confirmation_email.apply(args=[1, "buyer@example.com"])
+
+    assert result.get()["success"] is True
+    assert deliver.call_count == 2
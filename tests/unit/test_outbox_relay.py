@@ -0,0 +1,136 @@
+"""
+Tests for the transactional outbox relay
+"""
+from datetime import datetime, timedelta, timezone
+
+import pika
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy.orm import sessionmaker
+
+from app.messaging.outbox import OutboxRelay, enqueue_event
+from app.models.outbox import OutboxEvent
+
+
+@pytest.fixture
+def outbox_session_factory(test_engine):
+    """
+    Session factory on the test database with an empty outbox
+    """
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    with Session() as db:
+        db.query(OutboxEvent).delete()
+        db.commit()
+    return Session
+
+
+def stage_events(session_factory, count):
+    with session_factory() as db:
+        for i in range(count):
+            enqueue_event(db, "order_events", "order.created", {"order_id": i})
+        db.commit()
+
+
+@pytest.mark.unit
+def test_relay_publishes_and_marks_batch(outbox_session_factory):
+    """
+    Test that a batch is published in order and marked as sent
+    """
+    stage_events(outbox_session_factory, 5)
+    client = MagicMock()
+    relay = OutboxRelay(outbox_session_factory, client=client, batch_size=3)
+
+    assert relay.relay_batch() == 3
+    assert relay.relay_batch() == 2
+    assert relay.relay_batch() == 0
+
+    client.enable_transactions.assert_called_once()
+    # One broker round trip per batch, not per event
+    assert client.commit.call_count == 2
+    order_ids = [c.kwargs["message"]["order_id"] for c in client.publish_message.call_args_list]
+    assert order_ids == [0, 1, 2, 3, 4]
+    with outbox_session_factory() as db:
+        assert db.query(OutboxEvent).filter(OutboxEvent.published_at.is_(None)).count() == 0
+
+
+@pytest.mark.unit
+def test_relay_publishes_around_rejected_event(outbox_session_factory):
+    """
+    Test that a rejected event counts an attempt without holding back the rest of its batch
+    """
+    stage_events(outbox_session_factory, 3)
+    client = MagicMock()
+
+    def publish_message(**kwargs):
+        if kwargs["message"]["order_id"] == 1:
+            raise pika.exceptions.ChannelClosedByBroker(404, "NOT_FOUND")
+
+    client.publish_message.side_effect = publish_message
+    relay = OutboxRelay(outbox_session_factory, client=client, batch_size=10)
+
+    assert relay.relay_batch() == 2
+
+    with outbox_session_factory() as db:
+        events = db.query(OutboxEvent).order_by(OutboxEvent.id).all()
+        assert [event.published_at is not None for event in events] == [True, False, True]
+        assert [event.attempts for event in events] == [1, 1, 1]
+
+
+@pytest.mark.unit
+def test_relay_parks_event_after_max_attempts(outbox_session_factory):
+    """
+    Test that an event failing max_attempts times is no longer retried
+    """
+    stage_events(outbox_session_factory, 1)
+    client = MagicMock()
+    client.commit.side_effect = pika.exceptions.ChannelClosedByBroker(404, "NOT_FOUND")
+    relay = OutboxRelay(outbox_session_factory, client=client, batch_size=10, max_attempts=2)
+
+    assert relay.relay_batch() == 0
+    assert relay.relay_batch() == 0
+    publishes = client.publish_message.call_count
+    assert relay.relay_batch() == 0
+    assert client.publish_message.call_count == publishes
+
+    with outbox_session_factory() as db:
+        event = db.query(OutboxEvent).one()
+        assert event.published_at is None
+        assert event.attempts == 2
+
+
+@pytest.mark.unit
+def test_relay_does_not_count_attempts_while_broker_is_down(outbox_session_factory):
+    """
+    Test that events are left untouched when the broker cannot be reached
+    """
+    stage_events(outbox_session_factory, 2)
+    client = MagicMock()
+    client.connect.side_effect = pika.exceptions.AMQPConnectionError()
+    relay = OutboxRelay(outbox_session_factory, client=client, batch_size=10, max_attempts=1)
+
+    with pytest.raises(pika.exceptions.AMQPConnectionError):
+        relay.relay_batch()
+
+    with outbox_session_factory() as db:
+        assert [event.attempts for event in db.query(OutboxEvent)] == [0, 0]
+
+
+@pytest.mark.unit
+def test_prune_deletes_old_published_events(outbox_session_factory):
+    """
+    Test that only events published longer ago than the retention are deleted
+    """
+    stage_events(outbox_session_factory, 3)
+    now = datetime.now(timezone.utc)
+    with outbox_session_factory() as db:
+        old, recent, pending = db.query(OutboxEvent).order_by(OutboxEvent.id).all()
+        old.published_at = now - timedelta(hours=2)
+        recent.published_at = now
+        db.commit()
+        kept = [recent.id, pending.id]
+
+    relay = OutboxRelay(outbox_session_factory, client=MagicMock(), retention=3600)
+    assert relay.prune() == 1
+
+    with outbox_session_factory() as db:
+        assert [event.id for event in db.query(OutboxEvent).order_by(OutboxEvent.id)] == kept
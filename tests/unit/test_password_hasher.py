@@ -0,0 +1,68 @@
+"""
+Tests for the bounded password hashing pool
+"""
+import pytest
+
+from app.errors import ServiceUnavailableError
+from app.services.password_hasher import PasswordHasher
+
+
+@pytest.mark.unit
+def test_hash_and_verify_in_process_pool():
+    """
+    Test that hashing round-trips through the worker pool and is measured
+    """
+    hasher = PasswordHasher(workers=1, max_pending=2)
+    try:
+        hashed = hasher.hash("s3cret")
+        assert hasher.verify("s3cret", hashed)
+        assert not hasher.verify("wrong", hashed)
+        stats = hasher.stats()
+        assert stats["completed"] == 3
+        assert stats["in_flight"] == 0
+        assert stats["max_latency_ms"] > 0
+    finally:
+        hasher.close()
+
+
+@pytest.mark.unit
+def test_saturated_pool_rejects_with_503():
+    """
+    Test that calls beyond the queue-depth limit fail fast with 503
+    """
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    # Hold the only slot, as a call in progress would
+    hasher._slots.acquire()
+    with pytest.raises(ServiceUnavailableError) as exc_info:
+        hasher.hash("s3cret")
+    assert exc_info.value.status_code == 503
+    assert hasher.stats()["rejected"] == 1
+
+
+@pytest.mark.unit
+def test_rejects_non_positive_limits():
+    """
+    Test that a queue depth of zero is a configuration error rather than disabled auth
+    """
+    with pytest.raises(ValueError):
+        PasswordHasher(workers=1, max_pending=0)
+    with pytest.raises(ValueError):
+        PasswordHasher(workers=0, max_pending=1)
+
+
+@pytest.mark.unit
+def test_broken_pool_is_replaced():
+    """
+    Test that a pool broken by a killed worker is recreated instead of failing every call
+    """
+    hasher = PasswordHasher(workers=1, max_pending=2)
+    try:
+        hashed = hasher.hash("s3cret")
+        for process in list(hasher._executor._processes.values()):
+            process.kill()
+            process.join()
+
+        assert hasher.verify("s3cret", hashed)
+        assert hasher.stats()["pool_restarts"] == 1
+    finally:
+        hasher.close()
@@ -0,0 +1,69 @@
+"""
+Tests for the verified-principal cache
+"""
+import time
+import pytest
+
+from app.services.principal_cache import MAX_TTL, PrincipalCache
+
+
+@pytest.mark.unit
+def test_hit_and_miss_counters():
+    """
+    Test that lookups are counted as hits or misses
+    """
+    cache = PrincipalCache(max_size=10, ttl=60)
+    assert cache.get("token") is None
+    cache.put("token", "alice-principal", "alice")
+    assert cache.get("token") == "alice-principal"
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+@pytest.mark.unit
+def test_entry_expires_with_token():
+    """
+    Test that an entry is evicted at the token's exp claim
+    """
+    cache = PrincipalCache(max_size=10, ttl=60)
+    cache.put("token", "alice-principal", "alice", expires_at=time.time() - 1)
+    assert cache.get("token") is None
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.unit
+def test_least_recently_used_entry_is_evicted():
+    """
+    Test that the cache stays within its size bound
+    """
+    cache = PrincipalCache(max_size=2, ttl=60)
+    cache.put("a", "A", "alice")
+    cache.put("b", "B", "bob")
+    cache.get("a")
+    cache.put("c", "C", "carol")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+
+
+@pytest.mark.unit
+def test_invalidate_user_drops_all_tokens():
+    """
+    Test that a user change revokes every cached token of that user
+    """
+    cache = PrincipalCache(max_size=10, ttl=60)
+    cache.put("t1", "A", "alice")
+    cache.put("t2", "A", "alice")
+    cache.put("t3", "B", "bob")
+    cache.invalidate_user("alice")
+    assert cache.get("t1") is None
+    assert cache.get("t2") is None
+    assert cache.get("t3") == "B"
+
+
+@pytest.mark.unit
+def test_ttl_is_capped():
+    """
+    Test that a TTL longer than the cross-process staleness bound is rejected
+    """
+    with pytest.raises(ValueError):
+        PrincipalCache(max_size=10, ttl=MAX_TTL + 1)
@@ -0,0 +1,216 @@
+"""
+Tests for the two-tier product cache
+"""
+import asyncio
+import pytest
+import fakeredis
+import fakeredis.aioredis
+
+from app.services.product_cache import ProductCache
+
+
+class CountingLoader:
+    """Loader returning a fixed product after a short delay, counting calls"""
+
+    def __init__(self, product, delay=0.05):
+        self.product = product
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.product
+
+
+def new_cache(server=None, **kwargs):
+    server = server or fakeredis.FakeServer()
+    return ProductCache(redis_factory=lambda: fakeredis.aioredis.FakeRedis(server=server), **kwargs)
+
+
+PRODUCT = {"id": 1, "name": "Widget", "description": None, "price": 9.5}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_read_through_l1_then_l2():
+    """
+    Test that a miss loads once, then L1 serves it, and a fresh process is served by L2
+    """
+    server = fakeredis.FakeServer()
+    cache = new_cache(server)
+    load = CountingLoader(PRODUCT)
+    assert await cache.get(1, load, 1, 0) == PRODUCT
+    assert await cache.get(1, load, 1, 0) == PRODUCT
+    assert load.calls == 1
+    assert cache.stats()["l1_hits"] == 1
+
+    other_process = new_cache(server)
+    assert await other_process.get(1, load, 1, 0) == PRODUCT
+    assert load.calls == 1
+    assert other_process.stats()["l2_hits"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_missing_products_are_cached():
+    """
+    Test that an unknown id is looked up once and then served as missing
+    """
+    cache = new_cache()
+    load = CountingLoader(None)
+    assert await cache.get(404, load, 1, 0) is None
+    assert await cache.get(404, load, 1, 0) is None
+    assert load.calls == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_writes_replace_cached_values_in_both_tiers():
+    """
+    Test that put and invalidate overwrite L1 and L2, so no tier serves the old product
+    """
+    server = fakeredis.FakeServer()
+    cache = new_cache(server)
+    await cache.get(1, CountingLoader(PRODUCT), 1, 0)
+
+    updated = {**PRODUCT, "price": 12.0}
+    await cache.put(updated, 2)
+    assert await cache.get(1, CountingLoader(PRODUCT), 2, 2) == updated
+    assert await new_cache(server).get(1, CountingLoader(PRODUCT), 2, 2) == updated
+
+    await cache.invalidate(1, 3)
+    assert await cache.get(1, CountingLoader(PRODUCT), 3, 3) is None
+    assert await new_cache(server).get(1, CountingLoader(PRODUCT), 3, 3) is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_slow_refill_does_not_overwrite_a_write():
+    """
+    Test that a value loaded before an update does not replace the updated one
+    """
+    server = fakeredis.FakeServer()
+    cache = new_cache(server)
+    stale_load = CountingLoader(PRODUCT, delay=0.1)
+    updated = {**PRODUCT, "name": "Renamed"}
+
+    refill = asyncio.ensure_future(cache.get(1, stale_load, 1, 0))
+    await asyncio.sleep(0.02)
+    await cache.put(updated, 2)
+    await refill
+
+    assert await cache.get(1, CountingLoader(PRODUCT), 2, 2) == updated
+    assert await new_cache(server).get(1, CountingLoader(PRODUCT), 2, 2) == updated
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    """
+    Test that a thousand concurrent misses in one process run a single query
+    """
+    cache = new_cache()
+    load = CountingLoader(PRODUCT)
+    results = await asyncio.gather(*(cache.get(1, load, 1, 0) for _ in range(1000)))
+    assert results == [PRODUCT] * 1000
+    assert load.calls == 1
+    assert cache.stats()["coalesced"] == 999
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_concurrent_misses_across_processes_share_one_load():
+    """
+    Test that processes sharing Redis wait for the refill lock holder instead of querying
+    """
+    server = fakeredis.FakeServer()
+    processes = [new_cache(server) for _ in range(5)]
+    load = CountingLoader(PRODUCT)
+    results = await asyncio.gather(*(cache.get(1, load, 1, 0) for cache in processes for _ in range(20)))
+    assert results == [PRODUCT] * 100
+    assert load.calls == 1
+
+
+class BrokenRedis:
+    def __getattr__(self, name):
+        async def fail(*args, **kwargs):
+            raise ConnectionError("Redis is down")
+
+        return fail
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_redis_outage_reads_through():
+    """
+    Test that a failing Redis is skipped and the loader still answers
+    """
+    cache = ProductCache(redis_factory=BrokenRedis, l1_ttl=0)
+    load = CountingLoader(PRODUCT, delay=0)
+    assert await cache.get(1, load, 1, 0) == PRODUCT
+    assert await cache.get(1, load, 1, 0) == PRODUCT
+    assert load.calls == 2
+    # Redis is only retried after redis_retry seconds
+    assert cache.stats()["redis_errors"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_newer_product_write_skips_stale_l1():
+    """
+    Test that a process that has seen the product's write ignores its L1 entry and sees it
+    """
+    server = fakeredis.FakeServer()
+    reader, writer = new_cache(server), new_cache(server)
+    assert await reader.get(1, CountingLoader(PRODUCT), 1, 0) == PRODUCT
+
+    updated = {**PRODUCT, "price": 1.0}
+    await writer.put(updated, 2)
+    # Until the reader sees the product's write its L1 entry is still served
+    assert await reader.get(1, CountingLoader(PRODUCT), 1, 0) == PRODUCT
+    assert await reader.get(1, CountingLoader(PRODUCT), 2, 2) == updated
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_writing_one_product_does_not_evict_another():
+    """
+    Test that entries of product B stay hits in both tiers after product A is written
+    """
+    server = fakeredis.FakeServer()
+    cache, other_process = new_cache(server), new_cache(server)
+    other = {**PRODUCT, "id": 2, "name": "Gadget"}
+    load = CountingLoader(other)
+    assert await cache.get(2, load, 1, 0) == other
+
+    await cache.put({**PRODUCT, "price": 3.0}, 2)
+    # Catalog version 2 wrote product 1 only; product 2 last changed before version 1
+    assert await cache.get(2, load, 2, 0) == other
+    assert await other_process.get(2, load, 2, 0) == other
+    assert load.calls == 1
+    assert cache.stats()["l1_hits"] == 1
+    assert other_process.stats()["l2_hits"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_write_during_redis_outage_is_not_served_stale():
+    """
+    Test that a write whose Redis update failed is still seen by another process at its version
+    """
+    server = fakeredis.FakeServer()
+    writer, reader = new_cache(server), new_cache(server)
+    assert await reader.get(1, CountingLoader(PRODUCT), 1, 0) == PRODUCT
+
+    writer.redis = BrokenRedis()
+    updated = {**PRODUCT, "name": "Renamed"}
+    await writer.put(updated, 2)
+    # Retried even though the first failure marked Redis down
+    assert writer.stats()["redis_errors"] == 2
+
+    # L2 still holds the old value, but it is older than the product's write the reader now knows of
+    load = CountingLoader(updated)
+    assert await reader.get(1, load, 2, 2) == updated
+    assert load.calls == 1
+    assert await new_cache(server).get(1, CountingLoader(PRODUCT), 2, 2) == updated
@@ -0,0 +1,95 @@
+"""
+Tests for full-text product search on the migrated schema (SQLite FTS5)
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.errors import ServiceUnavailableError
+from app.migrations import upgrade_schema
+from app.models.product import Product
+from app.services.product import _search_query, search_products
+
+
+@pytest.fixture
+def search_db(tmp_path):
+    """
+    Session on a fresh migrated SQLite database
+    """
+    url = f"sqlite:///{tmp_path / 'search.db'}"
+    upgrade_schema(url)
+    engine = create_engine(url)
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def add_products(db, *products):
+    rows = [Product(name=name, description=description, price=1.0) for name, description in products]
+    db.add_all(rows)
+    db.commit()
+    return [row.id for row in rows]
+
+
+@pytest.mark.unit
+def test_name_matches_rank_above_description_matches(search_db):
+    """
+    Test that matches are stemmed, all terms are required and names weigh more
+    """
+    described, named, other = add_products(
+        search_db,
+        ("Trail cap", "Keeps the sun off while running"),
+        ("Running shoes", "Light and breathable"),
+        ("Rain jacket", "Waterproof shell"),
+    )
+    products, next_cursor = search_products(search_db, "runs")
+    assert [product.id for product in products] == [named, described]
+    assert next_cursor is None
+    assert search_products(search_db, "running jacket") == ([], None)
+    assert search_products(search_db, "?!") == ([], None)
+
+
+@pytest.mark.unit
+def test_index_follows_product_writes(search_db):
+    """
+    Test that updates and deletes are reflected in the next search
+    """
+    (product_id,) = add_products(search_db, ("Wool socks", "Warm"))
+    product = search_db.get(Product, product_id)
+    product.name = "Cotton socks"
+    search_db.commit()
+    assert search_products(search_db, "wool") == ([], None)
+    assert [p.id for p in search_products(search_db, "cotton")[0]] == [product_id]
+
+    search_db.delete(product)
+    search_db.commit()
+    assert search_products(search_db, "cotton") == ([], None)
+
+
+@pytest.mark.unit
+def test_pages_follow_the_ranking(search_db):
+    """
+    Test that walking the cursor returns every match once, in ranked order
+    """
+    add_products(search_db, *[(f"Lamp {i}", "lamp " * (i % 3)) for i in range(7)])
+    ranked, _ = search_products(search_db, "lamp", limit=100)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = search_products(search_db, "lamp", limit=3, cursor=cursor)
+        seen.extend(product.id for product in page)
+        if cursor is None:
+            break
+    assert seen == [product.id for product in ranked]
+    assert len(seen) == 7
+
+
+@pytest.mark.unit
+def test_unsupported_dialect_is_unavailable():
+    """
+    Test that search on a database without a text index answers 503 rather than crashing
+    """
+    with pytest.raises(ServiceUnavailableError) as exc_info:
+        _search_query("mysql", "shoes", ["shoes"], 10, None)
+    assert exc_info.value.status_code == 503
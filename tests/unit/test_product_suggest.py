@@ -0,0 +1,293 @@
+"""
+Tests for the in-memory product name suggestion index
+"""
+import asyncio
+import fakeredis
+import fakeredis.aioredis
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.database import ReplicaSet, RoutingSession
+from app.errors import ServiceUnavailableError
+from app.migrations import upgrade_schema
+from app.models.catalog import CatalogVersion
+from app.models.product import Product
+from app.services.product_suggest import NameChangeLog, ProductSuggester, _load_catalog
+
+
+class FakeCatalog:
+    """Product names, catalog version and name change log as other processes change them"""
+
+    def __init__(self, names):
+        self.names = dict(names)
+        self.version = 1
+        self.loads = 0
+        self.version_reads = 0
+        self.fail = False
+        self.published = []
+
+    def write(self, product_id, name, publish=True):
+        """A product write committed by another process"""
+        self.version += 1
+        if name is None:
+            self.names.pop(product_id, None)
+        else:
+            self.names[product_id] = name
+        if publish:
+            self.published.append((self.version, product_id, name))
+
+    async def load_catalog(self):
+        self.loads += 1
+        if self.fail:
+            raise ConnectionError("database is down")
+        return self.version, list(self.names.items())
+
+    async def catalog_version(self):
+        self.version_reads += 1
+        return self.version
+
+    async def publish(self, version, product_id, name):
+        self.published.append((version, product_id, name))
+
+    async def since(self, after, until):
+        return [change for change in self.published if after < change[0] <= until]
+
+
+def create_catalog_db(path, version, names):
+    """
+    A migrated SQLite database at the given catalog version holding the named products
+    """
+    upgrade_schema(f"sqlite:///{path}")
+    engine = create_engine(f"sqlite:///{path}")
+    with Session(engine) as db:
+        db.execute(update(CatalogVersion).values(version=version))
+        db.add_all(Product(id=product_id, name=name, price=1.0) for product_id, name in names.items())
+        db.commit()
+    engine.dispose()
+    return create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+
+def new_suggester(catalog, sync_interval=60):
+    return ProductSuggester(
+        catalog.load_catalog,
+        catalog.catalog_version,
+        changes=catalog,
+        sync_interval=sync_interval,
+        gap_wait=0,
+    )
+
+
+async def wait_for_version(suggester, version):
+    for _ in range(100):
+        if suggester.stats()["version"] == version:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("the index did not catch up")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_names_starting_with_prefix_come_first():
+    """
+    Test that whole-name matches precede later-word matches, case-insensitively
+    """
+    catalog = FakeCatalog({1: "Running Shoes", 2: "Shoe polish", 3: "Red  shirt", 4: "Hat"})
+    suggester = new_suggester(catalog)
+    await suggester.ensure_built()
+    assert await suggester.suggest("SH", 10) == [
+        {"id": 2, "name": "Shoe polish"},
+        {"id": 3, "name": "Red  shirt"},
+        {"id": 1, "name": "Running Shoes"},
+    ]
+    assert await suggester.suggest("red sh", 10) == [{"id": 3, "name": "Red  shirt"}]
+    assert await suggester.suggest("sh", 1) == [{"id": 2, "name": "Shoe polish"}]
+    assert await suggester.suggest("x", 10) == []
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_local_writes_update_the_index_without_reloading():
+    """
+    Test that upsert and remove apply in place and keep the index at the new version
+    """
+    catalog = FakeCatalog({1: "Lamp"})
+    suggester = new_suggester(catalog)
+    await suggester.ensure_built()
+
+    suggester.upsert(2, "Desk lamp", version=2)
+    suggester.upsert(1, "Floor light", version=3)
+    assert await suggester.suggest("lamp", 10) == [{"id": 2, "name": "Desk lamp"}]
+    suggester.remove(2, version=4)
+    assert await suggester.suggest("lamp", 10) == []
+    assert await suggester.suggest("light", 10) == [{"id": 1, "name": "Floor light"}]
+    assert suggester.stats()["version"] == 4
+    assert catalog.loads == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_published_changes_from_other_processes_apply_without_reloading():
+    """
+    Test that name changes published by other processes are applied in version order
+    """
+    catalog = FakeCatalog({1: "Lamp", 2: "Desk"})
+    suggester = new_suggester(catalog)
+    await suggester.ensure_built()
+
+    catalog.write(3, "Lantern")
+    catalog.write(1, "Floor light")
+    catalog.write(2, None)
+    assert await suggester.suggest("lan", 10) == []
+    await suggester.sync()
+    assert suggester.stats()["version"] == 4
+
+    assert await suggester.suggest("lan", 10) == [{"id": 3, "name": "Lantern"}]
+    assert await suggester.suggest("l", 10) == [
+        {"id": 3, "name": "Lantern"},
+        {"id": 1, "name": "Floor light"},
+    ]
+    assert await suggester.suggest("desk", 10) == []
+    assert suggester.stats()["changes_applied"] == 3
+    assert catalog.loads == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_missing_change_triggers_a_rebuild():
+    """
+    Test that a write whose change was never published rebuilds the index
+    """
+    catalog = FakeCatalog({1: "Lamp"})
+    suggester = new_suggester(catalog)
+    await suggester.ensure_built()
+
+    catalog.write(2, "Lantern", publish=False)
+    catalog.write(3, "Lamp shade")
+    assert await suggester.suggest("lan", 10) == []
+    await suggester.sync()
+    assert suggester.stats()["rebuilds"] == 2
+    assert await suggester.suggest("lan", 10) == [{"id": 2, "name": "Lantern"}]
+    assert suggester.stats()["version"] == 3
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_failed_build_is_retried_on_next_use():
+    """
+    Test that a failed build answers 503 and the build is retried in the background
+    """
+    catalog = FakeCatalog({1: "Lamp"})
+    catalog.fail = True
+    suggester = new_suggester(catalog)
+    assert await suggester.ensure_built() is False
+    with pytest.raises(ServiceUnavailableError):
+        await suggester.suggest("la", 10)
+
+    catalog.fail = False
+    await wait_for_version(suggester, 1)
+    assert await suggester.suggest("la", 10) == [{"id": 1, "name": "Lamp"}]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_background_task_follows_the_catalog_and_lookups_only_read_memory():
+    """
+    Test that the started task applies other processes' changes and suggest never reads the version
+    """
+    catalog = FakeCatalog({1: "Lamp"})
+    suggester = new_suggester(catalog, sync_interval=0.01)
+    await suggester.ensure_built()
+    for _ in range(20):
+        await suggester.suggest("la", 10)
+    assert catalog.version_reads == 0
+
+    suggester.start()
+    try:
+        catalog.write(2, "Lantern")
+        await wait_for_version(suggester, 2)
+        assert await suggester.suggest("lan", 10) == [{"id": 2, "name": "Lantern"}]
+    finally:
+        await suggester.stop()
+    assert catalog.version_reads > 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_index_holds_packed_entries_not_name_copies():
+    """
+    Test that the index stores one integer per name and later word, and matches repeated words
+    """
+    catalog = FakeCatalog({1: "Tea tea  TEA", 2: "Green tea"})
+    suggester = new_suggester(catalog)
+    await suggester.ensure_built()
+    assert suggester.stats()["entries"] == 5
+    assert all(isinstance(entry, int) for entry in suggester._words)
+
+    assert await suggester.suggest("tea t", 10) == [{"id": 1, "name": "Tea tea  TEA"}]
+    assert await suggester.suggest("tea", 10) == [
+        {"id": 1, "name": "Tea tea  TEA"},
+        {"id": 2, "name": "Green tea"},
+    ]
+    suggester.upsert(1, "Coffee", version=2)
+    assert suggester.stats()["entries"] == 3
+    assert await suggester.suggest("tea", 10) == [{"id": 2, "name": "Green tea"}]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_index_is_built_from_the_primary_when_a_replica_lags(tmp_path):
+    """
+    Test that the version and names come from the primary, so a lagging replica cannot hide writes
+    """
+    primary = create_catalog_db(tmp_path / "primary.db", version=2, names={1: "Lamp", 2: "Lantern"})
+    replica = create_catalog_db(tmp_path / "replica.db", version=1, names={1: "Lamp"})
+    replica_set = ReplicaSet([replica.sync_engine], check_interval=3600, lag_probe=lambda engine: 0.0)
+    replica_set.refresh()
+    sessions = async_sessionmaker(
+        bind=primary,
+        sync_session_class=RoutingSession,
+        replicas=replica_set,
+        replica_binds=[replica.sync_engine],
+    )
+    try:
+        # Read-only sessions of this factory would read the replica
+        async with sessions(info={"read_only": True}) as db:
+            assert (await db.execute(select(Product.name).where(Product.id == 2))).first() is None
+
+        catalog = FakeCatalog({})
+        catalog.version = 2
+        suggester = ProductSuggester(
+            lambda: _load_catalog(sessions), catalog.catalog_version, changes=catalog, gap_wait=0
+        )
+        await suggester.ensure_built()
+        assert suggester.stats()["version"] == 2
+        assert await suggester.suggest("lan", 10) == [{"id": 2, "name": "Lantern"}]
+
+        catalog.write(3, "Lanyard")
+        await suggester.sync()
+        assert await suggester.suggest("lan", 10) == [
+            {"id": 2, "name": "Lantern"},
+            {"id": 3, "name": "Lanyard"},
+        ]
+    finally:
+        await primary.dispose()
+        await replica.dispose()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_name_change_log_keeps_newest_changes_in_version_order():
+    """
+    Test that the Redis change log returns a version range in order and is trimmed
+    """
+    redis = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    log = NameChangeLog(lambda: redis, size=3)
+    for version, name in ((12, "b"), (11, "a"), (13, None), (14, "d")):
+        await log.publish(version, version, name)
+
+    assert await log.since(11, 14) == [(12, 12, "b"), (13, 13, None), (14, 14, "d")]
+    assert await log.since(12, 13) == [(13, 13, None)]
+    # Trimmed to the newest three
+    assert await log.since(0, 14) == [(12, 12, "b"), (13, 13, None), (14, 14, "d")]
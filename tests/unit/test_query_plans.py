@@ -0,0 +1,212 @@
+"""
+Tests that the service queries are served by indexes on the migrated schema
+"""
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+from unittest.mock import MagicMock
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.messaging.outbox import OutboxRelay, enqueue_event
+from app.migrations import alembic_config, include_name, upgrade_schema
+from app.models.base import Base
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.models.user import User
+from app.schemas.order import OrderCreate
+from app.services import product as product_service
+from app.services.order_service import OrderService
+from app.services.payment_service import PaymentService
+from app.services.user import create_access_token, get_current_user, principal_cache
+from app.services.pagination import encode_cursor
+from app.tasks import order_tasks
+
+# Plan steps that walk an index or the primary key rather than the whole table
+# (an FTS5 MATCH plans as a virtual table scan with an M constraint)
+INDEXED_SCANS = (
+    "USING INDEX",
+    "USING COVERING INDEX",
+    "USING INTEGER PRIMARY KEY",
+    "VIRTUAL TABLE INDEX 0:M",
+)
+
+
+@pytest.fixture
+def migrated_engine(tmp_path):
+    """
+    Engine on a fresh SQLite database built by the migrations, with sample rows
+    """
+    url = f"sqlite:///{tmp_path / 'plans.db'}"
+    upgrade_schema(url)
+    engine = create_engine(url)
+    with sessionmaker(bind=engine)() as db:
+        user = User(username="alice", hashed_password="x")
+        products = [Product(name=f"Product {i}", price=10 + i) for i in range(5)]
+        db.add_all([user, *products])
+        db.flush()
+        order = Order(order_number="ORD-1", user_id=user.id, total_amount=10, payment_status="completed")
+        order.items = [OrderItem(product_id=products[0].id, quantity=1, price=10)]
+        db.add(order)
+        enqueue_event(db, "order_events", "order.created", {"order_id": 1})
+        db.commit()
+    yield engine
+    engine.dispose()
+
+
+@contextmanager
+def record_queries(engine) -> Iterator[List[Tuple[str, tuple]]]:
+    """
+    Record every SELECT executed on the engine inside the block, with its parameters
+    """
+    queries: List[Tuple[str, tuple]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            queries.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def full_scans(engine, queries: List[Tuple[str, tuple]]) -> List[str]:
+    """
+    EXPLAIN each query and describe every step that scans a whole table
+    """
+    problems = []
+    with engine.connect() as conn:
+        for statement, parameters in queries:
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            for step in (row[3] for row in plan):
+                if step.startswith("SCAN") and not any(s in step for s in INDEXED_SCANS):
+                    problems.append(f"{step}: {statement}")
+    return problems
+
+
+def assert_indexed(engine, queries):
+    assert queries, "no queries were recorded"
+    problems = full_scans(engine, queries)
+    assert not problems, "\n".join(problems)
+
+
+@pytest.mark.unit
+def test_migrations_match_models(migrated_engine):
+    """
+    Test that the migrations build exactly the schema the models declare
+    """
+    with migrated_engine.connect() as conn:
+        context = MigrationContext.configure(conn, opts={"include_name": include_name})
+        diff = compare_metadata(context, Base.metadata)
+    assert diff == []
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("created_after_outbox", [False, True])
+def test_stamped_legacy_database_upgrades_to_models(tmp_path, created_after_outbox):
+    """
+    Test that a create_all database stamped at 0001 gains every later table and index
+    """
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    engine = create_engine(url)
+    # The baseline schema; later create_all databases also had the listing indexes and outbox
+    upgrade_schema(url, "0001")
+    if created_after_outbox:
+        Base.metadata.tables["outbox_events"].create(engine)
+        for index in Base.metadata.tables["products"].indexes:
+            if index.name in ("ix_products_price_id", "ix_products_name_pattern"):
+                index.create(engine)
+    command.stamp(alembic_config(url), "0001")
+
+    upgrade_schema(url)
+    with engine.connect() as conn:
+        context = MigrationContext.configure(conn, opts={"include_name": include_name})
+        assert compare_metadata(context, Base.metadata) == []
+    engine.dispose()
+
+
+@pytest.mark.unit
+def test_migrations_downgrade_to_base(migrated_engine):
+    """
+    Test that every migration can be reverted
+    """
+    command.downgrade(alembic_config(str(migrated_engine.url)), "base")
+    with migrated_engine.connect() as conn:
+        assert MigrationContext.configure(conn).get_current_revision() is None
+
+
+@pytest.mark.unit
+def test_product_queries_use_indexes(migrated_engine):
+    """
+    Test the catalog page, price filter, detail and search queries
+    """
+    db = sessionmaker(bind=migrated_engine)()
+    with record_queries(migrated_engine) as queries:
+        # A cursor page seeks on the primary key; the first page reads only limit rows in id order
+        product_service.get_products(db, limit=2, cursor=encode_cursor({"id": 2}))
+        product_service.get_products(db, limit=2, min_price=11, max_price=12)
+        product_service.get_product(db, 1)
+        _, next_cursor = product_service.search_products(db, "product", limit=2)
+        product_service.search_products(db, "product", limit=2, cursor=next_cursor)
+    db.close()
+    assert_indexed(migrated_engine, queries)
+
+
+@pytest.mark.unit
+def test_order_queries_use_indexes(migrated_engine):
+    """
+    Test order creation, detail (with its items) and history page queries
+    """
+    db = sessionmaker(bind=migrated_engine)()
+    order_data = OrderCreate(items=[{"product_id": 1, "quantity": 2}], payment_method="credit_card")
+    with record_queries(migrated_engine) as queries:
+        OrderService.create_order(db, order_data, user_id=1)
+        db.expire_all()
+        order = OrderService.get_order_by_id(db, 1, user_id=1)
+        assert len(order.items) == 1
+        _, next_cursor = OrderService.get_user_orders(db, user_id=1, limit=1)
+        OrderService.get_user_orders(db, user_id=1, limit=1, cursor=next_cursor)
+        OrderService.get_user_orders(db, user_id=1, status=OrderStatus.PENDING, cursor=next_cursor)
+    db.close()
+    assert_indexed(migrated_engine, queries)
+
+
+@pytest.mark.unit
+def test_payment_and_auth_queries_use_indexes(migrated_engine):
+    """
+    Test payment status, the pending-payment sweep and principal lookup queries
+    """
+    Session = sessionmaker(bind=migrated_engine)
+    principal_cache.clear()
+    db = Session()
+    # A payment the provider completed but the order never heard about
+    db.get(Order, 1).payment_status = "pending"
+    db.commit()
+    with record_queries(migrated_engine) as queries:
+        PaymentService.verify_payment_status(db, 1)
+        get_current_user(token=create_access_token({"sub": "alice"}), db=db)
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(order_tasks, "SessionLocal", Session)
+            mp.setattr(order_tasks, "fetch_payment_statuses", lambda order_ids: {1: "completed"})
+            order_tasks.verify_pending_payments(stale_after=0)
+    db.close()
+    assert_indexed(migrated_engine, queries)
+    with Session() as db:
+        assert db.get(Order, 1).status == OrderStatus.PAID
+
+
+@pytest.mark.unit
+def test_outbox_relay_query_uses_partial_index(migrated_engine):
+    """
+    Test that the relay finds pending events through the partial index
+    """
+    relay = OutboxRelay(sessionmaker(bind=migrated_engine), client=MagicMock())
+    with record_queries(migrated_engine) as queries:
+        assert relay.relay_batch() == 1
+    assert_indexed(migrated_engine, queries)
@@ -0,0 +1,156 @@
+"""
+Tests for read-replica routing of read-only sessions
+"""
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, select
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.database import ReplicaSet, RoutingSession, replication_lag
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+def make_engine(path, name):
+    """
+    Create a SQLite database holding a single row that names its source
+    """
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(Item.__table__.insert(), {"id": 1, "name": name})
+    return engine
+
+
+@pytest.fixture
+def engines(tmp_path):
+    primary = make_engine(tmp_path / "primary.db", "primary")
+    replicas = [
+        make_engine(tmp_path / f"replica{i}.db", f"replica{i}") for i in range(2)
+    ]
+    yield primary, replicas
+    for engine in [primary, *replicas]:
+        engine.dispose()
+
+
+def make_sessionmaker(primary, replicas, lags):
+    replica_set = ReplicaSet(
+        replicas,
+        max_lag=5,
+        check_interval=3600,
+        lag_probe=lambda engine: lags[replicas.index(engine)],
+    )
+    replica_set.refresh()
+    return sessionmaker(
+        class_=RoutingSession, bind=primary, replicas=replica_set, replica_binds=replicas
+    )
+
+
+def read_name(session):
+    return session.execute(select(Item.name).where(Item.id == 1)).scalar_one()
+
+
+@pytest.mark.unit
+def test_read_only_session_reads_from_replica(engines):
+    """
+    Test that a read-only session reads from a replica and sticks to it
+    """
+    primary, replicas = engines
+    Session = make_sessionmaker(primary, replicas[:1], [0.0])
+
+    with Session(info={"read_only": True}) as db:
+        assert read_name(db) == "replica0"
+        assert read_name(db) == "replica0"
+
+    with Session() as db:
+        assert read_name(db) == "primary"
+
+
+@pytest.mark.unit
+def test_writes_go_to_primary(engines):
+    """
+    Test that flushes from a read-only session still reach the primary
+    """
+    primary, replicas = engines
+    Session = make_sessionmaker(primary, replicas[:1], [0.0])
+
+    with Session(info={"read_only": True}) as db:
+        db.add(Item(id=2, name="written"))
+        db.commit()
+
+    with Session() as db:
+        assert db.get(Item, 2) is not None
+
+
+@pytest.mark.unit
+def test_lagging_replica_falls_back_to_primary(engines):
+    """
+    Test that a replica past the lag threshold or unreachable is skipped
+    """
+    primary, replicas = engines
+    Session = make_sessionmaker(primary, replicas, [30.0, None])
+
+    with Session(info={"read_only": True}) as db:
+        assert read_name(db) == "primary"
+
+
+@pytest.mark.unit
+def test_round_robin_across_healthy_replicas(engines):
+    """
+    Test that successive read-only sessions spread across healthy replicas
+    """
+    primary, replicas = engines
+    Session = make_sessionmaker(primary, replicas, [0.0, 1.0])
+
+    names = set()
+    for _ in range(4):
+        with Session(info={"read_only": True}) as db:
+            names.add(read_name(db))
+    assert names == {"replica0", "replica1"}
+
+
+@pytest.mark.unit
+def test_replication_lag_from_wal_receiver_status():
+    """
+    Test that a caught-up streaming standby has no lag and one that stopped receiving is unhealthy
+    """
+    # Streaming and everything received replayed: caught up however idle the primary is
+    assert replication_lag(True, 42, "streaming", 3.0, True, 600.0) == 0.0
+    assert replication_lag(True, 42, "streaming", 3.0, False, 7.5) == 7.5
+    # Not a standby at all
+    assert replication_lag(False, None, None, None, None, None) == 0.0
+    # Without pg_read_all_stats the receiver's details are hidden: use the replay age
+    assert replication_lag(True, 42, None, None, True, 600.0) == 600.0
+
+    for disconnected in (
+        (True, None, None, None, True, 600.0),
+        (True, 42, "waiting", 3.0, True, 600.0),
+        (True, 42, "streaming", 120.0, True, 600.0),
+    ):
+        with pytest.raises(ConnectionError):
+            replication_lag(*disconnected, receiver_timeout=60)
+
+
+@pytest.mark.unit
+def test_disconnected_replica_falls_back_to_primary(engines):
+    """
+    Test that a replica whose lag probe reports a stopped WAL receiver is not used
+    """
+    primary, replicas = engines
+
+    def probe(engine):
+        return replication_lag(True, None, None, None, True, 0.0)
+
+    replica_set = ReplicaSet(replicas[:1], max_lag=5, check_interval=3600, lag_probe=probe)
+    replica_set.refresh()
+    Session = sessionmaker(
+        class_=RoutingSession, bind=primary, replicas=replica_set, replica_binds=replicas[:1]
+    )
+    with Session(info={"read_only": True}) as db:
+        assert read_name(db) == "primary"
@@ -0,0 +1,52 @@
+"""
+Tests for the encoded response body cache
+"""
+import time
+import pytest
+
+from app.services.response_cache import ResponseCache
+
+
+@pytest.mark.unit
+def test_hit_and_miss_counters():
+    """
+    Test that stored bodies are returned as-is and lookups are counted
+    """
+    cache = ResponseCache(max_bytes=100)
+    assert cache.get("a") is None
+    cache.put("a", b'{"items":[]}')
+    assert cache.get("a") == b'{"items":[]}'
+    assert cache.stats() == {"entries": 1, "bytes": 12, "hits": 1, "misses": 1}
+
+
+@pytest.mark.unit
+def test_least_recently_used_bodies_are_evicted_by_size():
+    """
+    Test that the total size stays within the byte budget
+    """
+    cache = ResponseCache(max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    cache.get("a")
+    cache.put("c", b"cccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.stats()["bytes"] == 8
+
+    cache.put("huge", b"x" * 11)
+    assert cache.get("huge") is None
+    assert cache.stats()["entries"] == 2
+
+
+@pytest.mark.unit
+def test_entries_expire_after_max_age():
+    """
+    Test that a body is not served once it is older than max_age, even for the same key
+    """
+    cache = ResponseCache(max_bytes=100, max_age=0.05)
+    cache.put("a", b"aaaa")
+    assert cache.get("a") == b"aaaa"
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["bytes"] == 0
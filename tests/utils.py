@@ -1,8 +1,11 @@
 """
 Test utility functions
 """
+import re
+from contextlib import contextmanager
 from httpx import AsyncClient
-from typing import Dict
+from sqlalchemy import event
+from typing import Dict, Iterator, List
 from jose import jwt
 from datetime import datetime, timedelta
 
@@ -80,4 +83,40 @@ async def get_auth_headers(client: AsyncClient) -> Dict[str, str]:
     Get authorization headers with Bearer token
     """
     token = await get_auth_token(client)
-    return {"Authorization": f"Bearer {token}"} 
\ No newline at end of file
+    return {"Authorization": f"Bearer {token}"} 
+
+@contextmanager
+def count_queries(engine) -> Iterator[List[str]]:
+    """
+    Record every SQL statement executed on the engine inside the block
+    """
+    statements: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def query_count(response) -> int:
+    """
+    Number of SQL statements the request ran, from its Server-Timing header
+    """
+    match = re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', response.headers.get("server-timing", ""))
+    assert match, "response has no db Server-Timing entry"
+    return int(match.group(1))
+
+
+def assert_max_queries(response, maximum: int):
+    """
+    Fail when the request ran more SQL statements than allowed, e.g. after an N+1 regression
+    """
+    count = query_count(response)
+    assert count <= maximum, (
+        f"{response.request.method} {response.request.url.path} ran {count} SQL statements, "
+        f"at most {maximum} allowed"
+    )